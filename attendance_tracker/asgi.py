@@ -3,6 +3,31 @@ ASGI config for attendance_tracker project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Async deployment profile: one uvicorn worker with the async JSON views
+(tracker.async_views) instead of gunicorn's sync workers, e.g.
+
+    ASYNC_VIEWS=True uvicorn attendance_tracker.asgi:application \
+        --host 0.0.0.0 --port $PORT --workers 1 --no-access-log
+
+The worker serves many requests at once while they wait on the database.
+With PostgreSQL every in-flight request holds its own connection, so keep
+concurrent requests under max_connections (ASYNC_VIEWS also turns off
+persistent connections). It pays off when requests mostly wait on a
+remote database; with SQLite or on a single core the sync workers are
+faster. scripts/load_test.py compares both profiles on the same machine.
+
+Stay at --workers 1 unless CACHE_BACKEND points at a cache shared between
+processes (e.g. Redis): the default local-memory cache keeps the per-user
+version tokens of tracker.cache in each process, so a write handled by
+one worker would leave the others serving stale timetables, thresholds
+and suggestions (and answering suggestion polls with 304s).
+
+With EVENTS_STREAM open pages get live updates over Server-Sent Events at
+/events/, served by tracker.events.EventStreamApp in front of Django. Its
+default in-process broker only reaches streams in the worker that handled
+the write, so EVENTS_STREAM is off by default unless EVENTS_BROKER points
+at a shared broker; set it explicitly only with --workers 1.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -14,3 +39,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendance_tracker.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.EVENTS_STREAM:
+    from tracker.events import EventStreamApp  # noqa: E402
+
+    application = EventStreamApp(application)
@@ -23,7 +23,9 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # For serving static files on Render
+    'tracker.middleware.RequestMetricsMiddleware',  # Off unless REQUEST_METRICS=True
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'tracker.middleware.SlidingSessionMiddleware',  # Sliding expiry without a write per request
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -44,6 +46,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'tracker.context_processors.live_updates',
             ],
         },
     },
@@ -51,6 +54,26 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'attendance_tracker.wsgi.application'
 
+# Serve the attendance JSON endpoints and suggestions_api from the async
+# views in tracker.async_views. Meant for the uvicorn profile in
+# attendance_tracker/asgi.py; under gunicorn's sync workers the sync views
+# are cheaper.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
+
+# Push course counters, suggestion changes and manual slots to open pages
+# over Server-Sent Events (tracker.events) instead of polling. Needs the
+# uvicorn profile. The default in-process broker only reaches pages served
+# by the worker that handled the write, so streaming is off unless
+# EVENTS_BROKER names a broker shared between processes, or EVENTS_STREAM
+# is set for a single-worker deployment.
+EVENTS_BROKER = os.getenv('EVENTS_BROKER', 'tracker.events.InProcessBroker')
+EVENTS_STREAM = os.getenv('EVENTS_STREAM', str(EVENTS_BROKER != 'tracker.events.InProcessBroker')) == 'True'
+EVENTS_PATH = '/events/'
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv('EVENTS_MAX_SUBSCRIBERS', '10000'))  # open streams per process
+EVENTS_QUEUE_SIZE = 32  # undelivered slot events per stream before it asks the page to reload
+EVENTS_HEARTBEAT = 25  # seconds; keeps proxies from timing out idle streams
+EVENTS_MAX_AGE = 15 * 60  # seconds before a stream ends and the browser reconnects
+
 # Database config (safe for both local SQLite and production PostgreSQL)
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///db.sqlite3")
 
@@ -60,8 +83,55 @@ if DATABASE_URL.startswith("sqlite"):
     }
 else:
     DATABASES = {
-        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600, ssl_require=True)
+        # Persistent connections are per thread and leak under ASGI, so only WSGI keeps them
+        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=0 if ASYNC_VIEWS else 600, ssl_require=True)
+    }
+
+# Cache (local memory by default, which is only correct with a single worker
+# process: tracker.cache invalidates by bumping per-user version tokens in
+# the cache, so several workers must share a Redis or file-based cache
+# through CACHE_BACKEND/CACHE_LOCATION)
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'attendance-tracker'),
     }
+}
+
+# Institution-wide attendance requirement (percent) and the band above it in
+# which attending is still recommended. They are set here (or through the
+# environment) only: there is no institution ThresholdPolicy row to edit.
+# Users and courses override them with their own ThresholdPolicy.
+ATTENDANCE_THRESHOLD = int(os.getenv('ATTENDANCE_THRESHOLD', '75'))
+ATTENDANCE_WARNING_MARGIN = int(os.getenv('ATTENDANCE_WARNING_MARGIN', '5'))
+
+# Delta sync (/api/v1/sync/, see tracker.sync): changes from the last
+# SYNC_SETTLE_SECONDS are sent again on the next sync so late commits are
+# not missed, and deletions are remembered for SYNC_TOMBSTONE_DAYS (older
+# cursors get everything again).
+SYNC_SETTLE_SECONDS = int(os.getenv('SYNC_SETTLE_SECONDS', '30'))
+SYNC_TOMBSTONE_DAYS = int(os.getenv('SYNC_TOMBSTONE_DAYS', '30'))
+
+# Per-view timing and query metrics at /internal/metrics (staff only).
+# A request that repeats one SQL shape more than REQUEST_METRICS_N_PLUS_ONE
+# times is logged as a possible N+1.
+REQUEST_METRICS = os.getenv('REQUEST_METRICS', 'False') == 'True'
+REQUEST_METRICS_N_PLUS_ONE = int(os.getenv('REQUEST_METRICS_N_PLUS_ONE', '10'))
+
+# One backend, one user lookup per login (see tracker.backends)
+AUTHENTICATION_BACKENDS = ['tracker.backends.CustomAuthBackend']
+
+# PBKDF2 cost for new hashes; Django's default (600000) unless raised. Lower
+# values are treated as the default, since existing hashes are rehashed to
+# this cost on each user's next login (see tracker.hashers).
+PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', '600000'))
+PASSWORD_HASHERS = [
+    'tracker.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -87,7 +157,16 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 CSRF_COOKIE_SECURE = not DEBUG
 SESSION_COOKIE_SECURE = not DEBUG
 SESSION_COOKIE_AGE = 86400
-SESSION_SAVE_EVERY_REQUEST = True
+
+# Sessions still expire a day after the last request, but instead of saving
+# the session on every request (SESSION_SAVE_EVERY_REQUEST) it is only saved
+# once the expiry would move forward by SESSION_REFRESH_INTERVAL seconds, so
+# an active session is written about once an hour. SESSION_ENGINE can be set
+# to django.contrib.sessions.backends.cached_db to also serve reads from the
+# cache. Expired rows are purged in batches by run_maintenance.
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'django.contrib.sessions.backends.db')
+SESSION_SAVE_EVERY_REQUEST = os.getenv('SESSION_SAVE_EVERY_REQUEST', 'False') == 'True'
+SESSION_REFRESH_INTERVAL = int(os.getenv('SESSION_REFRESH_INTERVAL', '3600'))
 
 # Login redirects
 LOGIN_URL = 'login'
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: idle Server-Sent Event streams per process
+
+Opens thousands of streams on tracker.events.EventStreamApp in one event
+loop, as uvicorn would, and reports the Python memory each idle stream
+holds (tracemalloc) and how long a publish from another thread takes to
+reach every stream. Sessions and counters come from stand-ins, so no
+database is needed; the server's own socket buffers are not included.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import django
+
+# Add the project directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set Django settings module
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendance_tracker.settings')
+os.environ['EVENTS_STREAM'] = 'True'
+
+# Setup Django
+django.setup()
+
+from django.conf import settings
+from tracker.events import EventStreamApp, get_broker
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--streams', type=int, nargs='+', default=[1000, 5000])
+    parser.add_argument('--users', type=int, default=500, help='Streams are spread over this many users')
+    return parser.parse_args()
+
+async def not_found(scope, receive, send):
+    raise AssertionError('only the event stream is requested')
+
+class Client:
+    """One open stream: counts the events it receives"""
+
+    def __init__(self, app, user_id):
+        self.disconnect = asyncio.Event()
+        self.received = 0
+        self.changed = asyncio.Event()
+        scope = {'type': 'http', 'path': settings.EVENTS_PATH, 'method': 'GET',
+                 'headers': [(b'cookie', f'{settings.SESSION_COOKIE_NAME}={user_id}'.encode())]}
+        self.task = asyncio.ensure_future(app(scope, self.receive, self.send))
+
+    async def receive(self):
+        await self.disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message.get('body', b'').startswith(b'event: courses'):
+            self.received += 1
+            self.changed.set()
+
+def make_app():
+    app = EventStreamApp(not_found)
+
+    async def authenticate(cookie_header):
+        return int(cookie_header.split('=', 1)[1])
+
+    async def snapshot(user_id):
+        return [{'id': user_id, 'attended': 7, 'total': 10, 'percentage': 70.0, 'below_threshold': True}]
+
+    app.authenticate, app.snapshot = authenticate, snapshot
+    return app
+
+async def run_level(count, users):
+    app = make_app()
+    broker = get_broker()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    started = time.perf_counter()
+    clients = [Client(app, i % users) for i in range(count)]
+    while broker.count < count or any(client.received == 0 for client in clients):
+        await asyncio.sleep(0.05)
+    opened = time.perf_counter() - started
+    # Let every stream settle into waiting on its subscription
+    await asyncio.sleep(0.2)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    per_stream = sum(stat.size_diff for stat in after.compare_to(before, 'filename')) / count
+
+    # Publish from another thread, as a sync view committing a change would
+    for client in clients:
+        client.changed.clear()
+    started = time.perf_counter()
+    threading.Thread(target=lambda: [broker.publish(user, 'changed') for user in range(users)]).start()
+    await asyncio.gather(*(client.changed.wait() for client in clients))
+    fan_out = time.perf_counter() - started
+
+    for client in clients:
+        client.disconnect.set()
+    await asyncio.gather(*(client.task for client in clients))
+    assert broker.count == 0
+    return opened, per_stream, fan_out
+
+def run_benchmark():
+    args = parse_args()
+    print(f"{'streams':>8} {'users':>6} {'open s':>7} {'KiB/stream':>11} {'fan-out ms':>11}")
+    for count in args.streams:
+        opened, per_stream, fan_out = asyncio.run(run_level(count, args.users))
+        print(f"{count:>8} {args.users:>6} {opened:>7.2f} {per_stream / 1024:>11.2f} {fan_out * 1000:>11.1f}")
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+Benchmark: streaming attendance export vs building the whole file in memory
+
+Fills a throwaway test database with attendance records, then reports
+rows/sec and the growth of peak RSS while exporting them, first through
+the streaming exporter and then by loading every record into a list.
+Peak RSS only ever grows, so the streaming run goes first.
+
+Usage: python scripts/bench_export.py [rows]
+"""
+
+import os
+import sys
+import django
+import resource
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Add the project directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set Django settings module
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendance_tracker.settings')
+
+# Setup Django
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import setup_test_environment
+from django.contrib.auth.models import User
+from tracker.export import iter_csv, iter_export
+from tracker.models import AttendanceRecord, Course, LectureSchedule
+
+DAYS_PER_COURSE = 1000
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def fill(rows):
+    user = User.objects.create_user('export-bench')
+    start = date(2020, 1, 1)
+    course_count = -(-rows // DAYS_PER_COURSE)
+    for c in range(course_count):
+        course = Course.objects.create(user=user, name=f'Course {c}', is_regular=True)
+        schedule = LectureSchedule.objects.create(course=course, day_of_week='monday', start_time='09:00', end_time='10:00', room=f'R{c}')
+        count = min(DAYS_PER_COURSE, rows - c * DAYS_PER_COURSE)
+        AttendanceRecord.objects.bulk_create(
+            [AttendanceRecord(course=course, schedule=schedule, date=start + timedelta(days=d), attended=d % 4 != 0)
+             for d in range(count)],
+            batch_size=2000
+        )
+
+def measure(label, rows, produce):
+    before = peak_rss_mb()
+    started = time.perf_counter()
+    size = 0
+    for chunk in produce():
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<18} {rows:>9} {elapsed:>7.2f} {rows / elapsed:>11,.0f} {size / 1e6:>7.1f} {peak_rss_mb() - before:>9.1f}")
+
+def run_benchmark(rows):
+    setup_test_environment()
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.mkdtemp(), 'export.sqlite3')
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    try:
+        fill(rows)
+        print(f"{'export':<18} {'rows':>9} {'secs':>7} {'rows/sec':>11} {'MB out':>7} {'+peak MB':>9}")
+        measure('streaming csv', rows, lambda: iter_export(export_format='csv'))
+        measure('streaming ndjson', rows, lambda: iter_export(export_format='ndjson'))
+        # What a naive view does: every record as a model instance, then the file as one string
+        def in_memory():
+            records = list(AttendanceRecord.objects.select_related('course__user', 'schedule').order_by('course_id', 'date'))
+            values = [
+                (r.course.user.username, r.course_id, r.course.name, r.date, r.attended,
+                 r.schedule and r.schedule.day_of_week, r.schedule and r.schedule.start_time,
+                 r.schedule and r.schedule.end_time, r.schedule and r.schedule.room,
+                 r.schedule and r.schedule.professor, r.notes)
+                for r in records
+            ]
+            return [''.join(iter_csv(values))]
+        measure('in-memory csv', rows, in_memory)
+    finally:
+        connection.creation.destroy_test_db(settings.DATABASES['default']['NAME'], verbosity=0)
+
+if __name__ == '__main__':
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: semester forecasts for many courses over long horizons
+
+Compares tracker.forecast.forecast_courses with expanding every remaining
+lecture of each course and walking the list, for unsaved courses with
+three weekly lectures each, so no database is needed.
+"""
+
+import os
+import sys
+import django
+import timeit
+from datetime import date, time, timedelta
+
+# Add the project directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set Django settings module
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendance_tracker.settings')
+
+# Setup Django
+django.setup()
+
+from tracker.forecast import forecast_courses, lectures_to_reach, max_skippable
+from tracker.models import Course, LectureSchedule
+from tracker.occurrences import expand_occurrences
+
+def make_courses(count):
+    days = [code for code, name in LectureSchedule.DAYS_OF_WEEK[:5]]
+    courses = []
+    for i in range(count):
+        schedules = [
+            LectureSchedule(id=i * 3 + j, day_of_week=days[(i + j * 2) % 5], start_time=time(8 + (i + j) % 9),
+                            end_time=time(9 + (i + j) % 9))
+            for j in range(3)
+        ]
+        total = 20 + i % 30
+        course = Course(id=i + 1, name=f'Course {i}', is_regular=True, total_lectures=total,
+                        attended_lectures=int(total * (0.5 + (i % 10) / 20)))
+        # Stand in for prefetch_related('schedules') and with_thresholds()
+        course._prefetched_objects_cache = {'schedules': schedules}
+        course.policy_threshold, course.policy_warning_margin = 75, 5
+        courses.append(course)
+    return courses
+
+def naive(courses, start, end, holidays):
+    """Per course: expand every remaining lecture, then index into the list"""
+    results = {}
+    for course in courses:
+        dates = [day for day, schedule in expand_occurrences(course.schedules.all(), start, end) if day not in holidays]
+        attended, total = course.attended_lectures, course.total_lectures
+        needed = lectures_to_reach(attended, total, course.threshold)
+        skippable = max_skippable(attended, total, len(dates), course.threshold)
+        results[course.id] = (
+            len(dates), skippable,
+            dates[needed - 1] if needed and needed <= len(dates) else None,
+            dates[skippable] if 0 <= skippable < len(dates) else None,
+        )
+    return results
+
+def run_benchmark():
+    start = date(2025, 1, 6)
+    print(f"{'courses':>8} {'days':>5} {'naive ms':>9} {'engine ms':>10}")
+    for course_count in (10, 100, 300):
+        courses = make_courses(course_count)
+        for days in (120, 365):
+            end = start + timedelta(days=days)
+            holidays = {start + timedelta(days=d) for d in range(0, days, 17)}
+            expected = naive(courses, start, end, holidays)
+            got = forecast_courses(courses, start, end, holidays)
+            assert all(
+                (f['remaining_lectures'], f['max_skippable'], f['reach_date'], f['unreachable_date']) == expected[cid]
+                for cid, f in got.items()
+            )
+            repeat = 20
+            naive_s = timeit.timeit(lambda: naive(courses, start, end, holidays), number=repeat) / repeat
+            engine_s = timeit.timeit(lambda: forecast_courses(courses, start, end, holidays), number=repeat) / repeat
+            print(f"{course_count:>8} {days:>5} {naive_s * 1000:>9.2f} {engine_s * 1000:>10.2f}")
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: free-slot search over a cached week with many lectures and slots
+
+The week dicts are put straight into the timetable cache, so this measures
+what /api/free-slots/ does on a warm cache (cache read plus the sweep)
+without needing a database.
+"""
+
+import os
+import sys
+import django
+import timeit
+from datetime import date, time, timedelta
+
+# Add the project directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set Django settings module
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendance_tracker.settings')
+
+# Setup Django
+django.setup()
+
+from tracker.cache import set_cached_weekly_schedule
+from tracker.free_slots import find_free_slots
+from tracker.models import LectureSchedule, Timetable, TimetableSlot
+
+def make_week(week_start, item_count):
+    """Week dict shaped like Timetable._build_weekly_schedule with short items spread over the days"""
+    days = [code for code, name in LectureSchedule.DAYS_OF_WEEK]
+    schedule = {code: [] for code in days}
+    for i in range(item_count):
+        day = days[i % 7]
+        start = 6 * 60 + (i * 37) % (16 * 60 - 20)
+        start_time, end_time = time(start // 60, start % 60), time((start + 20) // 60, (start + 20) % 60)
+        slot = TimetableSlot(title=f'Slot {i}', date=week_start + timedelta(days=i % 7),
+                             start_time=start_time, end_time=end_time)
+        schedule[day].append({'type': 'manual_slot', 'item': slot, 'title': slot.title,
+                              'start_time': start_time, 'end_time': end_time, 'notes': '', 'date': slot.date})
+    for entries in schedule.values():
+        entries.sort(key=lambda x: x['start_time'])
+    return schedule
+
+def run_benchmark():
+    week_start = date(2025, 1, 6)
+    timetable = Timetable(user_id=10 ** 9)
+    print(f"{'items':>6} {'results':>8} {'ms/query':>9}")
+    for item_count in (20, 100, 300, 600):
+        timetable.user_id += 1
+        set_cached_weekly_schedule(timetable.user_id, week_start, make_week(week_start, item_count))
+        search = lambda: find_free_slots(timetable, 30, week_start, week_start + timedelta(days=6),
+                                         time(16), time(20), limit=10)
+        repeat = 200
+        seconds = timeit.timeit(search, number=repeat) / repeat
+        print(f"{item_count:>6} {len(search()):>8} {seconds * 1000:>9.3f}")
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: password checks per second, for sizing login capacity
+
+For several PBKDF2 iteration counts (PASSWORD_HASH_ITERATIONS, from
+Django's default upwards), measures how many logins one sync worker can
+verify per second, and how many an async worker (ASYNC_VIEWS) verifies
+with averify_password when many logins arrive at once and the hashing
+runs on the thread pool. Unsaved users, so no database is needed; the
+end-to-end cost of POST /login/ (queries, session) is the "login"
+endpoint of manage.py bench.
+"""
+
+import os
+import sys
+import asyncio
+import django
+import time
+
+# Add the project directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set Django settings module
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendance_tracker.settings')
+
+# Setup Django
+django.setup()
+
+from django.contrib.auth.models import User
+from django.test.utils import override_settings
+
+from tracker.backends import averify_password
+from tracker.hashers import MIN_ITERATIONS
+
+PASSWORD = 'bench-pass'
+CONCURRENT = 16
+
+def login_rate(user, seconds=2.0):
+    checks = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        assert user.check_password(PASSWORD)
+        checks += 1
+    return checks / (time.perf_counter() - started)
+
+async def async_rate(user, rounds=4):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        results = await asyncio.gather(*(averify_password(user, PASSWORD) for _ in range(CONCURRENT)))
+        assert all(results)
+    return rounds * CONCURRENT / (time.perf_counter() - started)
+
+def run_benchmark():
+    print(f"{os.cpu_count()} CPUs; async: {CONCURRENT} concurrent logins")
+    print(f"{'iterations':>10} {'ms/check':>9} {'sync logins/s':>14} {'async logins/s':>15}")
+    for iterations in (MIN_ITERATIONS, 1000000, 1500000, 2000000):
+        with override_settings(PASSWORD_HASH_ITERATIONS=iterations):
+            user = User(username='bench')
+            user.set_password(PASSWORD)
+            rate = login_rate(user)
+            concurrent = asyncio.run(async_rate(user))
+        print(f"{iterations:>10} {1000 / rate:>9.1f} {rate:>14.1f} {concurrent:>15.1f}")
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: day-by-day lecture expansion vs the weekday occurrence expander
+"""
+
+import os
+import sys
+import django
+import timeit
+from datetime import date, time, timedelta
+
+# Add the project directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set Django settings module
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendance_tracker.settings')
+
+# Setup Django
+django.setup()
+
+from tracker.models import LectureSchedule
+from tracker.occurrences import next_lectures
+
+def legacy_next_lectures(schedules, today, days):
+    """The original Course.get_next_lectures loop, kept here for comparison"""
+    end_date = today + timedelta(days=days)
+    upcoming = []
+    current_date = today
+    while current_date <= end_date:
+        day_name = current_date.strftime('%A').lower()
+        for schedule in schedules:
+            if schedule.day_of_week == day_name:
+                upcoming.append({
+                    'date': current_date,
+                    'schedule': schedule,
+                    'is_today': current_date == today,
+                    'days_from_now': (current_date - today).days
+                })
+        current_date += timedelta(days=1)
+    return sorted(upcoming, key=lambda x: x['date'])
+
+def make_schedules(count):
+    """Unsaved schedules spread over the week (no database access needed)"""
+    days = [code for code, name in LectureSchedule.DAYS_OF_WEEK]
+    return [
+        LectureSchedule(day_of_week=days[i % 7], start_time=time(8 + i % 10), end_time=time(9 + i % 10))
+        for i in range(count)
+    ]
+
+def run_benchmark():
+    today = date(2025, 1, 6)
+    print(f"{'schedules':>9} {'days':>5} {'legacy ms':>10} {'expander ms':>12} {'speedup':>8}")
+    for schedule_count in (5, 30, 100):
+        schedules = make_schedules(schedule_count)
+        for days in (7, 30, 120, 365):
+            assert len(legacy_next_lectures(schedules, today, days)) == len(next_lectures(schedules, today, days))
+            repeat = 20
+            legacy = timeit.timeit(lambda: legacy_next_lectures(schedules, today, days), number=repeat) / repeat
+            expander = timeit.timeit(lambda: next_lectures(schedules, today, days), number=repeat) / repeat
+            print(f"{schedule_count:>9} {days:>5} {legacy * 1000:>10.3f} {expander * 1000:>12.3f} {legacy / expander:>7.1f}x")
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Render-time benchmark: legacy per-cell schedule scan vs the precomputed timetable grid
+"""
+
+import os
+import sys
+import django
+import timeit
+from datetime import date, time, timedelta
+
+# Add the project directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set Django settings module
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendance_tracker.settings')
+
+# Setup Django
+django.setup()
+
+from django.template import engines
+from django.template.loader import get_template
+from tracker.models import Course, LectureSchedule, TimetableSlot
+from tracker.timetable_grid import build_timetable_grid, get_time_slots
+
+# The grid markup timetable.html used before the grid was precomputed
+LEGACY_GRID_TEMPLATE = """{% load timetable_extras %}
+{% for day_code, day_name in days_of_week %}
+<div class="day-column">
+    <div class="day-header">{{ day_name }}</div>
+    {% for time_slot in time_slots %}
+    <div class="lecture-slot" data-day="{{ day_code }}" data-time="{{ time_slot }}">
+        {% for item in weekly_schedule|lookup:day_code %}
+            {% if item.start_time|time:"H:i" == time_slot %}
+            <div class="lecture-block {% if item.type == 'manual_slot' %}manual-slot-block{% endif %}" style="height: {{ item.item.duration_minutes|div:30|mul:40 }}px;">
+                <div class="lecture-title">{{ item.title }}</div>
+                <div class="lecture-time">{{ item.start_time }} - {{ item.end_time }}</div>
+                {% if item.type == 'lecture' %}
+                    {% if item.room %}
+                        <div class="lecture-room">{{ item.room }}</div>
+                    {% endif %}
+                    <div class="lecture-attendance">
+                        <span class="attendance-percentage {% if item.course.is_below_threshold %}danger{% else %}success{% endif %}">
+                            {{ item.course.attendance_percentage }}%
+                        </span>
+                    </div>
+                {% else %}
+                    <div class="slot-type">{{ item.item.get_slot_type_display }}</div>
+                    <div class="slot-actions">
+                        <button class="btn-mini btn-danger" onclick="deleteSlot({{ item.item.id }}, '{{ item.title }}')" title="Delete">
+                            <i class="fas fa-trash"></i>
+                        </button>
+                    </div>
+                {% endif %}
+            </div>
+            {% endif %}
+        {% endfor %}
+    </div>
+    {% endfor %}
+</div>
+{% endfor %}
+"""
+
+def make_weekly_schedule(items_per_day):
+    """A dense week of unsaved lectures and manual slots (no database access needed)"""
+    schedule = {}
+    week_start = date(2025, 1, 6)
+    for day_index, (day_code, day_name) in enumerate(LectureSchedule.DAYS_OF_WEEK):
+        items = []
+        for i in range(items_per_day):
+            start = time(6 + (i // 2) % 16, 30 * (i % 2))
+            end = time(7 + (i // 2) % 16, 30 * (i % 2))
+            if i % 3:
+                course = Course(name=f'Course {i}', total_lectures=20, attended_lectures=10 + i % 10, is_regular=True)
+                lecture = LectureSchedule(course=course, day_of_week=day_code, start_time=start, end_time=end, room=f'R{i}')
+                items.append({'type': 'lecture', 'item': lecture, 'title': course.name, 'start_time': start,
+                              'end_time': end, 'room': lecture.room, 'professor': '', 'course': course})
+            else:
+                slot = TimetableSlot(title=f'Slot {i}', slot_type='study', date=week_start + timedelta(days=day_index),
+                                     start_time=start, end_time=end)
+                items.append({'type': 'manual_slot', 'item': slot, 'title': slot.title, 'start_time': start,
+                              'end_time': end, 'notes': '', 'date': slot.date})
+        items.sort(key=lambda x: x['start_time'])
+        schedule[day_code] = items
+    return schedule
+
+def run_benchmark():
+    legacy_template = engines['django'].from_string(LEGACY_GRID_TEMPLATE)
+    grid_template = get_template('tracker/timetable_grid.html')
+    time_slots = get_time_slots()
+
+    print(f"{'items/day':>9} {'legacy ms':>10} {'grid ms':>8} {'speedup':>8}")
+    for items_per_day in (2, 8, 20, 32):
+        weekly_schedule = make_weekly_schedule(items_per_day)
+        legacy_context = {
+            'weekly_schedule': weekly_schedule,
+            'time_slots': time_slots,
+            'days_of_week': LectureSchedule.DAYS_OF_WEEK,
+        }
+        repeat = 10
+        legacy = timeit.timeit(lambda: legacy_template.render(legacy_context), number=repeat) / repeat
+        # Building the grid is part of the new request cost, so it is timed too
+        grid = timeit.timeit(
+            lambda: grid_template.render({'timetable_grid': build_timetable_grid(weekly_schedule, time_slots)}),
+            number=repeat
+        ) / repeat
+        print(f"{items_per_day:>9} {legacy * 1000:>10.2f} {grid * 1000:>8.2f} {legacy / grid:>7.1f}x")
+
+if __name__ == '__main__':
+    run_benchmark()
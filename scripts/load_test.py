@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+"""
+Load test: sync WSGI (gunicorn) versus async ASGI (uvicorn, ASYNC_VIEWS)
+
+Starts each server in turn on the same machine with the same number of
+worker processes and database, then keeps a fixed number of requests in
+flight against /update-attendance/, /mark-attendance/ and /api/suggestions/
+for a few seconds per level, reporting throughput, p50/p95 latency and
+errors. Uses a generated dataset in a fresh SQLite file unless
+--database-url points elsewhere (e.g. a scratch PostgreSQL database).
+
+The client runs on the same machine, so on few cores it competes with
+the servers; compare the two profiles with each other, not with
+production numbers.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', help='Database to load (default: a fresh SQLite file)')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=2, help='Server worker processes for both profiles')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32], help='Requests kept in flight')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per endpoint and concurrency level')
+    parser.add_argument('--port', type=int, default=8765)
+    return parser.parse_args()
+
+args = parse_args()
+os.environ['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load.sqlite3')}"
+
+# Add the project directory to Python path
+sys.path.append(PROJECT_DIR)
+
+# Set Django settings module
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendance_tracker.settings')
+
+import django
+
+# Setup Django
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management import call_command
+from django.utils import timezone
+from tracker.datagen import delete_dataset, generate_dataset
+from tracker.models import Course
+
+PREFIX = 'load'
+
+SERVERS = {
+    'wsgi': (['gunicorn', 'attendance_tracker.wsgi:application', '--workers', '{workers}', '--bind', '127.0.0.1:{port}'],
+             {}),
+    'asgi': (['uvicorn', 'attendance_tracker.asgi:application', '--workers', '{workers}', '--port', '{port}',
+              '--no-access-log'], {'ASYNC_VIEWS': 'True'}),
+}
+
+def prepare():
+    """Migrate, generate the dataset and log every user in; returns [(cookie, course ids)]"""
+    call_command('migrate', verbosity=0)
+    delete_dataset(PREFIX)
+    for _ in generate_dataset(users=args.users, prefix=PREFIX):
+        pass
+    sessions = []
+    for user in User.objects.filter(username__startswith=f'{PREFIX}_'):
+        store = SessionStore()
+        store[SESSION_KEY] = str(user.pk)
+        store[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        store.create()
+        courses = list(Course.objects.filter(user=user, is_regular=True).values_list('pk', flat=True))
+        if courses:
+            sessions.append((f'{settings.SESSION_COOKIE_NAME}={store.session_key}', courses))
+    return sessions
+
+def make_request(endpoint, session, i, today):
+    cookie, courses = session
+    course_id = courses[i % len(courses)]
+    if endpoint == 'update_attendance':
+        return 'POST', '/update-attendance/', {'course_id': course_id, 'action': ('increment', 'decrement')[i % 2]}
+    if endpoint == 'mark_attendance_for_date':
+        day = today - timedelta(days=i % 90)
+        return 'POST', '/mark-attendance/', {'course_id': course_id, 'date': day.isoformat(), 'attended': i % 3 != 0}
+    return 'GET', '/api/suggestions/', None
+
+ENDPOINTS = ['update_attendance', 'mark_attendance_for_date', 'suggestions_api']
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server did not start on port {port}')
+
+def run_level(endpoint, sessions, concurrency, today):
+    """Keep ``concurrency`` requests in flight for the duration; returns (requests/s, p50 ms, p95 ms, errors)"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(10 ** 9))
+    stop_at = time.monotonic() + args.duration
+
+    def client_loop():
+        nonlocal errors
+        conn = http.client.HTTPConnection('127.0.0.1', args.port, timeout=30)
+        while time.monotonic() < stop_at:
+            i = next(counter)
+            session = sessions[i % len(sessions)]
+            method, path, body = make_request(endpoint, session, i, today)
+            headers = {'Cookie': session[0], 'Content-Type': 'application/json'}
+            started = time.perf_counter()
+            ok = False
+            try:
+                conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+                response = conn.getresponse()
+                payload = response.read()
+                ok = response.status == 200 and json.loads(payload).get('success', True) is not False
+            except (OSError, http.client.HTTPException, ValueError):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', args.port, timeout=30)
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+                errors += not ok
+        conn.close()
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client_loop)
+    wall = time.monotonic() - started
+    latencies.sort()
+    p = lambda fraction: latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] if latencies else 0
+    return len(latencies) / wall, p(0.5), p(0.95), errors
+
+def run_load_test():
+    sessions = prepare()
+    today = timezone.now().date()
+    print(f"{len(sessions)} users, {args.workers} workers per server, {args.duration:.0f}s per level, "
+          f"database {settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1]}")
+    print(f"{'server':<6} {'endpoint':<26} {'in flight':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    for name, (command, extra_env) in SERVERS.items():
+        command = [part.format(workers=args.workers, port=args.port) for part in command]
+        server = subprocess.Popen(command, cwd=PROJECT_DIR, env=dict(os.environ, **extra_env),
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_port(args.port)
+            for endpoint in ENDPOINTS:
+                for concurrency in args.concurrency:
+                    rate, p50, p95, errors = run_level(endpoint, sessions, concurrency, today)
+                    print(f"{name:<6} {endpoint:<26} {concurrency:>9} {rate:>8.1f} {p50:>8.1f} {p95:>8.1f} {errors:>7}")
+        finally:
+            server.terminate()
+            server.wait()
+    delete_dataset(PREFIX)
+
+if __name__ == '__main__':
+    run_load_test()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Concurrency stress test for the attendance JSON endpoints
+
+Fires hundreds of parallel requests at /update-attendance/ and
+/mark-attendance/ against a throwaway test database and checks that the
+course counters account for every successful request (no lost updates).
+"""
+
+import os
+import sys
+import django
+import json
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+# Add the project directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set Django settings module
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendance_tracker.settings')
+
+# Setup Django
+django.setup()
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.contrib.auth.models import User
+from tracker.models import Course, AttendanceRecord
+
+THREADS = 16
+INCREMENTS = 400
+MARKS = 200
+
+_local = threading.local()
+
+def get_client(user):
+    """One logged-in test client per worker thread"""
+    if not hasattr(_local, 'client'):
+        _local.client = Client()
+        _local.client.force_login(user)
+    return _local.client
+
+def post(user, url, payload):
+    response = get_client(user).post(url, json.dumps(payload), content_type='application/json')
+    return json.loads(response.content).get('success', False)
+
+def run_stress_test():
+    setup_test_environment()
+    if connection.vendor == 'sqlite':
+        # A file-backed test database so every thread sees the same data
+        connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.mkdtemp(), 'stress.sqlite3')
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    try:
+        user = User.objects.create_user('stress', password='stress-pass')
+        course = Course.objects.create(user=user, name='Stress Course', is_regular=True)
+        start = date.today() - timedelta(days=MARKS)
+
+        jobs = [('/update-attendance/', {'course_id': course.id, 'action': 'increment'})] * INCREMENTS
+        # Every date is marked twice (present then present again) so duplicates must count once
+        for i in range(MARKS):
+            payload = {'course_id': course.id, 'date': (start + timedelta(days=i)).isoformat(), 'attended': True}
+            jobs += [('/mark-attendance/', payload), ('/mark-attendance/', payload)]
+
+        results = Counter()
+        def worker(job):
+            try:
+                ok = post(user, *job)
+            finally:
+                connections.close_all()
+            return job[0], ok
+
+        with ThreadPoolExecutor(max_workers=THREADS) as pool:
+            for url, ok in pool.map(worker, jobs):
+                results[(url, ok)] += 1
+
+        course.refresh_from_db()
+        increments = results[('/update-attendance/', True)]
+        marked_dates = AttendanceRecord.objects.filter(course=course, attended=True).count()
+        expected = increments + marked_dates
+
+        print(f"Increments: {increments} ok, {results[('/update-attendance/', False)]} failed")
+        print(f"Mark requests: {results[('/mark-attendance/', True)]} ok, {results[('/mark-attendance/', False)]} failed")
+        print(f"Course counters: attended={course.attended_lectures} total={course.total_lectures} (expected {expected})")
+
+        assert course.attended_lectures == expected, 'lost or duplicated attended_lectures updates'
+        assert course.total_lectures == expected, 'lost or duplicated total_lectures updates'
+        print("No lost updates.")
+    finally:
+        connection.creation.destroy_test_db(settings.DATABASES['default']['NAME'], verbosity=0)
+
+if __name__ == '__main__':
+    run_stress_test()
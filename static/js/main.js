@@ -20,13 +20,74 @@ function initializeApp() {
   // Initialize tooltips
   initializeTooltips()
 
-  // Load smart suggestions periodically
+  // Live updates replace polling when the server streams events
+  if (document.body.dataset.eventsUrl && window.EventSource) {
+    connectEventStream(document.body.dataset.eventsUrl)
+  } else {
+    startPolling()
+  }
+}
+
+function startPolling() {
   if (document.querySelector(".dashboard")) {
     loadSmartSuggestions()
     setInterval(loadSmartSuggestions, 30000) // Refresh every 30 seconds
   }
 }
 
+function connectEventStream(url) {
+  // The browser reconnects by itself; every (re)connect starts with fresh counters and suggestions
+  const source = new EventSource(url)
+
+  source.addEventListener("courses", (event) => {
+    JSON.parse(event.data).courses.forEach(updateCourseCard)
+  })
+
+  source.addEventListener("suggestions", () => {
+    if (document.querySelector(".dashboard")) {
+      loadSmartSuggestions()
+    }
+  })
+
+  source.addEventListener("slot", (event) => {
+    const slot = JSON.parse(event.data)
+    if (slot.action === "created" && !document.querySelector(".timetable-container")) {
+      showAlert(`New slot: ${escapeHtml(slot.title)} on ${slot.date} at ${slot.start_time}`, "info")
+    } else if (document.querySelector(".timetable-container")) {
+      showAlert("Your timetable changed. Reload the page to see it.", "info")
+    }
+  })
+
+  // Too many events were missed while the page was busy
+  source.addEventListener("resync", () => location.reload())
+
+  // The browser gives up for good on a 403 or 503 (too many streams); poll instead
+  source.onerror = () => {
+    if (source.readyState === EventSource.CLOSED) {
+      startPolling()
+    }
+  }
+}
+
+function updateCourseCard(course) {
+  const card = document.querySelector(`.course-card[data-course-id="${course.id}"]`)
+  if (!card) return
+
+  card.querySelector(".percentage").textContent = `${course.percentage}%`
+  card.querySelector(".progress-fill").style.width = `${course.percentage}%`
+  card.querySelector(".attended-count").textContent = course.attended
+  card.querySelector(".total-count").textContent = course.total
+
+  card.classList.toggle("danger", course.below_threshold)
+  card.classList.toggle("success", !course.below_threshold)
+}
+
+function escapeHtml(text) {
+  const element = document.createElement("div")
+  element.textContent = text
+  return element.innerHTML
+}
+
 function initializeTooltips() {
   const tooltipElements = document.querySelectorAll("[title]")
   tooltipElements.forEach((element) => {
@@ -319,11 +380,16 @@ function printAttendanceReport() {
   printWindow.print()
 }
 
-// Service Worker registration for offline functionality (optional)
+// Service worker: offline pages and attendance marks (see static/js/sw.js)
 if ("serviceWorker" in navigator) {
+  window.addEventListener("online", () => {
+    if (navigator.serviceWorker.controller) {
+      navigator.serviceWorker.controller.postMessage("flush")
+    }
+  })
   window.addEventListener("load", () => {
     navigator.serviceWorker
-      .register("/static/js/sw.js")
+      .register("/sw.js")
       .then((registration) => {
         console.log("ServiceWorker registration successful")
       })
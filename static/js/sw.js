@@ -1 +1,168 @@
-console.log('Service worker loaded');
+// Service worker for the Attendance Tracker (served at /sw.js so it covers every page)
+//
+// * Static files are served from the cache once fetched; their names carry
+//   a content hash, so a cached copy never goes stale.
+// * Pages are fetched from the network and fall back to the last copy
+//   seen when offline.
+// * Attendance marks (POST /mark-attendance/) made while offline are kept
+//   in IndexedDB, the latest per course and date, and sent in one batch to
+//   /api/v1/sync/attendance/ once the network is back. Counter actions
+//   (/update-attendance/) are not queued: replaying them is not idempotent.
+
+const CACHE = "attendance-tracker-v1"
+const DB_NAME = "attendance-tracker"
+const MARKS = "marks"
+const SYNC_TAG = "attendance-marks"
+const UPLOAD_URL = "/api/v1/sync/attendance/"
+const UPLOAD_BATCH = 1000 // SYNC_UPLOAD_MAX_MARKS on the server
+
+self.addEventListener("install", () => self.skipWaiting())
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil(
+    caches
+      .keys()
+      .then((keys) => Promise.all(keys.filter((key) => key !== CACHE).map((key) => caches.delete(key))))
+      .then(() => self.clients.claim()),
+  )
+})
+
+self.addEventListener("fetch", (event) => {
+  const request = event.request
+  const url = new URL(request.url)
+  if (url.origin !== self.location.origin) return
+
+  if (request.method === "POST" && url.pathname === "/mark-attendance/") {
+    event.respondWith(markAttendance(request))
+  } else if (request.method === "GET" && url.pathname.startsWith("/static/")) {
+    event.respondWith(cacheFirst(request))
+  } else if (request.mode === "navigate") {
+    event.respondWith(networkFirst(request))
+  }
+})
+
+self.addEventListener("sync", (event) => {
+  if (event.tag === SYNC_TAG) {
+    event.waitUntil(uploadMarks())
+  }
+})
+
+// Pages post "flush" when the browser comes back online (for browsers without Background Sync)
+self.addEventListener("message", (event) => {
+  if (event.data === "flush") {
+    event.waitUntil(uploadMarks())
+  }
+})
+
+async function cacheFirst(request) {
+  const cached = await caches.match(request)
+  if (cached) return cached
+  const response = await fetch(request)
+  if (response.ok) {
+    const cache = await caches.open(CACHE)
+    cache.put(request, response.clone())
+  }
+  return response
+}
+
+async function networkFirst(request) {
+  try {
+    const response = await fetch(request)
+    if (response.ok) {
+      const cache = await caches.open(CACHE)
+      cache.put(request, response.clone())
+      // Online again: send whatever was marked meanwhile (failures keep it queued)
+      uploadMarks().catch(() => {})
+    }
+    return response
+  } catch (error) {
+    const cached = await caches.match(request)
+    if (cached) return cached
+    throw error
+  }
+}
+
+async function markAttendance(request) {
+  const body = await request.clone().json()
+  try {
+    return await fetch(request)
+  } catch (error) {
+    await queueMark({ course_id: body.course_id, date: body.date, attended: body.attended !== false })
+    if (self.registration.sync) {
+      await self.registration.sync.register(SYNC_TAG)
+    }
+    return new Response(JSON.stringify({ success: true, queued: true }), {
+      headers: { "Content-Type": "application/json" },
+    })
+  }
+}
+
+function openDatabase() {
+  return new Promise((resolve, reject) => {
+    const open = indexedDB.open(DB_NAME, 1)
+    open.onupgradeneeded = () => open.result.createObjectStore(MARKS, { keyPath: ["course_id", "date"] })
+    open.onsuccess = () => resolve(open.result)
+    open.onerror = () => reject(open.error)
+  })
+}
+
+async function withStore(mode, action) {
+  const db = await openDatabase()
+  return new Promise((resolve, reject) => {
+    const transaction = db.transaction(MARKS, mode)
+    const request = action(transaction.objectStore(MARKS))
+    transaction.oncomplete = () => resolve(request && request.result)
+    transaction.onerror = () => reject(transaction.error)
+  })
+}
+
+function queueMark(mark) {
+  return withStore("readwrite", (store) => store.put(mark))
+}
+
+function removeMarks(sent) {
+  // A mark changed again since it was sent stays queued for the next upload
+  return withStore("readwrite", (store) => {
+    sent.forEach((mark) => {
+      const current = store.get([mark.course_id, mark.date])
+      current.onsuccess = () => {
+        if (current.result && current.result.attended === mark.attended) {
+          store.delete([mark.course_id, mark.date])
+        }
+      }
+    })
+  })
+}
+
+let uploading = null
+
+function uploadMarks() {
+  // One upload at a time; marks queued meanwhile go with the next one
+  if (!uploading) {
+    uploading = sendQueuedMarks().finally(() => {
+      uploading = null
+    })
+  }
+  return uploading
+}
+
+async function sendQueuedMarks() {
+  const marks = await withStore("readonly", (store) => store.getAll())
+  for (let start = 0; start < marks.length; start += UPLOAD_BATCH) {
+    const batch = marks.slice(start, start + UPLOAD_BATCH)
+    // Network errors (and a logged-out session's redirect) throw here and keep the marks queued
+    const response = await fetch(UPLOAD_URL, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      credentials: "same-origin",
+      redirect: "error",
+      body: JSON.stringify({ marks: batch }),
+    })
+    const data = await response.json()
+    if (!data.success) {
+      // Sending the same marks again would fail the same way (e.g. a course deleted meanwhile)
+      console.error("Dropped offline attendance marks:", data.error)
+    }
+    await removeMarks(batch)
+  }
+}
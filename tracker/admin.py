@@ -1,16 +1,43 @@
 from django.contrib import admin
-from .models import Course, LectureSchedule, AttendanceRecord
+from .models import (
+    Course, Holiday, LectureSchedule, AttendanceRecord, MaintenanceRun, MonthlyAttendanceRollup, RecurringSlot,
+    RecurringSlotException, ThresholdPolicy
+)
+
+class BelowThresholdFilter(admin.SimpleListFilter):
+    title = 'attendance'
+    parameter_name = 'attendance'
+
+    def lookups(self, request, model_admin):
+        return [('below', 'Below threshold'), ('above', 'At or above threshold')]
+
+    def queryset(self, request, queryset):
+        # Each course against its own policy, in one query
+        if self.value() == 'below':
+            return queryset.below_threshold()
+        if self.value() == 'above':
+            return queryset.with_thresholds().filter(policy_below=False)
+        return queryset
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
-    list_display = ['name', 'user', 'attendance_percentage', 'attended_lectures', 'total_lectures', 'created_at']
-    list_filter = ['user', 'created_at']
+    list_display = ['name', 'user', 'attendance_percentage', 'attended_lectures', 'total_lectures', 'recorded_attendance', 'created_at']
+    list_filter = [BelowThresholdFilter, 'user', 'created_at']
+    list_select_related = ['user', 'rollup']
     search_fields = ['name', 'user__username']
     readonly_fields = ['attendance_percentage']
     
     def attendance_percentage(self, obj):
         return f"{obj.attendance_percentage}%"
     attendance_percentage.short_description = 'Attendance %'
+    
+    def recorded_attendance(self, obj):
+        """Attendance from the records rollup (no scan of AttendanceRecord)"""
+        rollup = getattr(obj, 'rollup', None)
+        if rollup is None:
+            return '-'
+        return f"{rollup.attendance_percentage}% ({rollup.attended_records}/{rollup.total_records})"
+    recorded_attendance.short_description = 'Recorded %'
 
 @admin.register(LectureSchedule)
 class LectureScheduleAdmin(admin.ModelAdmin):
@@ -24,3 +51,44 @@ class AttendanceRecordAdmin(admin.ModelAdmin):
     list_filter = ['attended', 'date', 'course__user']
     search_fields = ['course__name', 'notes']
     date_hierarchy = 'date'
+
+@admin.register(MonthlyAttendanceRollup)
+class MonthlyAttendanceRollupAdmin(admin.ModelAdmin):
+    list_display = ['course', 'month', 'attended_records', 'total_records']
+    list_filter = ['month', 'course__user']
+    list_select_related = ['course__user']
+    search_fields = ['course__name']
+    date_hierarchy = 'month'
+
+class RecurringSlotExceptionInline(admin.TabularInline):
+    model = RecurringSlotException
+    extra = 0
+
+@admin.register(RecurringSlot)
+class RecurringSlotAdmin(admin.ModelAdmin):
+    list_display = ['title', 'timetable', 'day_of_week', 'start_time', 'end_time', 'interval_weeks', 'starts_on', 'ends_on']
+    list_filter = ['interval_weeks', 'day_of_week', 'timetable__user']
+    list_select_related = ['timetable__user']
+    search_fields = ['title', 'timetable__user__username']
+    inlines = [RecurringSlotExceptionInline]
+
+@admin.register(Holiday)
+class HolidayAdmin(admin.ModelAdmin):
+    list_display = ['date', 'name', 'timetable']
+    list_filter = ['timetable__user']
+    list_select_related = ['timetable__user']
+    date_hierarchy = 'date'
+
+@admin.register(ThresholdPolicy)
+class ThresholdPolicyAdmin(admin.ModelAdmin):
+    list_display = ['threshold', 'warning_margin', 'user', 'course', 'label']
+    list_select_related = ['user', 'course__user']
+    search_fields = ['user__username', 'course__name', 'course__user__username', 'label']
+    raw_id_fields = ['user', 'course']
+
+@admin.register(MaintenanceRun)
+class MaintenanceRunAdmin(admin.ModelAdmin):
+    list_display = ['task', 'started_at', 'duration_seconds', 'batches', 'rows', 'succeeded']
+    list_filter = ['task', 'succeeded']
+    readonly_fields = ['task', 'started_at', 'finished_at', 'batches', 'rows', 'succeeded', 'error']
+    date_hierarchy = 'started_at'
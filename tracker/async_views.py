@@ -0,0 +1,149 @@
+"""Async versions of the busiest JSON endpoints, for ASGI deployments.
+
+With ``ASYNC_VIEWS`` on (the uvicorn profile in ``attendance_tracker/asgi.py``)
+``update_attendance``, ``mark_attendance_for_date``, ``suggestions_api`` and
+``login_view`` are routed here, so a worker keeps serving other requests
+while these wait on the database, the cache or a password hash. Requests
+and responses are the same as for the sync views in ``tracker.views``.
+
+Django 4.2's view decorators and ``request.user`` are sync-only, hence the
+async equivalents below. Single queries use the async ORM; the attendance
+transaction runs in one ``sync_to_async`` call (see ``tracker.attendance``).
+"""
+import json
+from datetime import datetime
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth import login
+from django.contrib.auth.models import User
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404, HttpResponseNotAllowed, JsonResponse
+from django.shortcuts import redirect, render
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .attendance import aapply_counter_action, amark_attendance
+from .backends import CustomAuthBackend, averify_password
+from .cache import aget_suggestions_version
+from .models import Course
+from .suggestions import aget_suggestions, version_etag, version_last_modified
+
+
+def alogin_required(view):
+    """login_required for async views; loads ``request.user`` off the event loop"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if not await sync_to_async(lambda: request.user.is_authenticated)():
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def ajson_post(view):
+    """csrf_exempt and require_http_methods(["POST"]), as on the sync JSON views"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'POST':
+            return HttpResponseNotAllowed(['POST'])
+        return await view(request, *args, **kwargs)
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+@alogin_required
+@ajson_post
+async def update_attendance(request):
+    try:
+        data = json.loads(request.body)
+        course_id = data.get('course_id')
+        action = data.get('action')
+
+        try:
+            course = await aapply_counter_action(request.user, course_id, action)
+        except Course.DoesNotExist:
+            raise Http404('No Course matches the given query.')
+
+        return JsonResponse({
+            'success': True,
+            'attendance_percentage': course.attendance_percentage,
+            'attended_lectures': course.attended_lectures,
+            'total_lectures': course.total_lectures,
+            'threshold': course.threshold,
+            'is_below_threshold': course.is_below_threshold
+        })
+
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+@alogin_required
+@ajson_post
+async def mark_attendance_for_date(request):
+    """Mark attendance for a specific date and lecture"""
+    try:
+        data = json.loads(request.body)
+        course_id = data.get('course_id')
+        date_str = data.get('date')
+        attended = data.get('attended', True)
+
+        try:
+            course = await Course.objects.aget(id=course_id, user=request.user)
+        except Course.DoesNotExist:
+            raise Http404('No Course matches the given query.')
+        attendance_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+
+        course = await amark_attendance(course, attendance_date, attended)
+
+        return JsonResponse({
+            'success': True,
+            'attendance_percentage': course.attendance_percentage,
+            'attended_lectures': course.attended_lectures,
+            'total_lectures': course.total_lectures,
+        })
+
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+@alogin_required
+async def suggestions_api(request):
+    """Next-lecture suggestion per regular course, with the sync view's ETag/304 handling"""
+    today = timezone.now().date()
+    version = await aget_suggestions_version(request.user.id)
+    etag = quote_etag(version_etag(version, today))
+    last_modified = int(version_last_modified(version, today).timestamp())
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = JsonResponse({'suggestions': await aget_suggestions(request.user.id, today, version)})
+    if request.method in ('GET', 'HEAD'):
+        response.headers.setdefault('Last-Modified', http_date(last_modified))
+        response.headers.setdefault('ETag', etag)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+async def login_view(request):
+    """The login page; the password hash is checked on the thread pool (see ``averify_password``)
+
+    Under ASGI the sync view would hash on the one thread every sync view
+    and ORM call shares, so a burst of logins would stall all of them.
+    """
+    if request.method == 'POST':
+        username = request.POST.get('username')
+        password = request.POST.get('password')
+
+        user = await User.objects.filter(username=username).afirst()
+        if user is None:
+            messages.error(request, 'Username does not exist.')
+        else:
+            backend = CustomAuthBackend()
+            if await averify_password(user, password) and backend.user_can_authenticate(user):
+                await sync_to_async(login)(request, user, backend='tracker.backends.CustomAuthBackend')
+                return redirect('dashboard')
+            messages.error(request, 'Username/Password is incorrect.')
+
+    return await sync_to_async(render)(request, 'registration/login.html')
@@ -0,0 +1,279 @@
+"""Attendance counter updates shared by the JSON endpoints.
+
+Counters are changed with conditional ``F()`` updates inside a
+transaction, so concurrent taps from several devices cannot overwrite
+each other and only the counter columns are written.
+"""
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from .cache import invalidate_suggestions
+from .models import AttendanceRecord, Course
+from .occurrences import group_by_weekday
+from .rollups import apply_record_delta, month_start, refresh_rollups
+
+BULK_BATCH_SIZE = 500
+
+
+def _counter_update(action):
+    """(extra filter, update kwargs) for a quick-action button"""
+    if action == 'increment':
+        return {}, {'attended_lectures': F('attended_lectures') + 1, 'total_lectures': F('total_lectures') + 1}
+    if action == 'decrement':
+        return {'attended_lectures__gt': 0}, {'attended_lectures': F('attended_lectures') - 1}
+    if action == 'add_total':
+        return {}, {'total_lectures': F('total_lectures') + 1}
+    if action == 'remove_total':
+        # Both right-hand sides see the pre-update row, so attended is capped at the new total
+        return {'total_lectures__gt': 0}, {
+            'total_lectures': F('total_lectures') - 1,
+            'attended_lectures': Least(F('attended_lectures'), F('total_lectures') - 1),
+        }
+    return None, None
+
+
+def apply_counter_action(user, course_id, action):
+    """Apply a quick action to a course's counters and return the refreshed course
+
+    Raises Course.DoesNotExist if the course is not the user's. Unknown
+    actions and actions whose condition fails (e.g. decrementing at zero)
+    leave the counters untouched.
+    """
+    conditions, changes = _counter_update(action)
+    with transaction.atomic():
+        if changes is not None:
+            # Queryset updates send no signals, so cached suggestions are dropped here
+            if Course.objects.filter(pk=course_id, user=user, **conditions).update(
+                updated_at=timezone.now(), **changes
+            ):
+                invalidate_suggestions(user.pk)
+        return Course.objects.get(pk=course_id, user=user)
+
+
+async def aapply_counter_action(user, course_id, action):
+    """apply_counter_action for async views
+
+    The counter UPDATE is a single statement, so it needs no transaction;
+    the course is read back afterwards with its threshold policy annotated.
+    """
+    conditions, changes = _counter_update(action)
+    if changes is not None:
+        if await Course.objects.filter(pk=course_id, user=user, **conditions).aupdate(
+            updated_at=timezone.now(), **changes
+        ):
+            await sync_to_async(invalidate_suggestions)(user.pk)
+    return await Course.objects.with_thresholds().aget(pk=course_id, user=user)
+
+
+def mark_attendance(course, attendance_date, attended):
+    """Create or update the attendance record for a date and adjust the counters
+
+    Returns the refreshed course. A new record adds a lecture (and an
+    attended lecture when present); flipping an existing record only moves
+    the attended counter. The flip is a conditional update, so two requests
+    setting the same value count once.
+    """
+    attended = bool(attended)
+
+    def flip_existing():
+        return AttendanceRecord.objects.filter(
+            course=course, date=attendance_date, attended=not attended
+        ).update(attended=attended, updated_at=timezone.now())
+
+    with transaction.atomic():
+        attended_delta = 0
+        total_delta = 0
+
+        # Writing first also takes SQLite's write lock before any read
+        flipped = flip_existing()
+        if not flipped:
+            record, created = AttendanceRecord.objects.get_or_create(
+                course=course,
+                date=attendance_date,
+                defaults={'attended': attended}
+            )
+            if created:
+                total_delta = 1
+                attended_delta = 1 if attended else 0
+            elif record.attended != attended:
+                # Another request created the record in the meantime
+                flipped = flip_existing()
+        if flipped:
+            attended_delta = 1 if attended else -1
+            # Queryset updates send no signals, so the rollups are adjusted here
+            apply_record_delta(course.pk, attendance_date, 0, attended_delta)
+
+        if attended_delta or total_delta:
+            Course.objects.filter(pk=course.pk).update(
+                attended_lectures=F('attended_lectures') + attended_delta,
+                total_lectures=F('total_lectures') + total_delta,
+                updated_at=timezone.now()
+            )
+            invalidate_suggestions(course.user_id)
+        return Course.objects.get(pk=course.pk)
+
+
+def _parse_entry(entry):
+    """(course_id or None, date, attended) from one bulk entry"""
+    if not isinstance(entry, dict):
+        raise ValueError('Each entry must be an object.')
+    try:
+        attendance_date = datetime.strptime(str(entry.get('date')), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"Invalid date: {entry.get('date')!r}")
+    course_id = entry.get('course_id')
+    if course_id is not None:
+        try:
+            course_id = int(course_id)
+        except (TypeError, ValueError):
+            raise ValueError(f'Invalid course_id: {course_id!r}')
+    return course_id, attendance_date, bool(entry.get('attended', True))
+
+
+def bulk_mark_attendance(user, entries):
+    """Apply many attendance marks for a user in a constant number of queries
+
+    Each entry is ``{'course_id', 'date', 'attended'}``; an entry without a
+    ``course_id`` marks every regular course with a lecture on that date.
+    Records are matched to the course's lecture on that weekday, upserted
+    with ``bulk_create(update_conflicts=True)`` and each course's counters
+    move by its aggregated delta in a single UPDATE for all courses. Later
+    entries for the same course and date win.
+
+    Raises ValueError for malformed entries or courses that are not the user's.
+    """
+    parsed = [_parse_entry(entry) for entry in entries]
+    if not parsed:
+        return {'created': 0, 'updated': 0, 'unchanged': 0, 'courses': []}
+
+    explicit_ids = {course_id for course_id, _, _ in parsed if course_id is not None}
+    mark_all_on_date = any(course_id is None for course_id, _, _ in parsed)
+    affected = Q(pk__in=explicit_ids)
+    if mark_all_on_date:
+        affected |= Q(is_regular=True)
+
+    with transaction.atomic():
+        # Touch the affected courses first: a row lock on PostgreSQL and the
+        # write lock on SQLite, so concurrent writers cannot interleave below.
+        # updated_at keeps its value, so delta sync only resends the courses
+        # whose counters move (apply_counter_deltas bumps those).
+        Course.objects.filter(affected, user=user).update(updated_at=F('updated_at'))
+
+        courses = {
+            course.id: course
+            for course in Course.objects.filter(affected, user=user).prefetch_related('schedules')
+        }
+        unknown = explicit_ids - courses.keys()
+        if unknown:
+            raise ValueError(f'Unknown course_id(s): {sorted(unknown)}')
+
+        # Lecture on each weekday per course (earliest start wins)
+        lecture_on = {}
+        for course in courses.values():
+            for weekday, bucket in enumerate(group_by_weekday(course.schedules.all())):
+                if bucket:
+                    lecture_on[(course.id, weekday)] = bucket[0].id
+
+        marks = {}
+        for course_id, attendance_date, attended in parsed:
+            if course_id is not None:
+                targets = [course_id]
+            else:
+                weekday = attendance_date.weekday()
+                targets = [cid for cid, course in courses.items()
+                           if course.is_regular and (cid, weekday) in lecture_on]
+            for target in targets:
+                marks[(target, attendance_date)] = attended
+
+        existing = {}
+        if marks:
+            dates = [attendance_date for _, attendance_date in marks]
+            existing = {
+                (course_id, record_date): attended
+                for course_id, record_date, attended in AttendanceRecord.objects.filter(
+                    course_id__in={course_id for course_id, _ in marks},
+                    date__gte=min(dates),
+                    date__lte=max(dates),
+                ).values_list('course_id', 'date', 'attended')
+            }
+
+        deltas = {}
+        records = []
+        summary = {'created': 0, 'updated': 0, 'unchanged': 0}
+        for (course_id, attendance_date), attended in marks.items():
+            previous = existing.get((course_id, attendance_date))
+            if previous is not None and previous == attended:
+                summary['unchanged'] += 1
+                continue
+            summary['created' if previous is None else 'updated'] += 1
+            add_counter_delta(deltas, course_id, previous, attended)
+            records.append(AttendanceRecord(
+                course_id=course_id,
+                date=attendance_date,
+                attended=attended,
+                schedule_id=lecture_on.get((course_id, attendance_date.weekday()))
+            ))
+
+        if records:
+            AttendanceRecord.objects.bulk_create(
+                records,
+                batch_size=BULK_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['course', 'date'],
+                update_fields=['attended', 'updated_at'],
+            )
+            apply_counter_deltas(deltas)
+            refresh_rollups(deltas.keys(), months={month_start(record.date) for record in records})
+            invalidate_suggestions(user.pk)
+
+        refreshed = Course.objects.filter(pk__in=courses.keys()).order_by('name')
+        summary['courses'] = [
+            {
+                'course_id': course.id,
+                'course_name': course.name,
+                'attended_lectures': course.attended_lectures,
+                'total_lectures': course.total_lectures,
+                'attendance_percentage': course.attendance_percentage,
+            }
+            for course in refreshed
+            if course.id in deltas or course.id in explicit_ids
+        ]
+    return summary
+
+
+# transaction.atomic has no async form, so the whole transaction runs in the database thread
+amark_attendance = sync_to_async(mark_attendance)
+
+
+def add_counter_delta(deltas, course_id, previous, attended):
+    """Accumulate the counter change of setting a record to ``attended``
+
+    ``previous`` is the record's current value, or None for a new record:
+    a new record adds a lecture (and an attended one when present), a flip
+    only moves the attended counter.
+    """
+    attended_delta, total_delta = deltas.get(course_id, (0, 0))
+    if previous is None:
+        total_delta += 1
+        attended_delta += 1 if attended else 0
+    elif previous != attended:
+        attended_delta += 1 if attended else -1
+    deltas[course_id] = (attended_delta, total_delta)
+
+
+def apply_counter_deltas(deltas):
+    """Move many courses' counters in one UPDATE; ``deltas`` maps course id -> (attended, total)"""
+    if not deltas:
+        return 0
+    attended_cases = [When(pk=course_id, then=Value(delta[0])) for course_id, delta in deltas.items()]
+    total_cases = [When(pk=course_id, then=Value(delta[1])) for course_id, delta in deltas.items()]
+    return Course.objects.filter(pk__in=deltas.keys()).update(
+        attended_lectures=F('attended_lectures') + Case(*attended_cases, default=Value(0)),
+        total_lectures=F('total_lectures') + Case(*total_cases, default=Value(0)),
+        updated_at=timezone.now()
+    )
@@ -1,16 +1,45 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password
 from django.contrib.auth.models import User
-from django.contrib.auth import authenticate
 
 class CustomAuthBackend(ModelBackend):
-    def authenticate(self, request, username=None, password=None, **kwargs):
-        try:
-            user = User.objects.get(username=username)
-            if user.check_password(password):
-                return user
-            else:
-                # Password is incorrect
-                return None
-        except User.DoesNotExist:
-            # Username doesn't exist
+    """Username/password authentication with a single user lookup
+
+    Callers that already hold the user (``login_view`` looks it up to tell
+    unknown usernames apart) pass it as ``user`` so it is not fetched again.
+    It is the only configured backend, so ModelBackend is not consulted as
+    well; permissions still come from ModelBackend.
+    """
+
+    def authenticate(self, request, username=None, password=None, user=None, **kwargs):
+        if password is None:
             return None
+        if user is None:
+            try:
+                user = User._default_manager.get_by_natural_key(username)
+            except User.DoesNotExist:
+                # Hash anyway so an unknown username takes as long as a wrong password
+                User().set_password(password)
+                return None
+        # check_password also rehashes and saves an outdated hash (see tracker.hashers)
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+
+async def averify_password(user, password):
+    """``user.check_password`` for async views, with the hashing kept off the event loop
+
+    Used by ``tracker.async_views.login_view``. PBKDF2 releases the GIL, so
+    verifications run in parallel on the default thread pool rather than
+    queueing behind the single thread that sync views and database access
+    share under ASGI. An outdated hash is rehashed there as well and only
+    the save goes through the database thread.
+    """
+    outdated = []
+    verified = await sync_to_async(check_password, thread_sensitive=False)(password, user.password, outdated.append)
+    if verified and outdated:
+        await sync_to_async(user.set_password, thread_sensitive=False)(password)
+        await sync_to_async(user.save)(update_fields=['password'])
+    return verified
@@ -0,0 +1,219 @@
+"""End-to-end view benchmarks driven through the Django test client.
+
+Each endpoint is requested as a rotating set of generated users (see
+``tracker.datagen``). Two passes are made per endpoint:
+
+* a timing pass, with nothing else instrumented, for p50/p95 latency;
+* a profiling pass that counts queries (``CaptureQueriesContext``),
+  writes to the session table and the peak memory allocated while
+  handling a request (``tracemalloc``), which would otherwise distort the
+  timings.
+
+``run_benchmarks`` returns a JSON-serialisable report; ``compare_reports``
+diffs two of them to flag regressions between commits.
+"""
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .datagen import PASSWORD
+from .models import Course
+
+REPORT_VERSION = 1
+
+
+def _json_post(data):
+    return {'data': json.dumps(data), 'content_type': 'application/json'}
+
+
+# name -> function(user_data, i) returning (method, url, request kwargs)
+ENDPOINTS = {
+    'dashboard': lambda data, i: ('get', reverse('dashboard'), {}),
+    'timetable_view': lambda data, i: ('get', reverse('timetable'), {}),
+    'course_detail': lambda data, i: (
+        'get', reverse('course_detail', args=[data['courses'][i % len(data['courses'])]]), {}
+    ),
+    'suggestions_api': lambda data, i: ('get', reverse('suggestions_api'), {}),
+    'update_attendance': lambda data, i: ('post', reverse('update_attendance'), _json_post({
+        'course_id': data['courses'][i % len(data['courses'])],
+        'action': ('increment', 'add_total', 'decrement', 'remove_total')[i % 4],
+    })),
+    'mark_attendance_for_date': lambda data, i: ('post', reverse('mark_attendance_for_date'), _json_post({
+        'course_id': data['courses'][i % len(data['courses'])],
+        'date': (data['today'] - timedelta(days=i % 60)).isoformat(),
+        'attended': i % 3 != 0,
+    })),
+    # Logs the client in again as the same user; the cost is mostly the password hash
+    'login': lambda data, i: ('post', reverse('login'), {'data': {
+        'username': data['user'].username, 'password': PASSWORD,
+    }}),
+    # A fresh future date per request so every booking takes the success path
+    'book_manual_slot': lambda data, i: ('post', reverse('book_manual_slot'), {'data': {
+        'title': f'Bench {i}', 'slot_type': 'study',
+        'date': (data['today'] + timedelta(days=400 + i)).isoformat(),
+        'start_time': '20:00', 'end_time': '21:00',
+    }}),
+}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _user_data(users):
+    today = timezone.now().date()
+    courses = {}
+    for course_id, user_id in Course.objects.filter(user__in=users, is_regular=True).order_by('pk').values_list('pk', 'user_id'):
+        courses.setdefault(user_id, []).append(course_id)
+    data = []
+    for user in users:
+        client = Client()
+        client.force_login(user)
+        data.append({'user': user, 'client': client, 'courses': courses.get(user.pk, []), 'today': today})
+    return [entry for entry in data if entry['courses']]
+
+
+def _request(entry, endpoint, i):
+    method, url, kwargs = ENDPOINTS[endpoint](entry, i)
+    response = getattr(entry['client'], method)(url, **kwargs)
+    if response.status_code >= 400:
+        raise RuntimeError(f'{endpoint}: {method.upper()} {url} returned {response.status_code}')
+    # The JSON views report failures with a 200 and success: false
+    if response.get('Content-Type', '').startswith('application/json'):
+        body = response.json()
+        if isinstance(body, dict) and body.get('success') is False:
+            raise RuntimeError(f"{endpoint}: {method.upper()} {url} failed: {body.get('error')}")
+    return response
+
+
+def _is_session_write(sql):
+    return sql.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')) and 'django_session' in sql
+
+
+def bench_endpoint(endpoint, users, iterations, profile_iterations, warmup):
+    """Timing and profiling results for one endpoint"""
+    counter = 0
+
+    def next_request():
+        nonlocal counter
+        entry = users[counter % len(users)]
+        counter += 1
+        return entry, counter
+
+    for _ in range(warmup):
+        entry, i = next_request()
+        _request(entry, endpoint, i)
+
+    timings = []
+    for _ in range(iterations):
+        entry, i = next_request()
+        started = time.perf_counter()
+        _request(entry, endpoint, i)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    queries = []
+    session_writes = 0
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(profile_iterations):
+            entry, i = next_request()
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            with CaptureQueriesContext(connection) as captured:
+                _request(entry, endpoint, i)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+            queries.append(len(captured))
+            session_writes += sum(1 for query in captured if _is_session_write(query['sql']))
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'requests': iterations,
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'queries': max(queries) if queries else None,
+        'session_writes_per_request': round(session_writes / len(queries), 3) if queries else None,
+        'peak_alloc_kb': round(max(peaks) / 1024, 1) if peaks else None,
+    }
+
+
+def run_benchmarks(endpoints=None, iterations=50, profile_iterations=5, warmup=3, users=None, dataset=None, progress=None):
+    """Benchmark the endpoints as the given users (default: every user) and return the report"""
+    if users is None:
+        users = list(User.objects.order_by('pk'))
+    user_data = _user_data(users)
+    if not user_data:
+        raise ValueError('No users with regular courses to benchmark as')
+
+    results = {}
+    for endpoint in endpoints or ENDPOINTS:
+        results[endpoint] = bench_endpoint(endpoint, user_data, iterations, profile_iterations, warmup)
+        if progress is not None:
+            progress(endpoint, results[endpoint])
+
+    return {
+        'version': REPORT_VERSION,
+        'meta': {
+            'commit': _git_commit(),
+            'created': timezone.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'users': len(user_data),
+            'iterations': iterations,
+            'profile_iterations': profile_iterations,
+            'dataset': dataset,
+        },
+        'results': results,
+    }
+
+
+def compare_reports(old, new, threshold=0.2):
+    """``(rows, regressions)`` comparing two reports endpoint by endpoint
+
+    A regression is p95 latency more than ``threshold`` (a fraction)
+    slower, or any increase in the number of queries.
+    """
+    rows = []
+    regressions = []
+    for endpoint, result in new['results'].items():
+        before = old.get('results', {}).get(endpoint)
+        if before is None:
+            rows.append((endpoint, None, result, []))
+            continue
+        problems = []
+        if before['p95_ms'] and result['p95_ms'] > before['p95_ms'] * (1 + threshold):
+            problems.append(f"p95 {before['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms")
+        if before.get('queries') is not None and result.get('queries') is not None and result['queries'] > before['queries']:
+            problems.append(f"queries {before['queries']} -> {result['queries']}")
+        rows.append((endpoint, before, result, problems))
+        regressions.extend(f'{endpoint}: {problem}' for problem in problems)
+    return rows, regressions
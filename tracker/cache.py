@@ -0,0 +1,161 @@
+"""Per-user cache of the computed weekly timetable.
+
+Entries are keyed by user, a per-user version token and ISO week. Any
+change to a user's lectures, regular courses or manual slots replaces the
+version token once its transaction commits (see ``tracker.signals``),
+which orphans every cached week for that user at once; orphaned entries
+simply expire.
+
+Suggestions (``tracker.suggestions``) use a second per-user version: the
+time of the last change to the user's courses, lectures or attendance
+counters. It doubles as the ETag/Last-Modified of ``suggestions_api``,
+and every bump is also published to the user's open event streams
+(``tracker.events``).
+
+A user's threshold policies are cached as they are, and dropped whenever
+one of them changes.
+"""
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .events import publish
+
+WEEKLY_SCHEDULE_TIMEOUT = 60 * 60 * 24 * 8  # a week plus a day of slack
+SUGGESTIONS_TIMEOUT = 60 * 60 * 24
+THRESHOLDS_TIMEOUT = 60 * 60 * 24
+
+STATS_KEYS = {
+    'hits': 'timetable:stats:hits',
+    'misses': 'timetable:stats:misses',
+    'invalidations': 'timetable:stats:invalidations',
+}
+
+
+def _version_key(user_id):
+    return f'timetable:version:{user_id}'
+
+
+def get_timetable_version(user_id):
+    """Current version token for a user's cached timetables"""
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # A missing token (never set or evicted) gets a fresh value, so
+        # weeks cached under an older token can never be served again
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_timetable(user_id):
+    """Drop every cached week for a user once the current transaction commits
+
+    Like ``invalidate_suggestions``: a new token set before the commit could
+    get a week built from the pre-commit rows cached under it.
+    """
+    def bump():
+        cache.set(_version_key(user_id), uuid.uuid4().hex, None)
+        _incr_stat('invalidations')
+
+    transaction.on_commit(bump)
+
+
+def weekly_schedule_key(user_id, week_start):
+    iso_year, iso_week, _ = week_start.isocalendar()
+    return f'timetable:week:{user_id}:{get_timetable_version(user_id)}:{iso_year}-W{iso_week:02d}'
+
+
+def get_cached_weekly_schedule(user_id, week_start):
+    """Cached week dict for the user, or None on a miss"""
+    schedule = cache.get(weekly_schedule_key(user_id, week_start))
+    _incr_stat('hits' if schedule is not None else 'misses')
+    return schedule
+
+
+def set_cached_weekly_schedule(user_id, week_start, schedule):
+    cache.set(weekly_schedule_key(user_id, week_start), schedule, WEEKLY_SCHEDULE_TIMEOUT)
+
+
+def _suggestions_version_key(user_id):
+    return f'suggestions:version:{user_id}'
+
+
+def get_suggestions_version(user_id):
+    """Timestamp of the last change that affects the user's suggestions"""
+    key = _suggestions_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Unknown (never set or evicted): assume everything changed just now
+        cache.add(key, time.time(), None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_suggestions_version(user_id):
+    """get_suggestions_version for async views"""
+    key = _suggestions_version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def invalidate_suggestions(user_id):
+    """Bump the user's suggestions version once the current transaction commits
+
+    Bumping earlier would let a concurrent request cache suggestions built
+    from the pre-commit rows under the new version.
+    """
+    def bump():
+        cache.set(_suggestions_version_key(user_id), time.time(), None)
+        publish(user_id, 'changed')
+
+    transaction.on_commit(bump)
+
+
+def suggestions_key(user_id, version, day, default_threshold):
+    threshold, margin = default_threshold
+    return f'suggestions:{user_id}:{version!r}:{day.isoformat()}:{threshold}:{margin}'
+
+
+def _thresholds_key(user_id):
+    return f'thresholds:{user_id}'
+
+
+def get_cached_thresholds(user_id):
+    return cache.get(_thresholds_key(user_id))
+
+
+def set_cached_thresholds(user_id, policies):
+    cache.set(_thresholds_key(user_id), policies, THRESHOLDS_TIMEOUT)
+
+
+def invalidate_thresholds(user_id):
+    """Drop the user's cached policies once the current transaction commits"""
+    transaction.on_commit(lambda: cache.delete(_thresholds_key(user_id)))
+
+
+def _incr_stat(name):
+    key = STATS_KEYS[name]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def get_cache_stats():
+    """Hit/miss/invalidation counters plus the derived hit ratio"""
+    values = cache.get_many(list(STATS_KEYS.values()))
+    stats = {name: values.get(key, 0) for name, key in STATS_KEYS.items()}
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0
+    return stats
+
+
+def reset_cache_stats():
+    cache.delete_many(list(STATS_KEYS.values()))
@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def live_updates(request):
+    """``events_url`` for base.html: where open pages receive live updates, if anywhere"""
+    return {'events_url': settings.EVENTS_PATH if settings.EVENTS_STREAM else ''}
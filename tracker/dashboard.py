@@ -0,0 +1,80 @@
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .forecast import forecast_courses
+from .models import Course, LectureSchedule
+
+
+def get_dashboard_data(user, timetable, upcoming_days=3, upcoming_limit=5):
+    """Collect everything the dashboard renders from a constant number of queries.
+
+    Courses, with their threshold policies joined in, and their schedules
+    are loaded once (one query each via prefetch_related); stats,
+    suggestions, upcoming lectures and semester forecasts are then derived
+    in memory from those rows.
+    """
+    courses = list(
+        Course.objects.filter(user=user).with_thresholds()
+        .prefetch_related(Prefetch('schedules', queryset=LectureSchedule.objects.order_by('start_time')))
+        .order_by('name')
+    )
+    regular_courses = [course for course in courses if course.is_regular]
+    courses_below_threshold = sum(1 for course in regular_courses if course.is_below_threshold)
+
+    upcoming_lectures = timetable.get_upcoming_lectures(days=upcoming_days, courses=regular_courses)[:upcoming_limit]
+
+    # Semester forecast on each regular course (course.forecast) once an end date is set
+    now = timezone.now()
+    holidays = list(timetable.holidays.filter(date__gte=now.date()))
+    if timetable.semester_end and timetable.semester_end >= now.date():
+        forecasts = forecast_courses(
+            regular_courses, now.date(), timetable.semester_end,
+            [holiday.date for holiday in holidays if holiday.date <= timetable.semester_end], now.time()
+        )
+        for course in regular_courses:
+            course.forecast = forecasts[course.id]
+
+    return {
+        'courses': courses,
+        'regular_courses': regular_courses,
+        'total_courses': len(courses),
+        'regular_count': len(regular_courses),
+        'courses_below_threshold': courses_below_threshold,
+        'courses_above_threshold': len(regular_courses) - courses_below_threshold,
+        'suggestions': get_course_suggestions(regular_courses),
+        'upcoming_lectures': upcoming_lectures,
+        'semester_end': timetable.semester_end,
+        'holidays': holidays,
+    }
+
+
+def get_course_suggestions(regular_courses):
+    """One attend/skip suggestion per regular course (schedules should be prefetched)"""
+    suggestions = []
+
+    for course in regular_courses:
+        if course.is_below_threshold:
+            needed = course.lectures_needed()
+            next_lectures = course.get_next_lectures(days=7)
+            next_lecture_text = ""
+            if next_lectures:
+                next_lecture = next_lectures[0]
+                next_lecture_text = f" (Next: {next_lecture['schedule'].get_day_of_week_display()} {next_lecture['schedule'].start_time})"
+
+            suggestions.append({
+                'course': course.name,
+                'type': 'attend',
+                'message': f'Attend next {needed} lecture(s) to reach {course.threshold}%{next_lecture_text}',
+                'priority': 'high'
+            })
+        else:
+            can_skip = course.lectures_can_skip()
+            if can_skip > 0:
+                suggestions.append({
+                    'course': course.name,
+                    'type': 'skip',
+                    'message': f'You can skip {can_skip} lecture(s) and stay above {course.threshold}%',
+                    'priority': 'low'
+                })
+
+    return suggestions
@@ -0,0 +1,182 @@
+"""Reproducible synthetic datasets for benchmarking.
+
+``generate_dataset`` creates users with timetables, regular courses,
+weekly lectures, a history of attendance records, manual slots and
+recurring slots. Everything is derived from a seeded ``random.Random``, so
+the same parameters always describe the same data, and written with
+``bulk_create`` a chunk of users at a time (one transaction per chunk).
+Course counters are set from the generated records and rollups are built
+per chunk, so the dataset is consistent with what the app itself writes.
+"""
+import random
+from collections import Counter
+from datetime import time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .maintenance import delete_in_batches
+from .models import AttendanceRecord, Course, LectureSchedule, RecurringSlot, Timetable, TimetableSlot
+from .occurrences import iter_weekday_dates
+from .rollups import refresh_rollups
+
+WEEKS_PER_SEMESTER = 16
+USERS_PER_CHUNK = 100
+BATCH_SIZE = 2000
+PASSWORD = 'bench-pass'
+
+COURSE_NAMES = [
+    'Mathematics', 'Physics', 'Chemistry', 'Biology', 'Computer Science', 'English Literature',
+    'History', 'Economics', 'Statistics', 'Philosophy', 'Psychology', 'Sociology',
+    'Linear Algebra', 'Data Structures', 'Operating Systems', 'Databases',
+]
+SLOT_TITLES = {'study': 'Study Group', 'meeting': 'Project Meeting', 'gym': 'Gym', 'personal': 'Errands'}
+
+# Named parameter sets for generate_dataset
+PROFILES = {
+    'small': {'users': 10, 'courses_per_user': 5, 'schedules_per_course': 2, 'semesters': 1},
+    'medium': {'users': 1000, 'courses_per_user': 6, 'schedules_per_course': 2, 'semesters': 1},
+    'large': {'users': 10000, 'courses_per_user': 6, 'schedules_per_course': 2, 'semesters': 2},
+}
+
+
+def _lecture_times(rng, count):
+    """Distinct (weekday, start hour) pairs on weekdays between 8:00 and 17:00"""
+    pool = [(weekday, hour) for weekday in range(5) for hour in range(8, 18)]
+    return rng.sample(pool, min(count, len(pool)))
+
+
+def _build_user(rng, username, password, courses_per_user, schedules_per_course, history_start, today, week_start,
+                slots_per_user, recurring_per_user):
+    """Unsaved objects for one user, with foreign keys still to be filled in"""
+    names = rng.sample(COURSE_NAMES, min(courses_per_user, len(COURSE_NAMES)))
+    times = _lecture_times(rng, len(names) * schedules_per_course)
+    courses = []
+    for index, name in enumerate(names):
+        attendance_rate = rng.uniform(0.55, 0.98)
+        schedules = []
+        for weekday, hour in times[index * schedules_per_course:(index + 1) * schedules_per_course]:
+            length = rng.choice((60, 60, 90))
+            schedules.append(LectureSchedule(
+                day_of_week=LectureSchedule.DAYS_OF_WEEK[weekday][0],
+                start_time=time(hour), end_time=time(hour + length // 60, length % 60),
+                room=f'Room {rng.randint(100, 450)}', professor=f'Prof. {rng.choice("ABCDEFGHJKLMNPRSTW")}',
+            ))
+        # One record per lecture day (the course's earliest lecture that day) before today
+        first_on_day = {}
+        for schedule in sorted(schedules, key=lambda s: s.start_time):
+            first_on_day.setdefault(schedule.weekday, schedule)
+        records = sorted(
+            (lecture_date, schedule, rng.random() < attendance_rate)
+            for weekday, schedule in first_on_day.items()
+            for lecture_date in iter_weekday_dates(weekday, history_start, today - timedelta(days=1))
+        )
+        attended = sum(1 for record in records if record[2])
+        course = Course(name=name, is_regular=bool(schedules), total_lectures=len(records), attended_lectures=attended)
+        courses.append((course, schedules, records))
+
+    slots = []
+    for index, day in enumerate(rng.sample(range(7), min(slots_per_user, 7))):
+        slot_type = rng.choice(list(SLOT_TITLES))
+        slots.append(TimetableSlot(
+            title=SLOT_TITLES[slot_type], slot_type=slot_type, date=week_start + timedelta(days=day),
+            start_time=time(18 + index % 4), end_time=time(19 + index % 4),
+        ))
+    recurring = [
+        RecurringSlot(
+            title='Morning Gym', slot_type='gym', start_time=time(7), end_time=time(8),
+            interval_weeks=rng.choice((1, 1, 2)), starts_on=history_start + timedelta(days=day),
+        )
+        for day in rng.sample(range(7), min(recurring_per_user, 7))
+    ]
+    return User(username=username, password=password), courses, slots, recurring
+
+
+def generate_dataset(users=10, courses_per_user=5, schedules_per_course=2, semesters=1, slots_per_user=3,
+                     recurring_per_user=1, seed=0, prefix='bench', today=None, batch_size=BATCH_SIZE,
+                     users_per_chunk=USERS_PER_CHUNK):
+    """Create the dataset, yielding a Counter of rows created so far after each chunk of users
+
+    Usernames are ``<prefix>_<n>`` and all share the password ``bench-pass``.
+    Attendance history covers ``semesters`` x 16 weeks up to ``today``.
+    """
+    rng = random.Random(seed)
+    today = today or timezone.now().date()
+    week_start = today - timedelta(days=today.weekday())
+    history_start = week_start - timedelta(weeks=WEEKS_PER_SEMESTER * semesters)
+    password = make_password(PASSWORD)
+    created = Counter()
+
+    for chunk_start in range(0, users, users_per_chunk):
+        built = [
+            _build_user(rng, f'{prefix}_{n}', password, courses_per_user, schedules_per_course, history_start, today,
+                        week_start, slots_per_user, recurring_per_user)
+            for n in range(chunk_start, min(chunk_start + users_per_chunk, users))
+        ]
+        with transaction.atomic():
+            User.objects.bulk_create([user for user, *rest in built], batch_size=batch_size)
+            timetables = Timetable.objects.bulk_create(
+                [Timetable(user=user) for user, *rest in built], batch_size=batch_size
+            )
+
+            course_rows, schedule_rows, slot_rows, recurring_rows = [], [], [], []
+            for (user, courses, slots, recurring), timetable in zip(built, timetables):
+                for course, schedules, records in courses:
+                    course.user = user
+                    course_rows.append(course)
+                for slot in slots:
+                    slot.timetable = timetable
+                    slot_rows.append(slot)
+                for series in recurring:
+                    series.timetable = timetable
+                    # save() is bypassed by bulk_create, so the weekday is set here
+                    series.day_of_week = LectureSchedule.DAYS_OF_WEEK[series.starts_on.weekday()][0]
+                    recurring_rows.append(series)
+            Course.objects.bulk_create(course_rows, batch_size=batch_size)
+
+            for user, courses, slots, recurring in built:
+                for course, schedules, records in courses:
+                    for schedule in schedules:
+                        schedule.course = course
+                        schedule_rows.append(schedule)
+            LectureSchedule.objects.bulk_create(schedule_rows, batch_size=batch_size)
+            TimetableSlot.objects.bulk_create(slot_rows, batch_size=batch_size)
+            RecurringSlot.objects.bulk_create(recurring_rows, batch_size=batch_size)
+
+            record_count = 0
+            pending = []
+            for user, courses, slots, recurring in built:
+                for course, schedules, records in courses:
+                    for lecture_date, schedule, attended in records:
+                        pending.append(AttendanceRecord(
+                            course=course, schedule=schedule, date=lecture_date, attended=attended
+                        ))
+                    if len(pending) >= batch_size:
+                        AttendanceRecord.objects.bulk_create(pending, batch_size=batch_size)
+                        record_count += len(pending)
+                        pending = []
+            AttendanceRecord.objects.bulk_create(pending, batch_size=batch_size)
+            record_count += len(pending)
+
+            refresh_rollups([course.pk for course in course_rows])
+
+        created.update(
+            users=len(built), courses=len(course_rows), schedules=len(schedule_rows), records=record_count,
+            slots=len(slot_rows), recurring_slots=len(recurring_rows),
+        )
+        yield created
+
+
+def delete_dataset(prefix='bench', batch_size=BATCH_SIZE):
+    """Remove the users a previous run created under ``prefix`` and everything they own
+
+    Records go first in raw batches; the rest is small enough for a
+    regular cascading delete. Returns the number of users deleted.
+    """
+    users = User.objects.filter(username__startswith=f'{prefix}_')
+    sum(delete_in_batches(AttendanceRecord.objects.filter(course__user__in=users), batch_size))
+    count = users.count()
+    users.delete()
+    return count
@@ -0,0 +1,299 @@
+"""Live updates for open pages over Server-Sent Events (ASGI profile only).
+
+Writes publish per-user events to a broker once their transaction commits:
+
+* ``changed`` whenever the user's suggestions version is bumped
+  (``tracker.cache.invalidate_suggestions``), which every change to the
+  user's courses, lectures, attendance counters or threshold policies
+  already does;
+* ``slot`` when a manual TimetableSlot is created, changed or deleted.
+
+Each open stream at ``EVENTS_PATH`` turns ``changed`` into a ``courses``
+event with every course's counters (one query) and a ``suggestions``
+event, so the dashboard refetches ``suggestions_api`` only when something
+changed instead of polling it. Both are also sent as soon as a stream
+opens, so nothing published before the page connected is missed.
+
+The stream is a small ASGI app in front of Django (``EventStreamApp``)
+rather than a view: Django 4.2 does not notice a client going away in the
+middle of a streaming response, and keeps a thread (and with it a
+database connection) for the request until the response ends. Here an
+idle stream is a coroutine waiting on its ``Subscription``; the session
+and the counters are read on the thread pool and the database connection
+is closed straight after. ``changed`` events that arrive while a stream
+is busy collapse into one, and at most ``EVENTS_QUEUE_SIZE`` slot events
+wait per stream: past that the stream sends ``resync`` and the page
+reloads. Streams end after ``EVENTS_MAX_AGE`` seconds and browsers
+reconnect on their own, so a dropped client cannot linger either.
+
+``InProcessBroker`` only reaches the streams of the process that handled
+the write, so ``EVENTS_STREAM`` is off by default with it: turn it on for
+a single-worker ASGI deployment, or point ``EVENTS_BROKER`` at a broker
+shared between processes (e.g. over Redis pub/sub) that implements the
+same ``subscribe``/``unsubscribe``/``publish`` methods. Pages whose stream
+is refused (403, 503) fall back to polling.
+"""
+import asyncio
+import json
+import threading
+from collections import deque
+from http.cookies import CookieError, SimpleCookie
+from importlib import import_module
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+# How long browsers wait before reconnecting once a stream ends
+RETRY_MS = 3000
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Subscription:
+    """Events waiting for one open stream; only touched from its event loop"""
+    __slots__ = ('user_id', 'loop', 'limit', 'wakeup', 'changed', 'events', 'overflowed', 'closed')
+
+    def __init__(self, user_id, loop, limit):
+        self.user_id = user_id
+        self.loop = loop
+        self.limit = limit
+        self.wakeup = asyncio.Event()
+        self.changed = False
+        self.events = deque()
+        self.overflowed = False
+        self.closed = False
+
+    def deliver(self, event, data):
+        if event == 'changed':
+            self.changed = True
+        elif len(self.events) >= self.limit:
+            self.events.clear()
+            self.overflowed = True
+        else:
+            self.events.append((event, data))
+        self.wakeup.set()
+
+    def close(self):
+        self.closed = True
+        self.wakeup.set()
+
+    async def wait(self, timeout):
+        """``(changed, [(event, data)], overflowed)``, or None after ``timeout`` seconds with nothing new"""
+        if not (self.changed or self.events or self.overflowed or self.closed):
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        self.wakeup.clear()
+        pending = (self.changed, list(self.events), self.overflowed)
+        self.changed, self.overflowed = False, False
+        self.events.clear()
+        return pending
+
+
+class InProcessBroker:
+    """Fan events out to the subscriptions of this process
+
+    ``subscribe`` and ``unsubscribe`` run on the event loop serving the
+    stream; ``publish`` may be called from any thread and hands each event
+    to the subscription's loop.
+    """
+
+    def __init__(self):
+        self.max_subscribers = getattr(settings, 'EVENTS_MAX_SUBSCRIBERS', 10000)
+        self.queue_size = getattr(settings, 'EVENTS_QUEUE_SIZE', 32)
+        self.lock = threading.Lock()
+        self.subscribers = {}
+        self.count = 0
+
+    def subscribe(self, user_id):
+        """A new Subscription for the user; raises TooManySubscribers at ``EVENTS_MAX_SUBSCRIBERS``"""
+        subscription = Subscription(user_id, asyncio.get_running_loop(), self.queue_size)
+        with self.lock:
+            if self.count >= self.max_subscribers:
+                raise TooManySubscribers
+            self.subscribers.setdefault(user_id, set()).add(subscription)
+            self.count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscribers.get(subscription.user_id)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.subscribers[subscription.user_id]
+            self.count -= 1
+
+    def publish(self, user_id, event, data=None):
+        with self.lock:
+            subscriptions = list(self.subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event, data)
+            except RuntimeError:
+                # The loop is shutting down; its streams are going away too
+                pass
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The process-wide broker named by ``EVENTS_BROKER``"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.EVENTS_BROKER)()
+    return _broker
+
+
+def publish(user_id, event, data=None):
+    """Publish an event to the user's open streams right away"""
+    if settings.EVENTS_STREAM:
+        get_broker().publish(user_id, event, data)
+
+
+def publish_on_commit(user_id, event, data=None):
+    """Publish an event to the user's open streams once the current transaction commits"""
+    if settings.EVENTS_STREAM:
+        transaction.on_commit(lambda: get_broker().publish(user_id, event, data))
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'.encode()
+
+
+def _session_user_id(cookie_header):
+    """Id of the active user logged in with the session cookie, or None"""
+    from django.contrib.auth import get_user
+
+    try:
+        cookies = SimpleCookie(cookie_header)
+    except CookieError:
+        return None
+    morsel = cookies.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return None
+    try:
+        store = import_module(settings.SESSION_ENGINE).SessionStore(morsel.value)
+        # get_user checks the backend, the session hash and is_active like AuthenticationMiddleware
+        user = get_user(SimpleNamespace(session=store))
+        return user.pk if user.is_authenticated else None
+    finally:
+        connection.close()
+
+
+def course_counters(user_id):
+    """``[{id, attended, total, percentage, below_threshold}]`` for each of the user's courses"""
+    from .models import Course
+
+    try:
+        return [
+            {
+                'id': course.id,
+                'attended': course.attended_lectures,
+                'total': course.total_lectures,
+                'percentage': course.attendance_percentage,
+                'below_threshold': course.is_below_threshold,
+            }
+            for course in Course.objects.filter(user_id=user_id).with_thresholds().only(
+                'attended_lectures', 'total_lectures'
+            )
+        ]
+    finally:
+        # A stream lives for minutes; it must not hold a connection meanwhile
+        connection.close()
+
+
+async def stream_events(subscription, snapshot, heartbeat, max_age):
+    """Encoded events for a subscription until it is closed or ``max_age`` seconds have passed
+
+    ``snapshot`` is an async callable returning the user's course counters.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_age
+    yield f'retry: {RETRY_MS}\n\n'.encode()
+    changed, events, overflowed = True, [], False
+    while not subscription.closed:
+        if overflowed:
+            yield format_event('resync', {})
+        for event, data in events:
+            yield format_event(event, data)
+        if changed:
+            yield format_event('courses', {'courses': await snapshot(subscription.user_id)})
+            yield format_event('suggestions', {})
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return
+        pending = await subscription.wait(min(heartbeat, remaining))
+        if pending is None:
+            changed, events, overflowed = False, [], False
+            yield b': keep-alive\n\n'
+        else:
+            changed, events, overflowed = pending
+
+
+class EventStreamApp:
+    """ASGI app serving the event stream at ``EVENTS_PATH`` and passing everything else to ``app``"""
+
+    def __init__(self, app):
+        self.app = app
+        self.path = settings.EVENTS_PATH
+        self.heartbeat = settings.EVENTS_HEARTBEAT
+        self.max_age = settings.EVENTS_MAX_AGE
+        self.snapshot = sync_to_async(course_counters, thread_sensitive=False)
+        self.authenticate = sync_to_async(_session_user_id, thread_sensitive=False)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] != self.path:
+            return await self.app(scope, receive, send)
+        if scope['method'] != 'GET':
+            return await self.respond(send, 405, [(b'allow', b'GET')])
+        cookie_header = b'; '.join(value for name, value in scope['headers'] if name == b'cookie')
+        user_id = await self.authenticate(cookie_header.decode('latin-1'))
+        if user_id is None:
+            return await self.respond(send, 403)
+        broker = get_broker()
+        try:
+            subscription = broker.subscribe(user_id)
+        except TooManySubscribers:
+            return await self.respond(send, 503, [(b'retry-after', b'30')])
+        disconnect = asyncio.ensure_future(self.wait_for_disconnect(receive, subscription))
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                ],
+            })
+            async for chunk in stream_events(subscription, self.snapshot, self.heartbeat, self.max_age):
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            if not subscription.closed:
+                await send({'type': 'http.response.body', 'body': b''})
+        except OSError:
+            # The client went away between the disconnect check and the write
+            pass
+        finally:
+            disconnect.cancel()
+            broker.unsubscribe(subscription)
+
+    async def wait_for_disconnect(self, receive, subscription):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        subscription.close()
+
+    async def respond(self, send, status, headers=()):
+        await send({'type': 'http.response.start', 'status': status, 'headers': list(headers)})
+        await send({'type': 'http.response.body', 'body': b''})
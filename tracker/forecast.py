@@ -0,0 +1,159 @@
+"""Semester attendance forecasts for all of a user's courses at once.
+
+For each course, given the lectures left until the end of term (weekly
+schedules minus holidays):
+
+* ``remaining_lectures`` and the percentage if every one is attended;
+* ``max_skippable``: lectures that can still be missed while finishing the
+  term at or above the course's threshold (negative when it is already
+  out of reach);
+* ``reach_date``: for a course below the threshold, the lecture at which
+  attending everything brings it back up;
+* ``unreachable_date``: the lecture that, if it and every lecture before it
+  are skipped, makes the threshold unreachable by the end of term.
+
+Nothing is expanded into dates. Remaining counts are arithmetic per
+weekday (``count_weekday`` and a bisect over the holidays), and the n-th
+remaining lecture is found from the course's weekly pattern, stepping past
+holidays in a few iterations, so the cost per course does not depend on
+how far away the end of term is.
+"""
+import math
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Course, Timetable
+from .occurrences import count_weekday, group_by_weekday
+
+
+def _holidays_by_weekday(holidays):
+    buckets = [[] for _ in range(7)]
+    for day in sorted(set(holidays)):
+        buckets[day.weekday()].append(day)
+    return buckets
+
+
+def _count_holidays(bucket, start, end):
+    return bisect_right(bucket, end) - bisect_left(bucket, start)
+
+
+def lectures_to_reach(attended, total, threshold):
+    """Lectures to attend in a row to reach ``threshold`` percent (0 if already there, None if never)"""
+    if 100 * attended >= threshold * total:
+        return 0
+    if threshold >= 100:
+        return None
+    return math.ceil((threshold * total - 100 * attended) / (100 - threshold))
+
+
+def max_skippable(attended, total, remaining, threshold):
+    """Most of ``remaining`` lectures that can be missed while ending at or above ``threshold``
+
+    Negative when even attending every remaining lecture falls short.
+    """
+    return min(remaining, (100 * (attended + remaining) - threshold * (total + remaining)) // 100)
+
+
+def _nth_lecture(n, start, offsets, holiday_dates, holiday_lectures, skipped):
+    """Date of the n-th (1-based) lecture on or after ``start``
+
+    ``offsets`` lists the day offset from ``start`` of each lecture in a
+    week, in order. ``holiday_dates`` are the sorted holidays that fall on
+    one of the course's lecture days and ``holiday_lectures[i]`` the lectures
+    lost to the first i of them. The first ``skipped`` lectures of ``start``
+    are already past. The position is pushed past every lecture lost up to
+    the date it lands on until that no longer moves it.
+    """
+    position = n + skipped
+    while True:
+        week, index = divmod(position - 1, len(offsets))
+        day = start + timedelta(days=7 * week + offsets[index])
+        moved = n + skipped + holiday_lectures[bisect_right(holiday_dates, day)]
+        if moved == position:
+            return day
+        position = moved
+
+
+def forecast_courses(courses, start, end, holidays=(), now_time=None):
+    """``{course id: forecast dict}`` for lectures from ``start`` through ``end``
+
+    ``courses`` should have ``schedules`` prefetched and come from
+    ``with_thresholds()``. Holidays are dates without lectures. When
+    ``now_time`` is given, lectures on ``start`` that began before it are
+    treated as already past.
+    """
+    holiday_buckets = _holidays_by_weekday(holidays)
+    sorted_holidays = sorted(day for day in set(holidays) if day >= start)
+    start_is_holiday = start in set(holidays)
+
+    forecasts = {}
+    for course in courses:
+        buckets = group_by_weekday(course.schedules.all())
+        counts = [len(bucket) for bucket in buckets]
+        # Earliest first, so lectures already past today lead the first week
+        skipped = 0
+        if now_time is not None and not start_is_holiday:
+            skipped = sum(1 for schedule in buckets[start.weekday()] if schedule.start_time <= now_time)
+        remaining = 0
+        if start <= end:
+            for weekday, count in enumerate(counts):
+                if count:
+                    days = count_weekday(weekday, start, end) - _count_holidays(holiday_buckets[weekday], start, end)
+                    remaining += count * days
+            remaining -= skipped
+
+        attended, total, threshold = course.attended_lectures, course.total_lectures, course.threshold
+        needed = lectures_to_reach(attended, total, threshold)
+        skippable = max_skippable(attended, total, remaining, threshold)
+        forecast = forecasts[course.id] = {
+            'course_id': course.id,
+            'course_name': course.name,
+            'attended_lectures': attended,
+            'total_lectures': total,
+            'current_percentage': course.attendance_percentage,
+            'threshold': threshold,
+            'remaining_lectures': remaining,
+            'best_percentage': round(100 * (attended + remaining) / (total + remaining), 2) if total + remaining else 0,
+            'max_skippable': skippable,
+            'lectures_needed': needed,
+            'reach_date': None,
+            'unreachable_date': None,
+        }
+
+        positions = []
+        if needed and needed <= remaining:
+            positions.append(('reach_date', needed))
+        if 0 <= skippable < remaining:
+            positions.append(('unreachable_date', skippable + 1))
+        if positions:
+            offsets = [offset for offset in range(7) for _ in range(counts[(start.weekday() + offset) % 7])]
+            holiday_dates = [day for day in sorted_holidays if counts[day.weekday()]]
+            holiday_lectures = [0]
+            for day in holiday_dates:
+                holiday_lectures.append(holiday_lectures[-1] + counts[day.weekday()])
+            for key, n in positions:
+                forecast[key] = _nth_lecture(n, start, offsets, holiday_dates, holiday_lectures, skipped)
+    return forecasts
+
+
+def get_forecast(user, until=None, now=None):
+    """Forecasts for the user's regular courses up to ``until`` (default: the semester end)
+
+    Returns ``(end date, [forecast dicts])`` ordered by course name; the end
+    date is None, with no forecasts, when there is neither.
+    """
+    now = now or timezone.now()
+    timetable, _ = Timetable.objects.get_or_create(user=user)
+    end = until or timetable.semester_end
+    if end is None:
+        return None, []
+    start = now.date()
+    courses = (
+        Course.objects.filter(user=user, is_regular=True).with_thresholds()
+        .prefetch_related('schedules').order_by('name')
+    )
+    holidays = timetable.holidays.filter(date__gte=start, date__lte=end).values_list('date', flat=True)
+    forecasts = forecast_courses(courses, start, end, list(holidays), now.time())
+    return end, list(forecasts.values())
@@ -0,0 +1,100 @@
+"""Free-time finder for booking manual slots.
+
+Busy intervals come from the same cached week dicts the timetable page
+renders (``Timetable.get_week_entries``), so a warm cache answers without
+touching the database. Each day's intervals are already sorted by start,
+so one sweep merges them and yields the gaps between them.
+"""
+from datetime import timedelta
+
+from .intervals import format_minutes, to_minutes
+from .models import LectureSchedule
+from .timetable_grid import FIRST_HOUR, LAST_HOUR
+
+# Free time is only searched within the hours the timetable grid shows
+DAY_START = FIRST_HOUR * 60
+DAY_END = (LAST_HOUR + 1) * 60
+
+
+def busy_intervals(timetable, start, end):
+    """{date: [(start_minutes, end_minutes)]} sorted by start, for dates from ``start`` to ``end``"""
+    busy = {}
+    week_start = start - timedelta(days=start.weekday())
+    while week_start <= end:
+        schedule = timetable.get_week_entries(week_start)
+        for day_code, entries in schedule.items():
+            day = week_start + timedelta(days=LectureSchedule.DAY_INDEX[day_code])
+            if start <= day <= end:
+                busy[day] = [(to_minutes(entry['start_time']), to_minutes(entry['end_time'])) for entry in entries]
+        week_start += timedelta(weeks=1)
+    return busy
+
+
+def free_windows(intervals, day_start=DAY_START, day_end=DAY_END):
+    """Gaps between start-sorted ``(start, end)`` intervals within the day bounds"""
+    cursor = day_start
+    for start, end in intervals:
+        if start > cursor:
+            yield cursor, min(start, day_end)
+        cursor = max(cursor, end)
+        if cursor >= day_end:
+            return
+    if cursor < day_end:
+        yield cursor, day_end
+
+
+def place(window_start, window_end, duration, prefer_start, prefer_end):
+    """Start of a ``duration`` block in the window as close to the preferred hours as it gets
+
+    Returns ``(start, overlap_minutes)``; without a preference the block
+    starts with the window.
+    """
+    if prefer_start is None:
+        return window_start, 0
+    # Overlap grows until the block hits the preferred range, so the best
+    # start is the preferred start clamped into the window
+    start = min(max(window_start, prefer_start), window_end - duration)
+    overlap = max(0, min(start + duration, prefer_end) - max(start, prefer_start))
+    return start, overlap
+
+
+def find_free_slots(timetable, duration, start, end, prefer_start=None, prefer_end=None, now=None, limit=10):
+    """Ranked free blocks of ``duration`` minutes between two dates (inclusive)
+
+    ``prefer_start``/``prefer_end`` are times of day; blocks inside them rank
+    first, then earlier dates and times. ``now`` (a datetime) hides time
+    that has already passed. Each result also reports the whole free window
+    the block sits in.
+    """
+    prefer = (None, None)
+    if prefer_start is not None and prefer_end is not None:
+        prefer = (to_minutes(prefer_start), to_minutes(prefer_end))
+
+    ranked = []
+    busy = busy_intervals(timetable, start, end)
+    for day in sorted(busy):
+        day_start = DAY_START
+        if now is not None and day <= now.date():
+            if day < now.date():
+                continue
+            # Rounded up to the next five minutes
+            day_start = max(DAY_START, -(-to_minutes(now) // 5) * 5)
+        for window_start, window_end in free_windows(busy[day], day_start):
+            if window_end - window_start < duration:
+                continue
+            slot_start, overlap = place(window_start, window_end, duration, *prefer)
+            ranked.append((-overlap, day, slot_start, window_start, window_end))
+
+    ranked.sort()
+    return [
+        {
+            'date': day.strftime('%Y-%m-%d'),
+            'day': day.strftime('%A'),
+            'start_time': format_minutes(slot_start),
+            'end_time': format_minutes(slot_start + duration),
+            'window_start': format_minutes(window_start),
+            'window_end': format_minutes(window_end),
+            'preferred_minutes': -overlap,
+        }
+        for overlap, day, slot_start, window_start, window_end in ranked[:limit]
+    ]
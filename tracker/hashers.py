@@ -0,0 +1,26 @@
+"""Password hashing with a configurable work factor.
+
+``PASSWORD_HASH_ITERATIONS`` sets the PBKDF2 iterations used for new
+hashes. Stored hashes keep the count they were made with, and Django
+rehashes a password whose count differs on the next successful login
+(``must_update``), so a changed cost reaches each user transparently.
+That also works downwards, so the setting is never allowed below Django's
+own default (``MIN_ITERATIONS``): a low value would otherwise weaken every
+stored hash one login at a time.
+
+The hasher keeps Django's ``pbkdf2_sha256`` algorithm name, so it reads
+every existing hash and replaces Django's own PBKDF2 hasher in
+``PASSWORD_HASHERS`` (two hashers with one name cannot both be listed).
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+# Django 4.2's PBKDF2 default
+MIN_ITERATIONS = PBKDF2PasswordHasher.iterations
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return max(getattr(settings, 'PASSWORD_HASH_ITERATIONS', MIN_ITERATIONS), MIN_ITERATIONS)
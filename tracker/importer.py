@@ -0,0 +1,332 @@
+"""Bulk import of courses, lecture schedules and attendance records.
+
+Rows use the columns of ``tracker.export`` (``course_id`` is ignored, ids
+are not portable), so an export can be imported elsewhere as is:
+
+* a row with ``day_of_week``/``start_time``/``end_time`` defines a lecture
+  of the course (which becomes a regular course);
+* a row with a ``date`` sets the attendance record for that day.
+
+Rows are processed in chunks, one transaction each. Every chunk is
+validated first, users and courses are resolved through in-memory maps
+that grow across chunks, and schedules and records are written with
+``bulk_create(update_conflicts=True)``. Counters and rollups move by
+aggregated deltas, as in ``bulk_mark_attendance``.
+"""
+import csv
+import json
+from collections import Counter, namedtuple
+from datetime import datetime
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .attendance import BULK_BATCH_SIZE, add_counter_delta, apply_counter_deltas
+from .cache import invalidate_suggestions, invalidate_timetable
+from .models import AttendanceRecord, Course, LectureSchedule
+from .rollups import month_start, refresh_rollups
+
+CHUNK_SIZE = 5000
+MAX_ERRORS = 1000
+
+ImportRow = namedtuple('ImportRow', [
+    'line', 'username', 'course', 'date', 'attended',
+    'day_of_week', 'start_time', 'end_time', 'room', 'professor', 'notes',
+])
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'present', 'p'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'absent', 'a', ''}
+DAY_NAMES = {code for code, name in LectureSchedule.DAYS_OF_WEEK}
+
+
+def read_rows(stream, input_format):
+    """Yield ``(line, dict)`` from a CSV, NDJSON or JSON (array) text stream"""
+    if input_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif input_format == 'ndjson':
+        for line, text in enumerate(stream, 1):
+            if text.strip():
+                yield line, json.loads(text)
+    elif input_format == 'json':
+        # A JSON array has to be parsed whole; use NDJSON for very large files
+        for index, row in enumerate(json.load(stream), 1):
+            yield index, row
+    else:
+        raise ValueError(f'Unknown input format {input_format!r}')
+
+
+def _text(row, key, max_length=None):
+    value = row.get(key)
+    value = '' if value is None else str(value).strip()
+    if max_length is not None and len(value) > max_length:
+        raise ValueError(f'{key} is longer than {max_length} characters')
+    return value
+
+
+def _parse_attended(value):
+    if isinstance(value, bool):
+        return value
+    value = '' if value is None else str(value).strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(f'Invalid attended value {value!r}')
+
+
+def _parse_time(value, key):
+    try:
+        return datetime.strptime(value, '%H:%M:%S' if value.count(':') == 2 else '%H:%M').time()
+    except ValueError:
+        raise ValueError(f'Invalid {key} {value!r}')
+
+
+def parse_row(line, row, default_username=''):
+    """Validate one input row into an ImportRow; raises ValueError"""
+    if not isinstance(row, dict):
+        raise ValueError('Each row must be an object')
+    username = _text(row, 'username', 150) or default_username
+    course = _text(row, 'course', 200)
+    if not username:
+        raise ValueError('username is required')
+    if not course:
+        raise ValueError('course is required')
+
+    record_date = None
+    if _text(row, 'date'):
+        try:
+            record_date = datetime.strptime(_text(row, 'date'), '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError(f"Invalid date {_text(row, 'date')!r}")
+
+    day_of_week = _text(row, 'day_of_week').lower()
+    start_time = end_time = None
+    if day_of_week:
+        if day_of_week not in DAY_NAMES:
+            raise ValueError(f'Invalid day_of_week {day_of_week!r}')
+        start_time = _parse_time(_text(row, 'start_time'), 'start_time')
+        end_time = _parse_time(_text(row, 'end_time'), 'end_time')
+        if end_time <= start_time:
+            raise ValueError('end_time must be after start_time')
+    elif record_date is None:
+        raise ValueError('A row needs a date, a day_of_week, or both')
+
+    return ImportRow(
+        line, username, course, record_date,
+        _parse_attended(row.get('attended')) if record_date else None,
+        day_of_week or None, start_time, end_time,
+        _text(row, 'room', 100), _text(row, 'professor', 100), _text(row, 'notes'),
+    )
+
+
+class AttendanceImporter:
+    """Imports chunks of rows; ``stats`` and ``errors`` accumulate across chunks"""
+
+    def __init__(self, create_users=False, default_username='', batch_size=BULK_BATCH_SIZE, max_errors=MAX_ERRORS):
+        self.create_users = create_users
+        self.default_username = default_username
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.user_ids = {}      # username -> user id
+        self.course_ids = {}    # (user id, course name) -> course id
+        self.stats = Counter()
+        self.errors = []
+
+    def error(self, line, message):
+        self.stats['invalid'] += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line, message))
+
+    def import_chunk(self, chunk):
+        """Validate and write one chunk of ``(line, dict)`` rows in a single transaction
+
+        If the chunk fails, its rows are rolled back and so are its counts
+        and errors; the id maps are emptied, as they may hold ids of users
+        and courses the chunk created, and are resolved again by the next
+        chunk.
+        """
+        stats, error_count = self.stats.copy(), len(self.errors)
+        try:
+            self._import_chunk(chunk)
+        except Exception:
+            self.stats, self.errors[error_count:] = stats, []
+            self.user_ids.clear()
+            self.course_ids.clear()
+            raise
+
+    def _import_chunk(self, chunk):
+        parsed = []
+        for line, row in chunk:
+            try:
+                parsed.append(parse_row(line, row, self.default_username))
+            except (ValueError, TypeError) as e:
+                self.error(line, str(e))
+        self.stats['rows'] += len(chunk)
+        if not parsed:
+            return
+
+        with transaction.atomic():
+            self._resolve_users({row.username for row in parsed})
+            rows = []
+            for row in parsed:
+                if row.username in self.user_ids:
+                    rows.append(row)
+                else:
+                    self.error(row.line, f'Unknown user {row.username!r}')
+            if rows:
+                self._resolve_courses(rows)
+                lectures = self._write_schedules(rows)
+                self._write_records(rows, lectures)
+
+    def _resolve_users(self, usernames):
+        missing = usernames - self.user_ids.keys()
+        if not missing:
+            return
+        self.user_ids.update(User.objects.filter(username__in=missing).values_list('username', 'id'))
+        new = missing - self.user_ids.keys()
+        if new and self.create_users:
+            # Imported accounts start without a usable password
+            password = make_password(None)
+            User.objects.bulk_create(
+                [User(username=username, password=password) for username in sorted(new)],
+                batch_size=self.batch_size
+            )
+            self.user_ids.update(User.objects.filter(username__in=new).values_list('username', 'id'))
+            self.stats['users_created'] += len(new)
+
+    def _resolve_courses(self, rows):
+        keys = {(self.user_ids[row.username], row.course) for row in rows}
+        missing = keys - self.course_ids.keys()
+        if missing:
+            self.course_ids.update(self._existing_courses(missing))
+        new = missing - self.course_ids.keys()
+        if new:
+            scheduled = {(self.user_ids[row.username], row.course) for row in rows if row.day_of_week}
+            Course.objects.bulk_create(
+                [Course(user_id=user_id, name=name, is_regular=(user_id, name) in scheduled)
+                 for user_id, name in sorted(new)],
+                batch_size=self.batch_size,
+                update_conflicts=True,
+                unique_fields=['user', 'name'],
+                update_fields=['updated_at'],
+            )
+            self.course_ids.update(self._existing_courses(new))
+            self.stats['courses_created'] += len(new)
+
+    def _existing_courses(self, keys):
+        user_ids = {user_id for user_id, name in keys}
+        names = {name for user_id, name in keys}
+        return {
+            (user_id, name): course_id
+            for course_id, user_id, name in Course.objects.filter(user_id__in=user_ids, name__in=names)
+            .values_list('id', 'user_id', 'name')
+            if (user_id, name) in keys
+        }
+
+    def _course_id(self, row):
+        return self.course_ids[(self.user_ids[row.username], row.course)]
+
+    def _write_schedules(self, rows):
+        """Upsert the chunk's lectures; returns {(course id, day): [(start time, schedule id)]}"""
+        schedules = {}
+        for row in rows:
+            if row.day_of_week:
+                course_id = self._course_id(row)
+                schedules[(course_id, row.day_of_week, row.start_time)] = LectureSchedule(
+                    course_id=course_id, day_of_week=row.day_of_week, start_time=row.start_time,
+                    end_time=row.end_time, room=row.room, professor=row.professor,
+                )
+        course_ids = {self._course_id(row) for row in rows}
+
+        if schedules:
+            LectureSchedule.objects.bulk_create(
+                schedules.values(),
+                batch_size=self.batch_size,
+                update_conflicts=True,
+                unique_fields=['course', 'day_of_week', 'start_time'],
+                update_fields=['end_time', 'room', 'professor', 'updated_at'],
+            )
+            scheduled_courses = {course_id for course_id, day, start in schedules}
+            Course.objects.filter(pk__in=scheduled_courses, is_regular=False).update(
+                is_regular=True, updated_at=timezone.now()
+            )
+            self.stats['schedules_written'] += len(schedules)
+            # Bulk writes send no signals, so cached timetables are dropped here
+            for user_id in Course.objects.filter(pk__in=scheduled_courses).values_list('user_id', flat=True).distinct():
+                invalidate_timetable(user_id)
+                invalidate_suggestions(user_id)
+
+        lectures = {}
+        for schedule_id, course_id, day, start in LectureSchedule.objects.filter(
+            course_id__in=course_ids
+        ).order_by('start_time').values_list('id', 'course_id', 'day_of_week', 'start_time'):
+            lectures.setdefault((course_id, day), []).append((start, schedule_id))
+        return lectures
+
+    def _write_records(self, rows, lectures):
+        marks = {}
+        for row in rows:
+            if row.date is None:
+                continue
+            course_id = self._course_id(row)
+            day = LectureSchedule.DAYS_OF_WEEK[row.date.weekday()][0]
+            on_day = lectures.get((course_id, day), [])
+            # The row's own lecture if it names one, else the earliest that day
+            schedule_id = next((sid for start, sid in on_day if start == row.start_time), None)
+            if schedule_id is None and on_day:
+                schedule_id = on_day[0][1]
+            marks[(course_id, row.date)] = (row.attended, row.notes, schedule_id)
+        if not marks:
+            return
+
+        dates = [record_date for course_id, record_date in marks]
+        existing = {
+            (course_id, record_date): (attended, notes, schedule_id)
+            for course_id, record_date, attended, notes, schedule_id in AttendanceRecord.objects.filter(
+                course_id__in={course_id for course_id, record_date in marks},
+                date__gte=min(dates),
+                date__lte=max(dates),
+            ).values_list('course_id', 'date', 'attended', 'notes', 'schedule_id')
+        }
+
+        deltas = {}
+        records = []
+        for (course_id, record_date), values in marks.items():
+            previous = existing.get((course_id, record_date))
+            if previous == values:
+                self.stats['records_unchanged'] += 1
+                continue
+            self.stats['records_created' if previous is None else 'records_updated'] += 1
+            add_counter_delta(deltas, course_id, None if previous is None else previous[0], values[0])
+            attended, notes, schedule_id = values
+            records.append(AttendanceRecord(
+                course_id=course_id, date=record_date, attended=attended, notes=notes, schedule_id=schedule_id
+            ))
+
+        if records:
+            AttendanceRecord.objects.bulk_create(
+                records,
+                batch_size=self.batch_size,
+                update_conflicts=True,
+                unique_fields=['course', 'date'],
+                update_fields=['attended', 'notes', 'schedule', 'updated_at'],
+            )
+            apply_counter_deltas({course_id: delta for course_id, delta in deltas.items() if delta != (0, 0)})
+            refresh_rollups({record.course_id for record in records}, months={month_start(record.date) for record in records})
+            for user_id in {self.user_ids[row.username] for row in rows if row.date is not None}:
+                invalidate_suggestions(user_id)
+
+
+def iter_chunks(rows, size=CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,92 @@
+"""In-memory index of a user's busy intervals, for checking many slots at once.
+
+``TimetableSlot.has_conflict`` answers a single question with a query or
+two. Booking a series (or any batch) instead loads the user's lectures,
+manual slots and recurring slots for the whole date range at once and
+checks every candidate against an ``IntervalIndex``: per date, intervals
+sorted by start with a running maximum of their ends, so a lookup is a
+binary search.
+"""
+from bisect import bisect_left, insort
+from collections import defaultdict
+from itertools import accumulate
+
+from .models import LectureSchedule, TimetableSlot
+from .occurrences import expand_occurrences
+
+
+def to_minutes(value):
+    return value.hour * 60 + value.minute
+
+
+class IntervalIndex:
+    """Busy ``[start, end)`` intervals (in minutes) grouped by date"""
+
+    def __init__(self):
+        self._days = defaultdict(list)   # date -> [(start, end, label)] sorted by start
+        self._max_ends = {}              # date -> running max of ends, rebuilt lazily
+
+    def add(self, day, start_time, end_time, label):
+        insort(self._days[day], (to_minutes(start_time), to_minutes(end_time), label))
+        self._max_ends.pop(day, None)
+
+    def find(self, day, start_time, end_time):
+        """An interval overlapping ``start_time``-``end_time`` on ``day``, or None"""
+        intervals = self._days.get(day)
+        if not intervals:
+            return None
+        start, end = to_minutes(start_time), to_minutes(end_time)
+        max_ends = self._max_ends.get(day)
+        if max_ends is None:
+            max_ends = self._max_ends[day] = list(accumulate((interval[1] for interval in intervals), max))
+        # Only intervals starting before our end can overlap; among those,
+        # one overlaps exactly when the largest end reaches past our start
+        candidates = bisect_left(intervals, (end,))
+        if not candidates or max_ends[candidates - 1] <= start:
+            return None
+        for index in range(candidates - 1, -1, -1):
+            if intervals[index][1] > start:
+                return intervals[index]
+
+    @classmethod
+    def for_timetable(cls, timetable, start, end):
+        """Index of a timetable's lectures and manual slots between two dates (inclusive)"""
+        index = cls()
+        lectures = LectureSchedule.objects.filter(
+            course__user_id=timetable.user_id,
+            course__is_regular=True
+        ).select_related('course')
+        for day, lecture in expand_occurrences(lectures, start, end):
+            index.add(day, lecture.start_time, lecture.end_time, f"'{lecture.course.name}' lecture")
+
+        slots = TimetableSlot.objects.filter(timetable=timetable, date__gte=start, date__lte=end)
+        for slot in slots.only('title', 'date', 'start_time', 'end_time'):
+            index.add(slot.date, slot.start_time, slot.end_time, f"'{slot.title}'")
+        for day, entry in timetable.get_recurring_occurrences(start, end):
+            index.add(day, entry['start_time'], entry['end_time'], f"recurring '{entry['title']}'")
+        return index
+
+
+def format_minutes(minutes):
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+def find_conflicts(timetable, slots):
+    """Check unsaved slots against the timetable and against each other
+
+    Returns ``[(slot, message)]`` for every slot that overlaps something;
+    an empty list means the whole batch can be saved.
+    """
+    if not slots:
+        return []
+    dates = [slot.date for slot in slots]
+    index = IntervalIndex.for_timetable(timetable, min(dates), max(dates))
+    conflicts = []
+    for slot in slots:
+        clash = index.find(slot.date, slot.start_time, slot.end_time)
+        if clash is not None:
+            start, end, label = clash
+            conflicts.append((slot, f'Conflicts with {label} ({format_minutes(start)}-{format_minutes(end)})'))
+        else:
+            index.add(slot.date, slot.start_time, slot.end_time, f"'{slot.title}'")
+    return conflicts
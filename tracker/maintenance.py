@@ -0,0 +1,151 @@
+"""Background maintenance: data retention.
+
+Manual slots only matter for the week they are in and recurring slots end
+at ``ends_on``, so anything before the current week can go. This used to
+happen inside ``Timetable.refresh_weekly`` on each user's first page view
+of the week; ``manage.py run_maintenance`` now runs the tasks below from
+cron or a loop. Each purge sweeps its table in primary-key (keyset)
+batches and deletes a batch at a time, so no request waits on it and no
+transaction grows with the number of users.
+
+Expired sessions are purged the same way, rather than in the single DELETE
+of ``clearsessions``, when sessions are stored in the database, and so are
+delta-sync tombstones older than ``SYNC_TOMBSTONE_DAYS``.
+
+Each batch is a plain ``DELETE ... WHERE id IN (...)``, without the ORM's
+collector or signals: nothing cascades from these rows that is not purged
+first, and the ``post_delete`` receivers skipped have nothing to do for
+rows from before the current week:
+
+* ``slot_changed`` would drop cached weeks, which past rows no longer
+  appear in, and publish a ``slot`` event to open pages (``tracker.events``),
+  which only show the current week onward;
+* ``write_tombstone`` would record purged manual slots and series for the
+  delta-sync API; clients drop slots before the current week, and series
+  that ended before it, themselves (``tracker.sync``), and a tombstone per
+  purged row would only grow the tombstone table;
+* ``slot_exception_changed`` would mark the series of a purged exception
+  as changed, but a skipped date in the past changes nothing a client
+  shows.
+"""
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import MaintenanceRun, RecurringSlot, RecurringSlotException, SyncTombstone, TimetableSlot
+
+BATCH_SIZE = 1000
+RUN_HISTORY_DAYS = 90
+
+
+def current_week_start():
+    today = timezone.now().date()
+    return today - timedelta(days=today.weekday())
+
+
+def iter_id_batches(queryset, batch_size=BATCH_SIZE):
+    """Yield lists of primary keys in order, resuming after the last key of each batch"""
+    last_id = None
+    while True:
+        page = queryset.order_by('pk')
+        if last_id is not None:
+            page = page.filter(pk__gt=last_id)
+        batch = list(page.values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]
+
+
+def delete_in_batches(queryset, batch_size=BATCH_SIZE):
+    """Delete the queryset's rows a batch at a time, one transaction per batch
+
+    Matching keys are found by a keyset sweep (``iter_id_batches``) and
+    each batch is deleted by primary key. Yields the number of rows deleted
+    by each batch.
+    """
+    model = queryset.model
+    db = queryset.db
+    connection = connections[db]
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk_column = connection.ops.quote_name(model._meta.pk.column)
+    for batch in iter_id_batches(queryset, batch_size):
+        placeholders = ', '.join(['%s'] * len(batch))
+        with transaction.atomic(using=db), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table} WHERE {pk_column} IN ({placeholders})', batch)
+            deleted = cursor.rowcount
+        yield deleted
+
+
+def purge_queries(before=None):
+    """``(label, queryset)`` for everything dated before ``before`` (default: this week's Monday)
+
+    Exceptions come before series because they reference them.
+    """
+    if before is None:
+        before = current_week_start()
+    return [
+        ('purge_past_slots', TimetableSlot.objects.filter(date__lt=before)),
+        ('purge_past_slot_exceptions', RecurringSlotException.objects.filter(
+            Q(date__lt=before) | Q(series__ends_on__lt=before)
+        )),
+        ('purge_finished_recurring_slots', RecurringSlot.objects.filter(ends_on__lt=before)),
+    ]
+
+
+def expired_sessions():
+    """Expired rows of the session table, or None when sessions are not stored in the database"""
+    store = import_module(settings.SESSION_ENGINE).SessionStore
+    if not issubclass(store, DBSessionStore):
+        return None
+    return store.get_model_class().objects.filter(expire_date__lt=timezone.now())
+
+
+def maintenance_tasks(before=None, batch_size=BATCH_SIZE):
+    """``(name, batches)`` for one maintenance pass; ``batches`` yields rows handled per batch"""
+    if before is None:
+        before = current_week_start()
+    tasks = []
+    for label, queryset in purge_queries(before):
+        tasks.append((label, delete_in_batches(queryset, batch_size)))
+    sessions = expired_sessions()
+    if sessions is not None:
+        tasks.append(('purge_expired_sessions', delete_in_batches(sessions, batch_size)))
+    old_tombstones = SyncTombstone.objects.filter(
+        deleted_at__lt=timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+    )
+    tasks.append(('purge_sync_tombstones', delete_in_batches(old_tombstones, batch_size)))
+    old_runs = MaintenanceRun.objects.filter(started_at__lt=timezone.now() - timedelta(days=RUN_HISTORY_DAYS))
+    tasks.append(('purge_maintenance_runs', delete_in_batches(old_runs, batch_size)))
+    return tasks
+
+
+def run_task(name, batches, progress=None):
+    """Run one task, recording it as a MaintenanceRun that is updated after every batch
+
+    ``progress(run)`` is called after each batch. Errors are recorded on
+    the run and re-raised.
+    """
+    run = MaintenanceRun.objects.create(task=name)
+    try:
+        for count in batches:
+            run.batches += 1
+            run.rows += count
+            run.save(update_fields=['batches', 'rows'])
+            if progress is not None:
+                progress(run)
+    except Exception as e:
+        run.succeeded = False
+        run.error = f'{type(e).__name__}: {e}'
+        run.finished_at = timezone.now()
+        run.save(update_fields=['succeeded', 'error', 'finished_at'])
+        raise
+    run.succeeded = True
+    run.finished_at = timezone.now()
+    run.save(update_fields=['succeeded', 'finished_at'])
+    return run
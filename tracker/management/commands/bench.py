@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from tracker.bench import ENDPOINTS, compare_reports, run_benchmarks
+from tracker.datagen import PROFILES, generate_dataset
+
+class Command(BaseCommand):
+    help = ('Benchmark the main views through the test client against a generated dataset in a throwaway '
+            'database, and write a JSON report (p50/p95 latency, queries, session writes, peak allocations) to diff '
+            'between commits')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=sorted(PROFILES), default='small', help='Dataset size (see generate_dataset)')
+        parser.add_argument('--users', type=int, help='Override the number of generated users')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--endpoint', action='append', choices=list(ENDPOINTS), help='Benchmark only this endpoint (repeatable)')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per endpoint')
+        parser.add_argument('--profile-iterations', type=int, default=5, help='Requests per endpoint for query counts and allocations')
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('-o', '--output', help='Write the JSON report to this file (default: stdout)')
+        parser.add_argument('--compare', metavar='REPORT', help='Compare with an earlier report; exit non-zero on regressions')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Allowed p95 slowdown with --compare (0.2 = 20%%)')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read {options['compare']}: {e}")
+
+        dataset = dict(PROFILES[options['profile']], seed=options['seed'])
+        if options['users'] is not None:
+            dataset['users'] = options['users']
+
+        # Never touch the configured database: everything runs in a test database
+        setup_test_environment()
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            started = time.monotonic()
+            for created in generate_dataset(**dataset):
+                pass
+            self.stderr.write(f"Generated {created['users']} users, {created['records']} records "
+                              f"in {time.monotonic() - started:.1f}s")
+
+            progress = lambda name, result: self.stderr.write(
+                f"{name:<26} p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+                f"{result['queries']:>3} queries  {result['session_writes_per_request']:>5.2f} session writes  "
+                f"{result['peak_alloc_kb']:>8.1f} KB"
+            )
+            try:
+                report = run_benchmarks(
+                    endpoints=options['endpoint'], iterations=options['iterations'],
+                    profile_iterations=options['profile_iterations'], warmup=options['warmup'],
+                    dataset=dataset, progress=progress,
+                )
+            except (RuntimeError, ValueError) as e:
+                raise CommandError(str(e))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        text = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(text + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(text)
+
+        if baseline is not None:
+            self.report_comparison(baseline, report, options['threshold'])
+
+    def report_comparison(self, baseline, report, threshold):
+        rows, regressions = compare_reports(baseline, report, threshold)
+        commit = baseline.get('meta', {}).get('commit') or 'baseline'
+        self.stderr.write(f'\nCompared with {commit}:')
+        for endpoint, before, after, problems in rows:
+            if before is None:
+                self.stderr.write(f'{endpoint:<26} new')
+                continue
+            change = (after['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0
+            line = (f"{endpoint:<26} p95 {before['p95_ms']:>8.2f} -> {after['p95_ms']:>8.2f} ms ({change:+.0f}%)  "
+                    f"queries {before.get('queries')} -> {after.get('queries')}")
+            self.stderr.write(self.style.WARNING(line) if problems else line)
+        if regressions:
+            raise CommandError(f'{len(regressions)} regression(s): ' + '; '.join(regressions))
+        self.stderr.write(self.style.SUCCESS('No regressions'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from tracker.models import Course
+from tracker.rollups import BATCH_SIZE, find_drift, refresh_rollups
+
+class Command(BaseCommand):
+    help = 'Report courses whose attendance rollup has drifted from their AttendanceRecord rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Courses checked per query batch')
+        parser.add_argument('--user', help='Only check the courses of this username')
+        parser.add_argument('--fix', action='store_true', help='Rebuild the rollups of drifted courses')
+
+    def handle(self, *args, **options):
+        courses = Course.objects.all()
+        if options['user']:
+            courses = courses.filter(user__username=options['user'])
+
+        drifted = []
+        for course_id, expected, actual in find_drift(options['batch_size'], courses):
+            drifted.append(course_id)
+            self.stdout.write(
+                f'Course {course_id}: records say {expected[1]}/{expected[0]} attended, '
+                f'rollup says {"missing" if actual is None else f"{actual[1]}/{actual[0]}"}'
+            )
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('No drift found'))
+            return
+
+        self.stdout.write(self.style.WARNING(f'{len(drifted)} course(s) drifted'))
+        if options['fix']:
+            for start in range(0, len(drifted), options['batch_size']):
+                refresh_rollups(drifted[start:start + options['batch_size']])
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt rollups for {len(drifted)} course(s)'))
@@ -0,0 +1,103 @@
+import re
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from tracker.models import (
+    AttendanceRecord, Course, LectureSchedule, MonthlyAttendanceRollup, RecurringSlot, Timetable, TimetableSlot
+)
+
+# Plan lines meaning a table is read without an index
+FULL_SCAN_PATTERNS = [
+    re.compile(r'\bSCAN (?:TABLE )?(\w+)$'),     # SQLite: "SCAN tracker_course"
+    re.compile(r'\bSeq Scan on (\w+)'),          # PostgreSQL
+]
+INDEX_PATTERNS = [
+    re.compile(r'\b(?:SEARCH|SCAN) (?:TABLE )?\w+ USING (?:COVERING |INTEGER PRIMARY KEY)?\s*(?:INDEX (\w+))?'),
+    re.compile(r'\b(?:Index Scan|Index Only Scan|Bitmap Index Scan)(?: Backward)? (?:using|on) (\w+)'),
+]
+
+def hot_queries(user, timetable):
+    """The querysets views.py and the models issue on every page view, labelled"""
+    week_start = timetable.get_current_week_start()
+    today = timezone.now().date()
+    course = Course.objects.filter(user=user).order_by('pk').first()
+    course_id = course.pk if course else 0
+    return [
+        ('dashboard courses', Course.objects.filter(user=user).order_by('name')),
+        ('regular courses', Course.objects.filter(user=user, is_regular=True)),
+        ('weekly lectures', LectureSchedule.objects.filter(
+            course__user_id=user.pk, course__is_regular=True).order_by('start_time')),
+        ('today lectures', LectureSchedule.objects.filter(
+            course__user=user, course__is_regular=True, day_of_week=LectureSchedule.DAYS_OF_WEEK[today.weekday()][0]
+        ).select_related('course').order_by('start_time')),
+        ('schedules prefetch', LectureSchedule.objects.filter(course_id__in=[course_id])),
+        ('week manual slots', TimetableSlot.objects.filter(
+            timetable=timetable, date__gte=week_start, date__lte=week_start + timedelta(days=6)
+        ).order_by('start_time')),
+        ('today manual slots', TimetableSlot.objects.filter(timetable=timetable, date=today).order_by('start_time')),
+        ('week recurring slots', RecurringSlot.objects.filter(timetable=timetable, starts_on__lte=week_start + timedelta(days=6))),
+        ('past slot purge', TimetableSlot.objects.filter(date__lt=week_start).values_list('pk', flat=True)[:1000]),
+        ('recent records', AttendanceRecord.objects.filter(course_id=course_id).order_by('-date')[:10]),
+        ('monthly rollups', MonthlyAttendanceRollup.objects.filter(course_id=course_id).order_by('-month')[:6]),
+    ]
+
+def analyse_plan(plan):
+    """(tables read by full scan, indexes used) from an EXPLAIN output"""
+    full_scans, indexes = [], []
+    for line in plan.splitlines():
+        line = line.strip().lstrip('-> ').strip()
+        for pattern in FULL_SCAN_PATTERNS:
+            match = pattern.search(line)
+            if match:
+                full_scans.append(match.group(1))
+        for pattern in INDEX_PATTERNS:
+            match = pattern.search(line)
+            if match:
+                indexes.append(match.group(1) or 'primary key')
+    return full_scans, indexes
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on the hot queries from tracker.views and report whether indexes are used'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username whose data is used for the query parameters (default: first user)')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the full plan for every query')
+        parser.add_argument('--fail-on-scan', action='store_true', help='Exit with an error if any query does a full table scan')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"User {options['user']!r} does not exist")
+        else:
+            user = User.objects.order_by('pk').first()
+            if user is None:
+                raise CommandError('No users in the database; create one or load sample data first')
+        # An unsaved stand-in keeps this command read-only for users without a timetable
+        timetable = Timetable.objects.filter(user=user).first() or Timetable(pk=0, user=user)
+
+        self.stdout.write(f'Database: {connection.vendor}, user: {user.username}')
+        scanned = []
+        for label, queryset in hot_queries(user, timetable):
+            plan = queryset.explain()
+            full_scans, indexes = analyse_plan(plan)
+            if full_scans:
+                scanned.append(label)
+                status = self.style.WARNING(f"FULL SCAN of {', '.join(full_scans)}")
+            else:
+                status = self.style.SUCCESS('index')
+            used = f" ({', '.join(indexes)})" if indexes else ''
+            self.stdout.write(f'{label:<20} {status}{used}')
+            if options['verbose_plans']:
+                self.stdout.write(plan)
+
+        if scanned:
+            message = f"{len(scanned)} hot queries read a table without an index: {', '.join(scanned)}"
+            if options['fail_on_scan']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('All hot queries use an index'))
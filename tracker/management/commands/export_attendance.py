@@ -0,0 +1,36 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from tracker.export import CHUNK_SIZE, FORMATS, iter_export
+from tracker.models import AttendanceRecord
+
+class Command(BaseCommand):
+    help = 'Stream attendance history as CSV or NDJSON to stdout or a file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--user', help='Only export the records of this username')
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows fetched from the database at a time')
+
+    def handle(self, *args, **options):
+        records = AttendanceRecord.objects.all()
+        if options['user']:
+            records = records.filter(course__user__username=options['user'])
+
+        output = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        started = time.monotonic()
+        lines = 0
+        try:
+            for line in iter_export(records, options['format'], options['chunk_size']):
+                output.write(line)
+                lines += 1
+        finally:
+            if options['output']:
+                output.close()
+
+        if options['output']:
+            rows = lines - 1 if options['format'] == 'csv' else lines
+            elapsed = time.monotonic() - started
+            self.stdout.write(self.style.SUCCESS(f"Exported {rows} records to {options['output']} in {elapsed:.1f}s"))
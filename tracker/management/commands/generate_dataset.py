@@ -0,0 +1,53 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from tracker.datagen import BATCH_SIZE, PROFILES, delete_dataset, generate_dataset
+
+class Command(BaseCommand):
+    help = 'Generate a reproducible synthetic dataset (users, courses, lectures, attendance, slots) with bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=sorted(PROFILES), help='Preset sizes; explicit options override them')
+        parser.add_argument('--users', type=int)
+        parser.add_argument('--courses-per-user', type=int)
+        parser.add_argument('--schedules-per-course', type=int)
+        parser.add_argument('--semesters', type=int, help='Weeks of attendance history, in 16-week semesters')
+        parser.add_argument('--slots-per-user', type=int, default=3, help='Manual slots in the current week')
+        parser.add_argument('--recurring-per-user', type=int, default=1)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='bench', help='Usernames are <prefix>_<n>')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--flush', action='store_true', help='Delete users from an earlier run with the same prefix first')
+
+    def handle(self, *args, **options):
+        params = dict(PROFILES[options['profile'] or 'small'])
+        for key in ('users', 'courses_per_user', 'schedules_per_course', 'semesters'):
+            if options[key] is not None:
+                params[key] = options[key]
+
+        prefix = options['prefix']
+        if options['flush']:
+            started = time.monotonic()
+            deleted = delete_dataset(prefix, options['batch_size'])
+            self.stdout.write(f'Deleted {deleted} {prefix}_* users in {time.monotonic() - started:.1f}s')
+        elif User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f'Users named {prefix}_* already exist; use --flush or another --prefix')
+
+        started = time.monotonic()
+        created = {}
+        for created in generate_dataset(
+            slots_per_user=options['slots_per_user'],
+            recurring_per_user=options['recurring_per_user'],
+            seed=options['seed'],
+            prefix=prefix,
+            batch_size=options['batch_size'],
+            **params
+        ):
+            elapsed = time.monotonic() - started
+            rows = sum(created.values())
+            self.stdout.write(f"{created['users']}/{params['users']} users, {rows} rows ({rows / elapsed:,.0f} rows/s)...")
+
+        elapsed = time.monotonic() - started
+        summary = ', '.join(f'{count} {name}' for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(f'Created {summary} in {elapsed:.1f}s (password: bench-pass)'))
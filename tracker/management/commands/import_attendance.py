@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from tracker.attendance import BULK_BATCH_SIZE
+from tracker.importer import CHUNK_SIZE, AttendanceImporter, iter_chunks, read_rows
+
+FORMAT_BY_EXTENSION = {'.csv': 'csv', '.json': 'json', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+class DryRunRollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = ('Import courses, lecture schedules and attendance records from CSV, NDJSON or JSON '
+            '(the columns of export_attendance)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or '-' for stdin")
+        parser.add_argument('--format', choices=['csv', 'ndjson', 'json'], help='Input format (default: from the file extension)')
+        parser.add_argument('--user', default='', help='Username for rows without a username column')
+        parser.add_argument('--create-users', action='store_true', help='Create unknown users (without a usable password)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows validated and written per transaction')
+        parser.add_argument('--batch-size', type=int, default=BULK_BATCH_SIZE, help='Rows per INSERT statement')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and count everything, then roll back')
+
+    def handle(self, *args, **options):
+        input_format = options['format']
+        if input_format is None:
+            input_format = FORMAT_BY_EXTENSION.get(os.path.splitext(options['path'])[1].lower())
+            if input_format is None:
+                raise CommandError('Cannot tell the input format from the file name; pass --format')
+
+        importer = AttendanceImporter(
+            create_users=options['create_users'],
+            default_username=options['user'],
+            batch_size=options['batch_size'],
+        )
+        stream = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8')
+        started = time.monotonic()
+        try:
+            if options['dry_run']:
+                # One outer transaction (chunks become savepoints) that is always rolled back
+                try:
+                    with transaction.atomic():
+                        self.run(importer, stream, input_format, options['chunk_size'], started)
+                        raise DryRunRollback
+                except DryRunRollback:
+                    pass
+            else:
+                self.run(importer, stream, input_format, options['chunk_size'], started)
+        except ValueError as e:
+            raise CommandError(f'Could not read input: {e}')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.monotonic() - started
+        stats = importer.stats
+        for line, message in importer.errors[:20]:
+            self.stderr.write(f'line {line}: {message}')
+        if stats['invalid'] > 20:
+            self.stderr.write(f"... and {stats['invalid'] - 20} more invalid rows")
+
+        summary = ', '.join(f'{key} {stats[key]}' for key in (
+            'users_created', 'courses_created', 'schedules_written',
+            'records_created', 'records_updated', 'records_unchanged', 'invalid',
+        ))
+        rate = stats['rows'] / elapsed if elapsed else 0
+        prefix = 'Dry run (rolled back): ' if options['dry_run'] else ''
+        style = self.style.WARNING if stats['invalid'] else self.style.SUCCESS
+        self.stdout.write(style(f"{prefix}{stats['rows']} rows in {elapsed:.1f}s ({rate:,.0f} rows/s): {summary}"))
+
+    def run(self, importer, stream, input_format, chunk_size, started):
+        for chunk in iter_chunks(read_rows(stream, input_format), chunk_size):
+            importer.import_chunk(chunk)
+            elapsed = time.monotonic() - started
+            rows = importer.stats['rows']
+            self.stdout.write(f'{rows} rows ({rows / elapsed if elapsed else 0:,.0f} rows/s)...')
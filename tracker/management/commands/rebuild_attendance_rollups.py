@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from tracker.models import Course
+from tracker.rollups import BATCH_SIZE, rebuild_rollups
+
+class Command(BaseCommand):
+    help = 'Recompute attendance rollups from AttendanceRecord rows in batches of courses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Courses per batch/transaction')
+        parser.add_argument('--user', help='Only rebuild the courses of this username')
+
+    def handle(self, *args, **options):
+        courses = Course.objects.all()
+        if options['user']:
+            courses = courses.filter(user__username=options['user'])
+
+        started = time.monotonic()
+        processed = 0
+        for count in rebuild_rollups(options['batch_size'], courses):
+            processed += count
+            self.stdout.write(f'{processed} courses rebuilt...')
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rollups for {processed} courses in {elapsed:.1f}s'))
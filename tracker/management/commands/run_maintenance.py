@@ -0,0 +1,64 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from tracker.maintenance import BATCH_SIZE, maintenance_tasks, run_task
+
+class Command(BaseCommand):
+    help = ('Purge of past slots, expired sessions and old sync tombstones, in batches. '
+            'Run it from cron (e.g. hourly) or keep it running with --loop.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows per DELETE transaction')
+        parser.add_argument('--before', help='Purge data dated before YYYY-MM-DD (default: this Monday)')
+        parser.add_argument('--only', action='append', metavar='TASK', help='Run only this task (repeatable)')
+        parser.add_argument('--loop', action='store_true', help='Keep running, one pass every --interval seconds')
+        parser.add_argument('--interval', type=int, default=3600, help='Seconds between passes with --loop')
+
+    def handle(self, *args, **options):
+        before = None
+        if options['before']:
+            try:
+                before = datetime.strptime(options['before'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError(f"Invalid --before date: {options['before']!r}")
+
+        if not options['loop']:
+            if not self.run_pass(before, options):
+                raise CommandError('Maintenance finished with errors')
+            return
+
+        self.stdout.write(f"Running maintenance every {options['interval']}s (Ctrl+C to stop)")
+        try:
+            while True:
+                # A long-lived process must not hold on to dropped connections
+                close_old_connections()
+                self.run_pass(before, options)
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped')
+
+    def run_pass(self, before, options):
+        """Run every task once; a failing task is reported and the others still run"""
+        tasks = maintenance_tasks(before, options['batch_size'])
+        if options['only']:
+            known = {name for name, batches in tasks}
+            unknown = set(options['only']) - known
+            if unknown:
+                raise CommandError(f"Unknown task(s) {sorted(unknown)}; choose from {sorted(known)}")
+            tasks = [(name, batches) for name, batches in tasks if name in options['only']]
+
+        ok = True
+        for name, batches in tasks:
+            progress = lambda run: self.stdout.write(f'{run.task}: {run.rows} rows after {run.batches} batches...')
+            try:
+                run = run_task(name, batches, progress)
+            except Exception as e:
+                ok = False
+                self.stderr.write(self.style.ERROR(f'{name} failed: {e}'))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: {run.rows} rows in {run.batches} batches, {run.duration_seconds:.2f}s'
+            ))
+        return ok
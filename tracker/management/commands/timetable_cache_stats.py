@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from tracker.cache import get_cache_stats, reset_cache_stats
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counters for the weekly timetable cache (read from the configured cache backend)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them')
+
+    def handle(self, *args, **options):
+        stats = get_cache_stats()
+        for name in ('hits', 'misses', 'invalidations', 'hit_ratio'):
+            self.stdout.write(f'{name}: {stats[name]}')
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
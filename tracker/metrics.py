@@ -0,0 +1,175 @@
+"""Per-view request metrics: wall time, database queries and N+1 detection.
+
+``RequestMetricsMiddleware`` (``tracker.middleware``) wraps each request
+in a ``QueryRecorder``, a ``connection.execute_wrapper`` (installed on the
+request's database thread under ASGI) that counts the queries a request
+runs, the time spent in them and how often each SQL shape repeats. The
+totals are folded into the process-wide ``registry`` and rendered in the
+Prometheus text format by ``/internal/metrics``.
+
+Metrics live in the memory of each worker process and are labelled with
+its pid, so with several gunicorn workers every scrape sees one worker
+and the series stay separate. A restarted worker starts again from zero
+under a new pid, so aggregate across workers with ``rate()``/``increase()``
+per series before summing; a plain ``sum()`` of the raw counters drops
+whatever the old process had counted.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+N_PLUS_ONE_THRESHOLD = 10
+
+# "IN (%s, %s, %s)" and VALUES lists vary in length with their arguments
+_REPEATED_PARAMS = re.compile(r'%s(?:\s*,\s*%s)+')
+_REPEATED_ROWS = re.compile(r'\(%s\)(?:\s*,\s*\(%s\))+')
+
+
+def sql_shape(sql):
+    """SQL with variable-length parameter lists collapsed, so repeats compare equal"""
+    return _REPEATED_ROWS.sub('(%s)', _REPEATED_PARAMS.sub('%s', sql))
+
+
+class QueryRecorder:
+    """``execute_wrapper`` that counts and times the queries of one request
+
+    Only the raw SQL strings are counted while the request runs; shapes are
+    worked out once at the end, for the strings that were seen.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    def repeated_shapes(self, threshold):
+        """``{shape: count}`` for SQL shapes run more than ``threshold`` times"""
+        if self.count <= threshold:
+            return {}
+        shapes = Counter()
+        for sql, count in self.statements.items():
+            shapes[sql_shape(sql)] += count
+        return {shape: count for shape, count in shapes.items() if count > threshold}
+
+
+class ViewStats:
+    __slots__ = ('requests', 'errors', 'duration', 'buckets', 'queries', 'max_queries', 'db_duration', 'n_plus_one')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.duration = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.queries = 0
+        self.max_queries = 0
+        self.db_duration = 0.0
+        self.n_plus_one = 0
+
+
+class MetricsRegistry:
+    """Process-wide totals per view, safe to update from several threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.started = time.time()
+
+    def record(self, view, duration, queries, db_duration, n_plus_one=0, error=False):
+        with self.lock:
+            stats = self.views.get(view)
+            if stats is None:
+                stats = self.views[view] = ViewStats()
+            stats.requests += 1
+            stats.errors += error
+            stats.duration += duration
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    stats.buckets[index] += 1
+                    break
+            stats.queries += queries
+            stats.max_queries = max(stats.max_queries, queries)
+            stats.db_duration += db_duration
+            stats.n_plus_one += n_plus_one
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+
+    def snapshot(self):
+        with self.lock:
+            return {view: _copy(stats) for view, stats in self.views.items()}
+
+
+def _copy(stats):
+    copy = ViewStats()
+    for name in ViewStats.__slots__:
+        value = getattr(stats, name)
+        setattr(copy, name, list(value) if isinstance(value, list) else value)
+    return copy
+
+
+registry = MetricsRegistry()
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def render_prometheus(snapshot=None):
+    """Prometheus text exposition (format 0.0.4) of the registry"""
+    if snapshot is None:
+        snapshot = registry.snapshot()
+    worker = str(os.getpid())
+    lines = []
+
+    def family(name, kind, help_text, samples):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for suffix, labels, value in samples:
+            label_text = ','.join(f'{key}="{_escape(str(val))}"' for key, val in labels)
+            lines.append(f'{name}{suffix}{{{label_text}}} {value}')
+
+    views = sorted(snapshot.items())
+    family('tracker_view_requests_total', 'counter', 'Requests handled, by view.',
+           [('', (('view', view), ('worker', worker)), stats.requests) for view, stats in views])
+    family('tracker_view_errors_total', 'counter', 'Requests that raised or returned a 5xx, by view.',
+           [('', (('view', view), ('worker', worker)), stats.errors) for view, stats in views])
+
+    samples = []
+    for view, stats in views:
+        cumulative = 0
+        for bound, count in zip(DURATION_BUCKETS, stats.buckets):
+            cumulative += count
+            samples.append(('_bucket', (('view', view), ('worker', worker), ('le', repr(bound))), cumulative))
+        samples.append(('_bucket', (('view', view), ('worker', worker), ('le', '+Inf')), stats.requests))
+        samples.append(('_sum', (('view', view), ('worker', worker)), f'{stats.duration:.6f}'))
+        samples.append(('_count', (('view', view), ('worker', worker)), stats.requests))
+    family('tracker_view_duration_seconds', 'histogram', 'Wall time spent in the view and middleware below it.', samples)
+
+    family('tracker_view_db_queries_total', 'counter', 'Database queries run, by view.',
+           [('', (('view', view), ('worker', worker)), stats.queries) for view, stats in views])
+    family('tracker_view_db_queries_max', 'gauge', 'Most queries run by a single request, by view.',
+           [('', (('view', view), ('worker', worker)), stats.max_queries) for view, stats in views])
+    family('tracker_view_db_duration_seconds_total', 'counter', 'Time spent executing database queries, by view.',
+           [('', (('view', view), ('worker', worker)), f'{stats.db_duration:.6f}') for view, stats in views])
+    family('tracker_view_n_plus_one_total', 'counter',
+           'Requests that repeated one SQL shape more than the N+1 threshold, by view.',
+           [('', (('view', view), ('worker', worker)), stats.n_plus_one) for view, stats in views])
+    family('tracker_metrics_start_time_seconds', 'gauge', 'When this worker started collecting metrics.',
+           [('', (('worker', worker),), f'{registry.started:.3f}')])
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,135 @@
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection, connections
+
+from .metrics import N_PLUS_ONE_THRESHOLD, QueryRecorder, logger, registry
+
+# Session key holding when the session (and so its expiry) was last saved
+SESSION_REFRESHED_KEY = '_refreshed_at'
+
+# Recorder of the async request being served; sync_to_async copies it to the thread running the query
+_async_recorder = ContextVar('async_query_recorder', default=None)
+
+
+def _record_async_query(execute, sql, params, many, context):
+    recorder = _async_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def _install_async_recorder():
+    """Pass the queries of this thread's connections to ``_record_async_query``"""
+    for conn in connections.all():
+        # First in line, so execute_wrapper() blocks around it still pop their own wrapper
+        if _record_async_query not in conn.execute_wrappers:
+            conn.execute_wrappers.insert(0, _record_async_query)
+
+
+class RequestMetricsMiddleware:
+    """Record wall time, query count and query time per view (see ``tracker.metrics``)
+
+    Opt-in: unless ``REQUEST_METRICS`` is on, Django drops the middleware at
+    startup and requests pay nothing for it. Works under WSGI and ASGI.
+
+    Connections are per thread, and under ASGI the queries run on the
+    request's ``sync_to_async`` thread rather than the event loop's, so
+    wrapping the loop's connection would see none of them. Async requests
+    instead set their recorder in a context variable, which
+    ``sync_to_async`` carries over, and first install
+    ``_record_async_query`` on the connections of the request's thread,
+    where sync views, sync middleware and the async ORM all run their
+    queries. Queries sent to other threads (``thread_sensitive=False``)
+    are not counted.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'REQUEST_METRICS_N_PLUS_ONE', N_PLUS_ONE_THRESHOLD)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        # A streaming response's body (and its queries) is produced after this point
+        self.record(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        await sync_to_async(_install_async_recorder)()
+        token = _async_recorder.set(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _async_recorder.reset(token)
+        self.record(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, recorder, duration):
+        match = request.resolver_match
+        view = match.view_name if match is not None else '<unresolved>'
+        repeated = recorder.repeated_shapes(self.threshold)
+        for shape, count in repeated.items():
+            logger.warning('Possible N+1 in %s: query ran %d times: %s', view, count, shape[:500])
+        registry.record(
+            view, duration, recorder.count, recorder.duration,
+            n_plus_one=1 if repeated else 0, error=response.status_code >= 500,
+        )
+
+
+class SlidingSessionMiddleware:
+    """Keep session expiry sliding while saving the session about once per ``SESSION_REFRESH_INTERVAL``
+
+    ``SESSION_SAVE_EVERY_REQUEST`` writes the session row on every request
+    just to push its expiry forward. Instead, a session that was used but
+    not otherwise changed is only marked modified when it was last saved at
+    least ``SESSION_REFRESH_INTERVAL`` seconds ago; ``SessionMiddleware``
+    then saves it and re-sends the cookie with the new expiry. Sessions
+    therefore expire between ``SESSION_COOKIE_AGE`` minus the interval and
+    ``SESSION_COOKIE_AGE`` after the last request. Must come after
+    ``SessionMiddleware``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.interval = getattr(settings, 'SESSION_REFRESH_INTERVAL', 0)
+        if settings.SESSION_SAVE_EVERY_REQUEST or self.interval <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.slide(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        # Only an already loaded session is touched, so this never queries
+        return self.slide(request, await self.get_response(request))
+
+    def slide(self, request, response):
+        session = getattr(request, 'session', None)
+        # Sessions that were never loaded, are saved anyway or are gone are left alone
+        if session is None or not session.accessed or session.modified or session.session_key is None:
+            return response
+        now = int(time.time())
+        if now - session.get(SESSION_REFRESHED_KEY, 0) >= self.interval:
+            session[SESSION_REFRESHED_KEY] = now
+        return response
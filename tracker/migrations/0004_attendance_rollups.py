@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    """Build the rollups for records that already exist"""
+    AttendanceRecord = apps.get_model('tracker', 'AttendanceRecord')
+    CourseAttendanceRollup = apps.get_model('tracker', 'CourseAttendanceRollup')
+    MonthlyAttendanceRollup = apps.get_model('tracker', 'MonthlyAttendanceRollup')
+
+    monthly = (
+        AttendanceRecord.objects.annotate(month=TruncMonth('date'))
+        .order_by()
+        .values('course_id', 'month')
+        .annotate(total=Count('id'), attended=Count('id', filter=Q(attended=True)))
+    )
+    course_totals = {}
+    rows = []
+    for row in monthly.iterator(chunk_size=2000):
+        rows.append(MonthlyAttendanceRollup(
+            course_id=row['course_id'], month=row['month'],
+            total_records=row['total'], attended_records=row['attended'],
+        ))
+        total, attended = course_totals.get(row['course_id'], (0, 0))
+        course_totals[row['course_id']] = (total + row['total'], attended + row['attended'])
+    MonthlyAttendanceRollup.objects.bulk_create(rows, batch_size=500)
+    CourseAttendanceRollup.objects.bulk_create(
+        [
+            CourseAttendanceRollup(course_id=course_id, total_records=total, attended_records=attended)
+            for course_id, (total, attended) in course_totals.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0003_course_is_regular_timetable_last_refreshed_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseAttendanceRollup',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='tracker.course')),
+                ('total_records', models.IntegerField(default=0)),
+                ('attended_records', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MonthlyAttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('total_records', models.IntegerField(default=0)),
+                ('attended_records', models.IntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='tracker.course')),
+            ],
+            options={
+                'ordering': ['course', 'month'],
+                'unique_together': {('course', 'month')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0005_course_user_regular_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('slot_type', models.CharField(choices=[('study', 'Study Session'), ('meeting', 'Meeting'), ('gym', 'Gym/Exercise'), ('personal', 'Personal Time'), ('other', 'Other')], default='other', max_length=20)),
+                ('day_of_week', models.CharField(choices=[('monday', 'Monday'), ('tuesday', 'Tuesday'), ('wednesday', 'Wednesday'), ('thursday', 'Thursday'), ('friday', 'Friday'), ('saturday', 'Saturday'), ('sunday', 'Sunday')], editable=False, max_length=10)),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('interval_weeks', models.PositiveSmallIntegerField(choices=[(1, 'Every week'), (2, 'Every other week')], default=1)),
+                ('starts_on', models.DateField(help_text='Date of the first occurrence')),
+                ('ends_on', models.DateField(blank=True, help_text='No occurrences after this date (empty repeats indefinitely)', null=True)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['starts_on', 'start_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RecurringSlotException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timetableslot',
+            index=models.Index(fields=['date'], name='timetableslot_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='recurringslotexception',
+            name='series',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exceptions', to='tracker.recurringslot'),
+        ),
+        migrations.AddField(
+            model_name='recurringslot',
+            name='timetable',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_slots', to='tracker.timetable'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='recurringslotexception',
+            unique_together={('series', 'date')},
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0007_maintenance_runs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timetable',
+            name='semester_end',
+            field=models.DateField(blank=True, help_text='Last day of lectures this term, for forecasts', null=True),
+        ),
+        migrations.CreateModel(
+            name='Holiday',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('timetable', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holidays', to='tracker.timetable')),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('timetable', 'date')},
+            },
+        ),
+    ]
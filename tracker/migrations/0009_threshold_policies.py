@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:45
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tracker', '0008_semester_forecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThresholdPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('threshold', models.PositiveSmallIntegerField(help_text='Required attendance percentage', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(99)])),
+                ('warning_margin', models.PositiveSmallIntegerField(default=5, help_text='Points above the threshold where attending is still recommended', validators=[django.core.validators.MaxValueValidator(99)])),
+                ('label', models.CharField(blank=True, help_text='e.g. Lab or Seminar', max_length=100)),
+                ('course', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='threshold_policy', to='tracker.course')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='threshold_policies', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='thresholdpolicy',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('course__isnull', True), ('user__isnull', False)), models.Q(('course__isnull', False), ('user__isnull', True)), _connector='OR'), name='thresholdpolicy_user_or_course'),
+        ),
+        migrations.AddConstraint(
+            model_name='thresholdpolicy',
+            constraint=models.CheckConstraint(check=models.Q(('threshold__gte', 1), ('threshold__lte', 99)), name='thresholdpolicy_threshold_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='thresholdpolicy',
+            constraint=models.UniqueConstraint(fields=('user',), name='thresholdpolicy_user_unique'),
+        ),
+    ]
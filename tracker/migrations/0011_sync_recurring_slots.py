@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0010_delta_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recurringslot',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='synctombstone',
+            name='kind',
+            field=models.CharField(choices=[('course', 'Course'), ('schedule', 'Lecture schedule'), ('slot', 'Manual slot'), ('recurring', 'Recurring slot'), ('record', 'Attendance record')], max_length=10),
+        ),
+    ]
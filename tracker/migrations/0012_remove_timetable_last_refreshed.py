@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:28
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0011_sync_recurring_slots'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='timetable',
+            name='last_refreshed',
+        ),
+    ]
@@ -1,9 +1,49 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import ExpressionWrapper, F, FilteredRelation, Q, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from datetime import datetime, timedelta, date
-import math
+
+from .cache import (
+    get_cached_thresholds, get_cached_weekly_schedule, set_cached_thresholds, set_cached_weekly_schedule
+)
+from .occurrences import iter_series_dates, next_lectures
+
+class CourseQuerySet(models.QuerySet):
+    def with_thresholds(self):
+        """Annotate each course's attendance policy in SQL
+
+        ``policy_threshold``/``policy_warning_margin`` come from the course's
+        own policy, else its owner's, else the institution default;
+        ``own_threshold`` is the course's own policy only. ``policy_below``
+        uses the same integer comparison as ``Course.is_below_threshold``.
+        """
+        default_threshold, default_margin = ThresholdPolicy.institution_default()
+        return self.alias(
+            user_policy=FilteredRelation(
+                'user__threshold_policies', condition=Q(user__threshold_policies__course__isnull=True)
+            ),
+        ).annotate(
+            own_threshold=F('threshold_policy__threshold'),
+            policy_threshold=Coalesce('threshold_policy__threshold', 'user_policy__threshold', Value(default_threshold)),
+            policy_warning_margin=Coalesce(
+                'threshold_policy__warning_margin', 'user_policy__warning_margin', Value(default_margin)
+            ),
+        ).alias(
+            attended_x100=F('attended_lectures') * 100,
+        ).annotate(
+            policy_below=ExpressionWrapper(
+                Q(total_lectures=0) | Q(attended_x100__lt=F('policy_threshold') * F('total_lectures')),
+                output_field=models.BooleanField(),
+            ),
+        )
+
+    def below_threshold(self):
+        """Courses under their own threshold, filtered by the database"""
+        return self.with_thresholds().filter(policy_below=True)
 
 class Course(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -14,8 +54,14 @@ class Course(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CourseQuerySet.as_manager()
+
     class Meta:
         unique_together = ['user', 'name']
+        indexes = [
+            # Scheduled-course lookups (dashboard, timetable, suggestions) filter on user + is_regular
+            models.Index(fields=['user'], condition=models.Q(is_regular=True), name='course_user_regular_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.user.username}"
@@ -26,57 +72,140 @@ class Course(models.Model):
             return 0
         return round((self.attended_lectures / self.total_lectures) * 100, 2)
 
+    def _resolve_policy(self):
+        # Annotated by with_thresholds(), otherwise resolved once per instance
+        if 'policy_threshold' not in self.__dict__:
+            self.policy_threshold, self.policy_warning_margin = ThresholdPolicy.resolve(self.user_id, self.pk)
+
+    @property
+    def threshold(self):
+        """Required attendance percentage from the course's policy (see ThresholdPolicy)"""
+        self._resolve_policy()
+        return self.policy_threshold
+
+    @property
+    def warning_margin(self):
+        """Points above the threshold where attending is still recommended"""
+        self._resolve_policy()
+        return self.policy_warning_margin
+
     @property
     def is_below_threshold(self):
-        return self.attendance_percentage < 75
+        # Integer comparison, so it always agrees with with_thresholds()
+        return self.total_lectures == 0 or 100 * self.attended_lectures < self.threshold * self.total_lectures
 
-    def lectures_needed_for_75_percent(self):
-        """Calculate how many lectures need to be attended to reach 75%"""
-        if self.attendance_percentage >= 75:
+    def lectures_needed(self):
+        """Calculate how many lectures need to be attended in a row to reach the threshold"""
+        if not self.is_below_threshold:
             return 0
-        
-        current_total = self.total_lectures
-        current_attended = self.attended_lectures
-        
-        if current_total == 0:
+        if self.total_lectures == 0:
             return 1
-            
-        required = math.ceil((0.75 * current_total - current_attended) / 0.25)
-        return max(0, required)
+        return -(-(self.threshold * self.total_lectures - 100 * self.attended_lectures) // (100 - self.threshold))
 
     def lectures_can_skip(self):
-        """Calculate how many lectures can be skipped while staying above 75%"""
-        if self.total_lectures == 0:
+        """Calculate how many lectures can be skipped while staying at or above the threshold"""
+        if self.is_below_threshold:
             return 0
-            
-        max_total = self.attended_lectures / 0.75
-        can_skip = int(max_total - self.total_lectures)
-        return max(0, can_skip)
+        return (100 * self.attended_lectures - self.threshold * self.total_lectures) // self.threshold
+
+    def get_lecture_suggestion(self):
+        """Attend/skip suggestion for the course's next lecture"""
+        if self.is_below_threshold:
+            needed = self.lectures_needed()
+            return {
+                'type': 'critical',
+                'message': f'Must attend! Need {needed} more lectures to reach {self.threshold}%',
+                'priority': 'high',
+                'action': 'attend'
+            }
+        elif self.attendance_percentage < self.threshold + self.warning_margin:
+            return {
+                'type': 'warning',
+                'message': f'Recommended to attend (currently {self.attendance_percentage}%)',
+                'priority': 'medium',
+                'action': 'attend'
+            }
+        else:
+            can_skip = self.lectures_can_skip()
+            if can_skip > 0:
+                return {
+                    'type': 'safe',
+                    'message': f'Can skip if needed (can skip {can_skip} more)',
+                    'priority': 'low',
+                    'action': 'optional'
+                }
+            else:
+                return {
+                    'type': 'caution',
+                    'message': 'Better to attend to maintain buffer',
+                    'priority': 'medium',
+                    'action': 'attend'
+                }
 
     def get_next_lectures(self, days=7):
         """Get upcoming lectures for this course"""
         today = timezone.now().date()
-        end_date = today + timedelta(days=days)
-        
-        upcoming = []
-        schedules = self.schedules.all()
-        
-        current_date = today
-        while current_date <= end_date:
-            day_name = current_date.strftime('%A').lower()
-            
-            for schedule in schedules:
-                if schedule.day_of_week == day_name:
-                    upcoming.append({
-                        'date': current_date,
-                        'schedule': schedule,
-                        'is_today': current_date == today,
-                        'days_from_now': (current_date - today).days
-                    })
-            
-            current_date += timedelta(days=1)
-        
-        return sorted(upcoming, key=lambda x: x['date'])
+        return next_lectures(self.schedules.all(), today, days)
+
+class ThresholdPolicy(models.Model):
+    """Required attendance for all of a user's courses, or for one course
+
+    The most specific policy applies: the course's own, then its owner's.
+    Without either the institution default applies, which is not a policy
+    row but the ATTENDANCE_THRESHOLD/ATTENDANCE_WARNING_MARGIN settings.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='threshold_policies')
+    course = models.OneToOneField(
+        Course, on_delete=models.CASCADE, null=True, blank=True, related_name='threshold_policy'
+    )
+    threshold = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(99)], help_text="Required attendance percentage"
+    )
+    warning_margin = models.PositiveSmallIntegerField(
+        default=5, validators=[MaxValueValidator(99)],
+        help_text="Points above the threshold where attending is still recommended"
+    )
+    label = models.CharField(max_length=100, blank=True, help_text="e.g. Lab or Seminar")
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=Q(user__isnull=False, course__isnull=True) | Q(user__isnull=True, course__isnull=False),
+                name='thresholdpolicy_user_or_course',
+            ),
+            models.CheckConstraint(check=Q(threshold__gte=1, threshold__lte=99), name='thresholdpolicy_threshold_range'),
+            # Course policies have no user, and NULLs never collide
+            models.UniqueConstraint(fields=['user'], name='thresholdpolicy_user_unique'),
+        ]
+
+    def __str__(self):
+        scope = self.course or self.user
+        return f"{self.threshold}% for {scope}"
+
+    @staticmethod
+    def institution_default():
+        """(threshold, warning margin) from settings, for courses with no policy of their own or their owner's"""
+        return settings.ATTENDANCE_THRESHOLD, settings.ATTENDANCE_WARNING_MARGIN
+
+    @classmethod
+    def for_user(cls, user_id):
+        """{course id or None (the user's own policy): (threshold, warning margin)}, cached per user"""
+        policies = get_cached_thresholds(user_id)
+        if policies is None:
+            policies = {
+                course_id: (threshold, margin)
+                for course_id, threshold, margin in cls.objects.filter(
+                    Q(user_id=user_id) | Q(course__user_id=user_id)
+                ).values_list('course_id', 'threshold', 'warning_margin')
+            }
+            set_cached_thresholds(user_id, policies)
+        return policies
+
+    @classmethod
+    def resolve(cls, user_id, course_id):
+        """(threshold, warning margin) that applies to a course"""
+        policies = cls.for_user(user_id)
+        return policies.get(course_id) or policies.get(None) or cls.institution_default()
 
 class LectureSchedule(models.Model):
     DAYS_OF_WEEK = [
@@ -88,6 +217,8 @@ class LectureSchedule(models.Model):
         ('saturday', 'Saturday'),
         ('sunday', 'Sunday'),
     ]
+    # Map day names to numbers (Monday = 0, Sunday = 6)
+    DAY_INDEX = {code: index for index, (code, name) in enumerate(DAYS_OF_WEEK)}
     
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='schedules')
     day_of_week = models.CharField(max_length=10, choices=DAYS_OF_WEEK)
@@ -95,6 +226,7 @@ class LectureSchedule(models.Model):
     end_time = models.TimeField()
     room = models.CharField(max_length=100, blank=True, help_text="Classroom or location")
     professor = models.CharField(max_length=100, blank=True, help_text="Professor name")
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ['course', 'day_of_week', 'start_time']
@@ -110,18 +242,17 @@ class LectureSchedule(models.Model):
         end_datetime = datetime.combine(date.today(), self.end_time)
         return int((end_datetime - start_datetime).total_seconds() / 60)
 
+    @property
+    def weekday(self):
+        """Day of week as an integer (Monday = 0, Sunday = 6)"""
+        return self.DAY_INDEX[self.day_of_week]
+
     def get_next_occurrence(self):
         """Get the next date this lecture will occur"""
         today = timezone.now().date()
         days_ahead = 0
         
-        # Map day names to numbers (Monday = 0, Sunday = 6)
-        day_mapping = {
-            'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
-            'friday': 4, 'saturday': 5, 'sunday': 6
-        }
-        
-        target_day = day_mapping[self.day_of_week]
+        target_day = self.weekday
         current_day = today.weekday()
         
         if target_day > current_day:
@@ -144,61 +275,141 @@ class AttendanceRecord(models.Model):
     attended = models.BooleanField(default=False)
     notes = models.TextField(blank=True)
     schedule = models.ForeignKey(LectureSchedule, on_delete=models.SET_NULL, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ['course', 'date']
         ordering = ['-date']
+        indexes = [
+            # Delta sync asks for a user's records changed since a cursor
+            models.Index(fields=['course', 'updated_at'], name='attendancerecord_sync_idx'),
+        ]
 
     def __str__(self):
         status = "Present" if self.attended else "Absent"
         return f"{self.course.name} - {self.date} - {status}"
 
+class CourseAttendanceRollup(models.Model):
+    """Per-course totals of AttendanceRecord rows, maintained incrementally (see tracker.rollups)"""
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='rollup')
+    total_records = models.IntegerField(default=0)
+    attended_records = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.course_id}: {self.attended_records}/{self.total_records}"
+
+    @property
+    def attendance_percentage(self):
+        if self.total_records == 0:
+            return 0
+        return round((self.attended_records / self.total_records) * 100, 2)
+
+class MonthlyAttendanceRollup(models.Model):
+    """Per-course, per-month totals of AttendanceRecord rows"""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='monthly_rollups')
+    month = models.DateField(help_text="First day of the month")
+    total_records = models.IntegerField(default=0)
+    attended_records = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['course', 'month']
+        ordering = ['course', 'month']
+
+    def __str__(self):
+        return f"{self.course_id} {self.month:%Y-%m}: {self.attended_records}/{self.total_records}"
+
+    @property
+    def attendance_percentage(self):
+        if self.total_records == 0:
+            return 0
+        return round((self.attended_records / self.total_records) * 100, 2)
+
 class Timetable(models.Model):
     """Weekly timetable view for a user"""
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=100, default="My Timetable")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    last_refreshed = models.DateTimeField(default=timezone.now)
+    semester_end = models.DateField(null=True, blank=True, help_text="Last day of lectures this term, for forecasts")
     
     def __str__(self):
         return f"{self.user.username}'s {self.name}"
     
-    def get_weekly_schedule(self):
-        """Get organized weekly schedule including both regular courses and manual slots"""
+    def get_weekly_schedule(self, week_start=None, courses=None):
+        """Get organized weekly schedule including both regular courses and manual slots
+
+        The week is served from the per-user timetable cache when possible.
+        ``courses`` may be the user's already loaded regular courses; they are
+        attached to lecture entries so attendance figures are always current.
+        """
+        if week_start is None:
+            week_start = self.get_current_week_start()
+        
+        schedule = self.get_week_entries(week_start)
+        
+        if courses is None:
+            courses = Course.objects.filter(user_id=self.user_id, is_regular=True).with_thresholds()
+        courses_by_id = {course.id: course for course in courses}
+        
+        for day, items in schedule.items():
+            lectures_missing_course = False
+            for entry in items:
+                if entry['type'] != 'lecture':
+                    continue
+                course = courses_by_id.get(entry['course_id'])
+                if course is None:
+                    lectures_missing_course = True
+                    continue
+                entry['item'].course = course
+                entry['course'] = course
+                entry['title'] = course.name
+            if lectures_missing_course:
+                schedule[day] = [entry for entry in items if entry['type'] != 'lecture' or 'course' in entry]
+        
+        return schedule
+    
+    def get_week_entries(self, week_start):
+        """Cached week dict (day code -> entries by start time); lectures carry ``course_id`` only"""
+        schedule = get_cached_weekly_schedule(self.user_id, week_start)
+        if schedule is None:
+            schedule = self._build_weekly_schedule(week_start)
+            set_cached_weekly_schedule(self.user_id, week_start, schedule)
+        return schedule
+    
+    def _build_weekly_schedule(self, week_start):
+        """Week dict as stored in the cache (lectures carry ``course_id`` only)"""
         schedule = {day[0]: [] for day in LectureSchedule.DAYS_OF_WEEK}
         
         # Add regular course lectures
         lectures = LectureSchedule.objects.filter(
-            course__user=self.user,
+            course__user_id=self.user_id,
             course__is_regular=True
-        ).select_related('course').order_by('start_time')
+        ).order_by('start_time')
         
         for lecture in lectures:
             schedule[lecture.day_of_week].append({
                 'type': 'lecture',
                 'item': lecture,
-                'title': lecture.course.name,
                 'start_time': lecture.start_time,
                 'end_time': lecture.end_time,
                 'room': lecture.room,
                 'professor': lecture.professor,
-                'course': lecture.course
+                'course_id': lecture.course_id
             })
         
-        # Add manual time slots for current week
-        current_week_start = self.get_current_week_start()
-        current_week_end = current_week_start + timedelta(days=6)
+        # Add manual time slots for the week
+        week_end = week_start + timedelta(days=6)
         
         manual_slots = TimetableSlot.objects.filter(
             timetable=self,
-            date__gte=current_week_start,
-            date__lte=current_week_end
+            date__gte=week_start,
+            date__lte=week_end
         ).order_by('start_time')
         
+        day_codes = [day[0] for day in LectureSchedule.DAYS_OF_WEEK]
         for slot in manual_slots:
-            day_name = slot.date.strftime('%A').lower()
-            schedule[day_name].append({
+            schedule[day_codes[slot.date.weekday()]].append({
                 'type': 'manual_slot',
                 'item': slot,
                 'title': slot.title,
@@ -208,6 +419,10 @@ class Timetable(models.Model):
                 'date': slot.date
             })
         
+        # Add this week's occurrences of recurring slots
+        for slot_date, entry in self.get_recurring_occurrences(week_start, week_end):
+            schedule[day_codes[slot_date.weekday()]].append(entry)
+        
         # Sort each day's schedule by start time
         for day in schedule:
             schedule[day].sort(key=lambda x: x['start_time'])
@@ -257,58 +472,78 @@ class Timetable(models.Model):
                 'date': slot.date
             })
         
+        schedule.extend(entry for slot_date, entry in self.get_recurring_occurrences(today, today))
+        
         return sorted(schedule, key=lambda x: x['start_time'])
     
-    def get_upcoming_lectures(self, days=7):
-        """Get upcoming lectures with smart suggestions"""
-        upcoming = []
-        courses = Course.objects.filter(user=self.user, is_regular=True)
+    def get_recurring_occurrences(self, start, end):
+        """``(date, entry)`` for every recurring slot occurrence between two dates (inclusive)
+
+        Series are expanded for the requested range only; skipped dates come
+        from the series' exceptions in that range.
+        """
+        series_list = RecurringSlot.objects.filter(
+            timetable=self,
+            starts_on__lte=end
+        ).filter(
+            models.Q(ends_on__isnull=True) | models.Q(ends_on__gte=start)
+        ).prefetch_related(models.Prefetch(
+            'exceptions',
+            queryset=RecurringSlotException.objects.filter(date__gte=start, date__lte=end),
+            to_attr='skipped_in_range'
+        ))
         
+        occurrences = []
+        for series in series_list:
+            skipped = {exception.date for exception in series.skipped_in_range}
+            for slot_date in series.occurrences(start, end):
+                if slot_date in skipped:
+                    continue
+                occurrences.append((slot_date, {
+                    'type': 'manual_slot',
+                    'item': series,
+                    'title': series.title,
+                    'start_time': series.start_time,
+                    'end_time': series.end_time,
+                    'notes': series.notes,
+                    'date': slot_date,
+                    'series_id': series.id
+                }))
+        return occurrences
+    
+    def get_upcoming_lectures(self, days=7, courses=None):
+        """Get upcoming lectures with smart suggestions
+
+        ``courses`` may be an already loaded list of regular courses (ideally
+        with ``schedules`` prefetched) to avoid querying them again.
+        """
+        if courses is None:
+            courses = (
+                Course.objects.filter(user_id=self.user_id, is_regular=True).with_thresholds()
+                .prefetch_related('schedules')
+            )
+        
+        # Expand every course's schedules in one pass; suggestions only depend on the course
+        course_for_schedule = {}
+        suggestions = {}
+        schedules = []
         for course in courses:
-            next_lectures = course.get_next_lectures(days)
-            for lecture_info in next_lectures:
-                suggestion = self._get_lecture_suggestion(course, lecture_info)
-                upcoming.append({
-                    'course': course,
-                    'lecture_info': lecture_info,
-                    'suggestion': suggestion
-                })
+            suggestions[course.id] = course.get_lecture_suggestion()
+            for schedule in course.schedules.all():
+                course_for_schedule[schedule.id] = course
+                schedules.append(schedule)
         
-        return sorted(upcoming, key=lambda x: (x['lecture_info']['date'], x['lecture_info']['schedule'].start_time))
-    
-    def _get_lecture_suggestion(self, course, lecture_info):
-        """Generate smart suggestion for a specific lecture"""
-        if course.is_below_threshold:
-            needed = course.lectures_needed_for_75_percent()
-            return {
-                'type': 'critical',
-                'message': f'Must attend! Need {needed} more lectures to reach 75%',
-                'priority': 'high',
-                'action': 'attend'
-            }
-        elif course.attendance_percentage < 80:
-            return {
-                'type': 'warning',
-                'message': f'Recommended to attend (currently {course.attendance_percentage}%)',
-                'priority': 'medium',
-                'action': 'attend'
-            }
-        else:
-            can_skip = course.lectures_can_skip()
-            if can_skip > 0:
-                return {
-                    'type': 'safe',
-                    'message': f'Can skip if needed (can skip {can_skip} more)',
-                    'priority': 'low',
-                    'action': 'optional'
-                }
-            else:
-                return {
-                    'type': 'caution',
-                    'message': 'Better to attend to maintain buffer',
-                    'priority': 'medium',
-                    'action': 'attend'
-                }
+        today = timezone.now().date()
+        upcoming = []
+        for lecture_info in next_lectures(schedules, today, days):
+            course = course_for_schedule[lecture_info['schedule'].id]
+            upcoming.append({
+                'course': course,
+                'lecture_info': lecture_info,
+                'suggestion': suggestions[course.id]
+            })
+        
+        return upcoming
     
     def get_current_week_start(self):
         """Get the start date of the current week (Monday)"""
@@ -316,28 +551,19 @@ class Timetable(models.Model):
         days_since_monday = today.weekday()
         return today - timedelta(days=days_since_monday)
     
-    def should_refresh(self):
-        """Check if timetable should be refreshed (weekly)"""
-        current_week_start = self.get_current_week_start()
-        last_refresh_week_start = self.last_refreshed.date() - timedelta(days=self.last_refreshed.date().weekday())
-        return current_week_start > last_refresh_week_start
-    
-    def refresh_weekly(self):
-        """Refresh timetable - clear old manual slots, keep regular schedules"""
-        if self.should_refresh():
-            # Delete manual slots from previous weeks
-            current_week_start = self.get_current_week_start()
-            TimetableSlot.objects.filter(
-                timetable=self,
-                date__lt=current_week_start
-            ).delete()
-            
-            # Update last refreshed timestamp
-            self.last_refreshed = timezone.now()
-            self.save()
-            
-            return True
-        return False
+
+class Holiday(models.Model):
+    """A day without lectures, left out of attendance forecasts"""
+    timetable = models.ForeignKey(Timetable, on_delete=models.CASCADE, related_name='holidays')
+    date = models.DateField()
+    name = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        unique_together = ['timetable', 'date']
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.date} {self.name}".strip()
 
 class TimetableSlot(models.Model):
     """Manual time slots that users can book in their timetable"""
@@ -357,10 +583,15 @@ class TimetableSlot(models.Model):
     end_time = models.TimeField()
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['date', 'start_time']
         unique_together = ['timetable', 'date', 'start_time']
+        indexes = [
+            # Purging past slots filters on date across all timetables
+            models.Index(fields=['date'], name='timetableslot_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.date} {self.start_time}"
@@ -379,27 +610,172 @@ class TimetableSlot(models.Model):
             raise ValidationError('End time must be after start time.')
     
     def has_conflict(self):
-        """Check if this slot conflicts with existing schedule"""
-        # Check conflicts with other manual slots
-        conflicting_slots = TimetableSlot.objects.filter(
-            timetable=self.timetable,
-            date=self.date
-        ).exclude(pk=self.pk)
-        
-        for slot in conflicting_slots:
-            if (self.start_time < slot.end_time and self.end_time > slot.start_time):
-                return True, f"Conflicts with '{slot.title}' ({slot.start_time}-{slot.end_time})"
-        
-        # Check conflicts with regular lectures
-        day_name = self.date.strftime('%A').lower()
+        """Check if this slot conflicts with existing schedule
+
+        Overlapping manual slots and regular lectures are found with one
+        query: two intervals overlap when each starts before the other ends.
+        Recurring slots need a second query, as whether a series falls on
+        the date depends on its interval.
+        """
+        overlapping = {'start_time__lt': self.end_time, 'end_time__gt': self.start_time}
+        slots = TimetableSlot.objects.filter(
+            timetable_id=self.timetable_id,
+            date=self.date,
+            **overlapping
+        ).exclude(pk=self.pk).order_by().annotate(
+            kind=models.Value('slot'), label=models.F('title')
+        ).values_list('kind', 'label', 'start_time', 'end_time')
         lectures = LectureSchedule.objects.filter(
-            course__user=self.timetable.user,
+            course__user_id=self.timetable.user_id,
             course__is_regular=True,
-            day_of_week=day_name
-        )
+            day_of_week=LectureSchedule.DAYS_OF_WEEK[self.date.weekday()][0],
+            **overlapping
+        ).order_by().annotate(
+            kind=models.Value('lecture'), label=models.F('course__name')
+        ).values_list('kind', 'label', 'start_time', 'end_time')
         
-        for lecture in lectures:
-            if (self.start_time < lecture.end_time and self.end_time > lecture.start_time):
-                return True, f"Conflicts with '{lecture.course.name}' lecture ({lecture.start_time}-{lecture.end_time})"
+        # Manual slots are reported first ('lecture' sorts before 'slot')
+        conflict = slots.union(lectures, all=True).order_by('-kind', 'start_time').first()
+        if conflict is not None:
+            kind, label, start_time, end_time = conflict
+            if kind == 'slot':
+                return True, f"Conflicts with '{label}' ({start_time}-{end_time})"
+            return True, f"Conflicts with '{label}' lecture ({start_time}-{end_time})"
         
+        recurring = RecurringSlot.objects.filter(
+            timetable_id=self.timetable_id,
+            day_of_week=LectureSchedule.DAYS_OF_WEEK[self.date.weekday()][0],
+            starts_on__lte=self.date,
+            **overlapping
+        ).filter(
+            models.Q(ends_on__isnull=True) | models.Q(ends_on__gte=self.date)
+        ).exclude(exceptions__date=self.date).order_by('start_time')
+        for series in recurring:
+            if series.occurs_on(self.date):
+                return True, f"Conflicts with recurring '{series.title}' ({series.start_time}-{series.end_time})"
         return False, None
+
+
+class RecurringSlot(models.Model):
+    """A manual slot repeating on one weekday every week or every other week
+
+    Only the series is stored; its occurrences are expanded for whichever
+    week is shown, minus the dates listed in ``exceptions``.
+    """
+    FREQUENCIES = [
+        (1, 'Every week'),
+        (2, 'Every other week'),
+    ]
+    
+    timetable = models.ForeignKey(Timetable, on_delete=models.CASCADE, related_name='recurring_slots')
+    title = models.CharField(max_length=200)
+    slot_type = models.CharField(max_length=20, choices=TimetableSlot.SLOT_TYPES, default='other')
+    day_of_week = models.CharField(max_length=10, choices=LectureSchedule.DAYS_OF_WEEK, editable=False)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    interval_weeks = models.PositiveSmallIntegerField(choices=FREQUENCIES, default=1)
+    starts_on = models.DateField(help_text="Date of the first occurrence")
+    ends_on = models.DateField(null=True, blank=True, help_text="No occurrences after this date (empty repeats indefinitely)")
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Also bumped when an exception is added or removed (see tracker.signals)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['starts_on', 'start_time']
+    
+    def __str__(self):
+        return f"{self.title} - {self.get_interval_weeks_display()} from {self.starts_on} {self.start_time}"
+    
+    def save(self, *args, **kwargs):
+        # The weekday is the first occurrence's; kept as a column for conflict queries
+        self.day_of_week = LectureSchedule.DAYS_OF_WEEK[self.starts_on.weekday()][0]
+        super().save(*args, **kwargs)
+    
+    @property
+    def duration_minutes(self):
+        """Calculate slot duration in minutes"""
+        start_datetime = datetime.combine(date.today(), self.start_time)
+        end_datetime = datetime.combine(date.today(), self.end_time)
+        return int((end_datetime - start_datetime).total_seconds() / 60)
+    
+    def clean(self):
+        """Validate the time range and the end date"""
+        from django.core.exceptions import ValidationError
+        if self.end_time <= self.start_time:
+            raise ValidationError('End time must be after start time.')
+        if self.ends_on is not None and self.ends_on < self.starts_on:
+            raise ValidationError('The series cannot end before its first occurrence.')
+    
+    def occurrences(self, start, end):
+        """Dates the series falls on between two dates (exceptions not applied)"""
+        return iter_series_dates(self.starts_on, start, end, self.interval_weeks, self.ends_on)
+    
+    def occurs_on(self, day):
+        """Whether the series falls on ``day`` (exceptions not applied)"""
+        return next(iter(self.occurrences(day, day)), None) == day
+
+
+class RecurringSlotException(models.Model):
+    """A date on which a recurring slot is skipped"""
+    series = models.ForeignKey(RecurringSlot, on_delete=models.CASCADE, related_name='exceptions')
+    date = models.DateField()
+    
+    class Meta:
+        ordering = ['date']
+        unique_together = ['series', 'date']
+    
+    def __str__(self):
+        return f"{self.series.title} skipped on {self.date}"
+
+
+class MaintenanceRun(models.Model):
+    """One task of a ``manage.py run_maintenance`` pass, updated as it progresses"""
+    task = models.CharField(max_length=100)
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    batches = models.PositiveIntegerField(default=0)
+    rows = models.PositiveIntegerField(default=0, help_text="Rows updated or deleted")
+    succeeded = models.BooleanField(null=True, help_text="Empty while the task is running")
+    error = models.TextField(blank=True)
+    
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['task', '-started_at'], name='maintenancerun_task_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.task} at {self.started_at:%Y-%m-%d %H:%M}"
+    
+    @property
+    def duration_seconds(self):
+        """Seconds the task took (so far, while running)"""
+        end = self.finished_at or timezone.now()
+        return round((end - self.started_at).total_seconds(), 3)
+
+
+class SyncTombstone(models.Model):
+    """A deleted course, lecture, manual slot, recurring series or attendance record, for delta sync (tracker.sync)"""
+    KINDS = [
+        ('course', 'Course'),
+        ('schedule', 'Lecture schedule'),
+        ('slot', 'Manual slot'),
+        ('recurring', 'Recurring slot'),
+        ('record', 'Attendance record'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sync_tombstones')
+    kind = models.CharField(max_length=10, choices=KINDS)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='synctombstone_user_idx'),
+            # Purging old tombstones filters on deleted_at across all users
+            models.Index(fields=['deleted_at'], name='synctombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.object_id} deleted at {self.deleted_at:%Y-%m-%d %H:%M}"
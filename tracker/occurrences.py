@@ -0,0 +1,105 @@
+from datetime import timedelta
+from operator import attrgetter
+
+
+def first_on_or_after(start, weekday):
+    """First date on or after ``start`` that falls on ``weekday`` (Monday = 0)"""
+    return start + timedelta(days=(weekday - start.weekday()) % 7)
+
+
+def count_weekday(weekday, start, end):
+    """Number of dates between ``start`` and ``end`` (inclusive) falling on ``weekday``"""
+    first = first_on_or_after(start, weekday)
+    if first > end:
+        return 0
+    return (end - first).days // 7 + 1
+
+
+def iter_weekday_dates(weekday, start, end, interval_weeks=1):
+    """Yield every date between ``start`` and ``end`` (inclusive) that falls on ``weekday``"""
+    current = first_on_or_after(start, weekday)
+    step = timedelta(weeks=interval_weeks)
+    while current <= end:
+        yield current
+        current += step
+
+
+def iter_series_dates(first, start, end, interval_weeks=1, until=None):
+    """Yield dates of a series repeating every ``interval_weeks`` weeks from ``first``
+
+    Only dates between ``start`` and ``end`` (inclusive) and not after
+    ``until`` are produced; the first one is found arithmetically, so a
+    series that started years ago costs nothing extra.
+    """
+    if until is not None:
+        end = min(end, until)
+    step = 7 * interval_weeks
+    current = first
+    if start > first:
+        current = first + timedelta(days=-(-(start - first).days // step) * step)
+    while current <= end:
+        yield current
+        current += timedelta(days=step)
+
+
+def group_by_weekday(schedules):
+    """Bucket schedules into seven lists indexed by weekday, each ordered by start time"""
+    buckets = [[] for _ in range(7)]
+    for schedule in schedules:
+        buckets[schedule.weekday].append(schedule)
+    for bucket in buckets:
+        bucket.sort(key=attrgetter('start_time'))
+    return buckets
+
+
+def expand_occurrences(schedules, start, end):
+    """Expand weekly schedules into ``(date, schedule)`` pairs between ``start`` and ``end``
+
+    Each schedule is mapped to its weekday once, so walking the range only
+    touches the schedules that actually fall on each day: the cost is
+    O(days + occurrences) instead of O(days x schedules). Results come out
+    ordered by date then start time without a final sort.
+    """
+    buckets = group_by_weekday(schedules)
+    occurrences = []
+    if not any(buckets):
+        return occurrences
+
+    one_day = timedelta(days=1)
+    current = start
+    weekday = start.weekday()
+    while current <= end:
+        for schedule in buckets[weekday]:
+            occurrences.append((current, schedule))
+        current += one_day
+        weekday = (weekday + 1) % 7
+    return occurrences
+
+
+def next_occurrence(schedules, today):
+    """``(date, schedule)`` of the earliest lecture from ``today`` on, or None
+
+    Lectures earlier today still count, as in ``next_lectures``; it is
+    found from each schedule's weekday without expanding any dates.
+    """
+    best = None
+    for schedule in schedules:
+        key = ((schedule.weekday - today.weekday()) % 7, schedule.start_time)
+        if best is None or key < best[0]:
+            best = (key, schedule)
+    if best is None:
+        return None
+    return today + timedelta(days=best[0][0]), best[1]
+
+
+def next_lectures(schedules, today, days=7):
+    """Lecture info dicts for every occurrence from ``today`` through ``today + days``"""
+    return [
+        {
+            'date': occurrence_date,
+            'schedule': schedule,
+            'is_today': occurrence_date == today,
+            'days_from_now': (occurrence_date - today).days
+        }
+        for occurrence_date, schedule in expand_occurrences(schedules, today, today + timedelta(days=days))
+    ]
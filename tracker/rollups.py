@@ -0,0 +1,174 @@
+"""Attendance rollups: per-course and per-course-per-month record totals.
+
+Two write paths keep the rollup tables in step with AttendanceRecord:
+
+* Model-level saves and deletes (admin, scripts, ``get_or_create``) are
+  handled by the signal receivers in ``tracker.signals`` through
+  ``apply_record_delta``.
+* Queryset-level writes (``update()``, ``bulk_create()``), which send no
+  signals, must call ``apply_record_delta`` or ``refresh_rollups``
+  themselves, as ``tracker.attendance`` does.
+
+``rebuild_rollups`` recomputes everything from the records in batches and
+``find_drift`` reports courses whose rollup no longer matches them.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import AttendanceRecord, Course, CourseAttendanceRollup, MonthlyAttendanceRollup
+
+BATCH_SIZE = 500
+
+
+def month_start(record_date):
+    return record_date.replace(day=1)
+
+
+def apply_record_delta(course_id, record_date, total_delta, attended_delta):
+    """Add a record-count change to the course and month rollups
+
+    Negative deltas never create rows, so removing records of a course that
+    is itself being deleted cannot resurrect its rollups.
+    """
+    if not total_delta and not attended_delta:
+        return
+    changes = {
+        'total_records': F('total_records') + total_delta,
+        'attended_records': F('attended_records') + attended_delta,
+    }
+    targets = (
+        (CourseAttendanceRollup, {'course_id': course_id}),
+        (MonthlyAttendanceRollup, {'course_id': course_id, 'month': month_start(record_date)}),
+    )
+    for model, lookup in targets:
+        if model.objects.filter(**lookup).update(**changes) or total_delta < 0 or attended_delta < 0:
+            continue
+        rollup, created = model.objects.get_or_create(
+            defaults={'total_records': total_delta, 'attended_records': attended_delta}, **lookup
+        )
+        if not created:
+            model.objects.filter(**lookup).update(**changes)
+
+
+def _record_totals(records):
+    return records.annotate(
+        total=Count('id'),
+        attended=Count('id', filter=Q(attended=True)),
+    )
+
+
+def refresh_rollups(course_ids, months=None):
+    """Recompute rollups of the given courses (optionally only some months) from their records"""
+    course_ids = list(course_ids)
+    if not course_ids:
+        return
+
+    records = AttendanceRecord.objects.filter(course_id__in=course_ids)
+    monthly = MonthlyAttendanceRollup.objects.filter(course_id__in=course_ids)
+    if months is not None:
+        months = sorted(set(months))
+        records = records.filter(date__gte=months[0], date__lt=_next_month(months[-1]))
+        monthly = monthly.filter(month__gte=months[0], month__lte=months[-1])
+
+    rows = [
+        MonthlyAttendanceRollup(
+            course_id=row['course_id'], month=row['month'],
+            total_records=row['total'], attended_records=row['attended'],
+        )
+        for row in _record_totals(
+            records.annotate(month=TruncMonth('date')).order_by().values('course_id', 'month')
+        )
+        if months is None or row['month'] in months
+    ]
+
+    with transaction.atomic():
+        # Months left without records disappear; the rest are upserted
+        present = {(row.course_id, row.month) for row in rows}
+        stale = [pk for pk, course_id, month in monthly.values_list('pk', 'course_id', 'month')
+                 if (course_id, month) not in present and (months is None or month in months)]
+        if stale:
+            MonthlyAttendanceRollup.objects.filter(pk__in=stale).delete()
+        MonthlyAttendanceRollup.objects.bulk_create(
+            rows,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['course', 'month'],
+            update_fields=['total_records', 'attended_records'],
+        )
+        _refresh_course_rollups(course_ids)
+
+
+def _refresh_course_rollups(course_ids):
+    """Course rollups are the sum of their (few) monthly rows"""
+    totals = {
+        row['course_id']: row
+        for row in MonthlyAttendanceRollup.objects.filter(course_id__in=course_ids)
+        .values('course_id')
+        .annotate(total=Sum('total_records'), attended=Sum('attended_records'))
+    }
+    CourseAttendanceRollup.objects.bulk_create(
+        [
+            CourseAttendanceRollup(
+                course_id=course_id,
+                total_records=totals.get(course_id, {}).get('total') or 0,
+                attended_records=totals.get(course_id, {}).get('attended') or 0,
+            )
+            for course_id in course_ids
+        ],
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['course'],
+        update_fields=['total_records', 'attended_records', 'updated_at'],
+    )
+
+
+def _next_month(month):
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+def iter_course_id_batches(batch_size=BATCH_SIZE, courses=None):
+    """Yield lists of course ids in primary-key order without loading them all"""
+    courses = Course.objects.all() if courses is None else courses
+    last_id = 0
+    while True:
+        batch = list(
+            courses.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]
+
+
+def rebuild_rollups(batch_size=BATCH_SIZE, courses=None):
+    """Recompute every rollup from the records, one batch of courses per transaction
+
+    Yields the number of courses processed after each batch.
+    """
+    for batch in iter_course_id_batches(batch_size, courses):
+        refresh_rollups(batch)
+        yield len(batch)
+
+
+def find_drift(batch_size=BATCH_SIZE, courses=None):
+    """Yield (course_id, expected, actual) where a course rollup disagrees with its records
+
+    ``expected`` and ``actual`` are ``(total_records, attended_records)``
+    tuples; a missing rollup row reads as ``None``.
+    """
+    for batch in iter_course_id_batches(batch_size, courses):
+        expected = {
+            row['course_id']: (row['total'], row['attended'])
+            for row in _record_totals(
+                AttendanceRecord.objects.filter(course_id__in=batch).order_by().values('course_id')
+            )
+        }
+        actual = dict(
+            (course_id, (total, attended))
+            for course_id, total, attended in CourseAttendanceRollup.objects.filter(course_id__in=batch)
+            .values_list('course_id', 'total_records', 'attended_records')
+        )
+        for course_id in batch:
+            if expected.get(course_id, (0, 0)) != actual.get(course_id, (0, 0)):
+                yield course_id, expected.get(course_id, (0, 0)), actual.get(course_id)
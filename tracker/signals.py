@@ -0,0 +1,155 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate_suggestions, invalidate_thresholds, invalidate_timetable
+from .events import publish_on_commit
+from .models import (
+    AttendanceRecord, Course, LectureSchedule, RecurringSlot, RecurringSlotException, SyncTombstone, ThresholdPolicy,
+    Timetable, TimetableSlot
+)
+from .rollups import apply_record_delta
+
+# Course fields that change what the cached weekly timetable contains
+TIMETABLE_COURSE_FIELDS = {'is_regular', 'name'}
+
+
+def _course_user_id(instance):
+    # Lectures and attendance records both point at a course
+    if type(instance).course.is_cached(instance):
+        return instance.course.user_id
+    return Course.objects.filter(pk=instance.course_id).values_list('user_id', flat=True).first()
+
+
+def _timetable_user_id(slot):
+    # Manual slots and recurring slots both point at a timetable
+    if type(slot).timetable.is_cached(slot):
+        return slot.timetable.user_id
+    return Timetable.objects.filter(pk=slot.timetable_id).values_list('user_id', flat=True).first()
+
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Counter-only saves (update_fields without is_regular/name) keep the cache
+    if update_fields is None or TIMETABLE_COURSE_FIELDS.intersection(update_fields):
+        invalidate_timetable(instance.user_id)
+    invalidate_suggestions(instance.user_id)
+
+
+@receiver(post_delete, sender=Course)
+def course_deleted(sender, instance, **kwargs):
+    invalidate_timetable(instance.user_id)
+    invalidate_suggestions(instance.user_id)
+
+
+@receiver(post_save, sender=LectureSchedule)
+@receiver(post_delete, sender=LectureSchedule)
+def schedule_changed(sender, instance, **kwargs):
+    user_id = _course_user_id(instance)
+    if user_id is not None:
+        invalidate_timetable(user_id)
+        invalidate_suggestions(user_id)
+
+
+@receiver(post_save, sender=ThresholdPolicy)
+@receiver(post_delete, sender=ThresholdPolicy)
+def threshold_policy_changed(sender, instance, **kwargs):
+    user_id = instance.user_id
+    if user_id is None:
+        user_id = Course.objects.filter(pk=instance.course_id).values_list('user_id', flat=True).first()
+    if user_id is not None:
+        invalidate_thresholds(user_id)
+        invalidate_suggestions(user_id)
+        # Synced courses carry their threshold, so the courses it applies to count as changed
+        if instance.course_id is not None:
+            courses = Course.objects.filter(pk=instance.course_id)
+        else:
+            courses = Course.objects.filter(user_id=user_id)
+        courses.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=TimetableSlot)
+@receiver(post_delete, sender=TimetableSlot)
+@receiver(post_save, sender=RecurringSlot)
+@receiver(post_delete, sender=RecurringSlot)
+def slot_changed(sender, instance, signal, created=False, **kwargs):
+    user_id = _timetable_user_id(instance)
+    if user_id is not None:
+        invalidate_timetable(user_id)
+        if sender is TimetableSlot:
+            action = 'deleted' if signal is post_delete else 'created' if created else 'updated'
+            publish_on_commit(user_id, 'slot', {
+                'action': action,
+                'id': instance.id,
+                'title': instance.title,
+                'slot_type': instance.slot_type,
+                # Fields may still hold the strings they were assigned
+                'date': str(instance.date),
+                'start_time': str(instance.start_time)[:5],
+                'end_time': str(instance.end_time)[:5],
+            })
+
+
+@receiver(post_save, sender=RecurringSlotException)
+@receiver(post_delete, sender=RecurringSlotException)
+def slot_exception_changed(sender, instance, **kwargs):
+    user_id = RecurringSlot.objects.filter(pk=instance.series_id).values_list('timetable__user_id', flat=True).first()
+    if user_id is not None:
+        invalidate_timetable(user_id)
+        # Synced series carry their exception dates
+        RecurringSlot.objects.filter(pk=instance.series_id).update(updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=AttendanceRecord)
+def record_saving(sender, instance, raw=False, **kwargs):
+    # Remember what an existing record counted for before it is overwritten
+    instance._rollup_previous = None
+    if not raw and not instance._state.adding and instance.pk is not None:
+        instance._rollup_previous = AttendanceRecord.objects.filter(pk=instance.pk).values_list(
+            'course_id', 'date', 'attended'
+        ).first()
+
+
+@receiver(post_save, sender=AttendanceRecord)
+def record_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous is not None:
+        course_id, record_date, attended = previous
+        apply_record_delta(course_id, record_date, -1, -1 if attended else 0)
+    if created or previous is not None:
+        apply_record_delta(instance.course_id, instance.date, 1, 1 if instance.attended else 0)
+
+
+@receiver(post_delete, sender=AttendanceRecord)
+def record_deleted(sender, instance, origin=None, **kwargs):
+    # Rollups of a course being deleted go away with it
+    if isinstance(origin, Course) or getattr(origin, 'model', None) is Course:
+        return
+    apply_record_delta(instance.course_id, instance.date, -1, -1 if instance.attended else 0)
+
+
+# Tombstones for the delta-sync API (see tracker.sync); sender -> (kind, user id)
+TOMBSTONE_KINDS = {
+    Course: ('course', lambda instance: instance.user_id),
+    LectureSchedule: ('schedule', _course_user_id),
+    TimetableSlot: ('slot', _timetable_user_id),
+    RecurringSlot: ('recurring', _timetable_user_id),
+    AttendanceRecord: ('record', _course_user_id),
+}
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=LectureSchedule)
+@receiver(post_delete, sender=TimetableSlot)
+@receiver(post_delete, sender=RecurringSlot)
+@receiver(post_delete, sender=AttendanceRecord)
+def write_tombstone(sender, instance, origin=None, **kwargs):
+    # Only what was deleted itself: rows cascading from a course (or a user) go away with it on the client too
+    if origin is not instance and getattr(origin, 'model', None) is not sender:
+        return
+    kind, get_user_id = TOMBSTONE_KINDS[sender]
+    user_id = get_user_id(instance)
+    if user_id is not None:
+        SyncTombstone.objects.create(user_id=user_id, kind=kind, object_id=instance.pk)
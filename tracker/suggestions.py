@@ -0,0 +1,92 @@
+"""Per-course suggestions for the polled ``suggestions_api``.
+
+One entry per regular course, for its next lecture, found directly from
+the weekday of each schedule (``next_occurrence``) instead of expanding a
+week of lectures and keeping the first per course. Results are cached per
+user under the suggestions version (``tracker.cache``) and the day, since
+``is_today``/``days_from_now`` move at midnight, and the institution
+threshold, since a changed ``ATTENDANCE_THRESHOLD`` bumps no version.
+"""
+from datetime import datetime, time, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.utils import timezone
+
+from .cache import SUGGESTIONS_TIMEOUT, aget_suggestions_version, get_suggestions_version, suggestions_key
+from .models import Course, ThresholdPolicy
+from .occurrences import next_occurrence
+
+
+def build_suggestions(user_id, today):
+    """Suggestions ordered by next lecture (date, then start time); two queries"""
+    upcoming = []
+    courses = Course.objects.filter(user_id=user_id, is_regular=True).with_thresholds().prefetch_related('schedules')
+    for course in courses:
+        occurrence = next_occurrence(course.schedules.all(), today)
+        if occurrence is None:
+            continue
+        lecture_date, schedule = occurrence
+        suggestion = course.get_lecture_suggestion()
+        upcoming.append(((lecture_date, schedule.start_time), {
+            'course_id': course.id,
+            'course_name': course.name,
+            'type': suggestion['type'],
+            'message': suggestion['message'],
+            'current_percentage': course.attendance_percentage,
+            'lecture_date': lecture_date.strftime('%Y-%m-%d'),
+            'lecture_time': schedule.start_time.strftime('%H:%M'),
+            'lecture_day': schedule.get_day_of_week_display(),
+            'is_today': lecture_date == today,
+            'days_from_now': (lecture_date - today).days,
+        }))
+    upcoming.sort(key=lambda item: item[0])
+    return [suggestion for key, suggestion in upcoming]
+
+
+def get_suggestions(user_id, today=None):
+    """Cached ``build_suggestions`` for the user's current version and today"""
+    today = today or timezone.now().date()
+    key = suggestions_key(user_id, get_suggestions_version(user_id), today, ThresholdPolicy.institution_default())
+    suggestions = cache.get(key)
+    if suggestions is None:
+        suggestions = build_suggestions(user_id, today)
+        cache.set(key, suggestions, SUGGESTIONS_TIMEOUT)
+    return suggestions
+
+
+async def aget_suggestions(user_id, today=None, version=None):
+    """get_suggestions for async views, optionally for an already fetched version
+
+    The two queries of a miss run as one ``sync_to_async`` call: Django
+    4.2 cannot prefetch during async iteration, and its async ORM runs every
+    query through ``sync_to_async`` anyway.
+    """
+    today = today or timezone.now().date()
+    if version is None:
+        version = await aget_suggestions_version(user_id)
+    key = suggestions_key(user_id, version, today, ThresholdPolicy.institution_default())
+    suggestions = await cache.aget(key)
+    if suggestions is None:
+        suggestions = await sync_to_async(build_suggestions)(user_id, today)
+        await cache.aset(key, suggestions, SUGGESTIONS_TIMEOUT)
+    return suggestions
+
+
+def version_etag(version, today):
+    threshold, margin = ThresholdPolicy.institution_default()
+    return f'{version:.6f}-{today:%Y%m%d}-{threshold}-{margin}'
+
+
+def version_last_modified(version, today):
+    """Last change to the suggestions: the version time, or midnight if that is later"""
+    changed = datetime.fromtimestamp(version, tz=dt_timezone.utc)
+    return max(changed, timezone.make_aware(datetime.combine(today, time.min)))
+
+
+def suggestions_etag(user_id, today=None):
+    return version_etag(get_suggestions_version(user_id), today or timezone.now().date())
+
+
+def suggestions_last_modified(user_id, today=None):
+    return version_last_modified(get_suggestions_version(user_id), today or timezone.now().date())
@@ -0,0 +1,208 @@
+"""Delta sync for offline-first clients (``/api/v1/sync/``).
+
+A client keeps its own copy of the user's courses, lecture schedules,
+manual slots, recurring slot series (each with the dates it is skipped
+on) and attendance records. The first request (no ``since``)
+returns everything with ``full: true``; every response carries a
+``cursor`` to send as ``since`` next time, and later responses hold only
+the rows changed since then plus the ids deleted since then.
+
+Changes are found through each row's ``updated_at`` (every write path,
+including the bulk ones, sets it) and deletions through ``SyncTombstone``
+rows written by ``tracker.signals``. Children deleted with their course
+get no tombstone of their own: clients drop them with the course.
+
+A row's ``updated_at`` is taken before its transaction commits, so a
+slow transaction can commit a change dated before a cursor that was
+already handed out. The cursor therefore trails the response by
+``SYNC_SETTLE_SECONDS``: rows changed in that window are sent again next
+time, and applying a row twice is harmless because rows are sent whole.
+Tombstones are kept for ``SYNC_TOMBSTONE_DAYS``; a cursor older than that
+gets a full response again. Past manual slots and finished series removed
+by maintenance get no tombstones either; clients drop slots before the
+current week, and series that ended before it, themselves.
+
+Marks made offline come back through ``upload_marks``, in one batch.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .attendance import _parse_entry, bulk_mark_attendance
+from .models import AttendanceRecord, Course, LectureSchedule, RecurringSlot, SyncTombstone, TimetableSlot
+
+# SyncTombstone kind for each collection of the response
+COLLECTIONS = {
+    'course': 'courses',
+    'schedule': 'schedules',
+    'slot': 'slots',
+    'recurring': 'recurring',
+    'record': 'records',
+}
+
+
+def _epoch():
+    return datetime(1970, 1, 1, tzinfo=dt_timezone.utc if settings.USE_TZ else None)
+
+
+def encode_cursor(moment):
+    return str((moment - _epoch()) // timedelta(microseconds=1))
+
+
+def decode_cursor(cursor):
+    """The moment a cursor stands for; raises ValueError for anything that is not a cursor"""
+    try:
+        return _epoch() + timedelta(microseconds=int(cursor))
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f'Invalid cursor: {cursor!r}')
+
+
+def _time(value):
+    return value.strftime('%H:%M')
+
+
+def serialize_course(course):
+    return {
+        'id': course.id,
+        'name': course.name,
+        'is_regular': course.is_regular,
+        'total_lectures': course.total_lectures,
+        'attended_lectures': course.attended_lectures,
+        'threshold': course.threshold,
+        'warning_margin': course.warning_margin,
+    }
+
+
+def serialize_schedule(schedule):
+    return {
+        'id': schedule.id,
+        'course_id': schedule.course_id,
+        'day_of_week': schedule.day_of_week,
+        'start_time': _time(schedule.start_time),
+        'end_time': _time(schedule.end_time),
+        'room': schedule.room,
+        'professor': schedule.professor,
+    }
+
+
+def serialize_slot(slot):
+    return {
+        'id': slot.id,
+        'title': slot.title,
+        'slot_type': slot.slot_type,
+        'date': slot.date.isoformat(),
+        'start_time': _time(slot.start_time),
+        'end_time': _time(slot.end_time),
+        'notes': slot.notes,
+    }
+
+
+def serialize_recurring(series):
+    return {
+        'id': series.id,
+        'title': series.title,
+        'slot_type': series.slot_type,
+        'day_of_week': series.day_of_week,
+        'start_time': _time(series.start_time),
+        'end_time': _time(series.end_time),
+        'interval_weeks': series.interval_weeks,
+        'starts_on': series.starts_on.isoformat(),
+        'ends_on': series.ends_on.isoformat() if series.ends_on else None,
+        'skipped': [exception.date.isoformat() for exception in series.exceptions.all()],
+        'notes': series.notes,
+    }
+
+
+def serialize_record(record):
+    return {
+        'id': record.id,
+        'course_id': record.course_id,
+        'date': record.date.isoformat(),
+        'attended': record.attended,
+        'notes': record.notes,
+    }
+
+
+def get_changes(user, since=None, now=None):
+    """Everything of the user's changed after the ``since`` cursor (all of it when None); at most seven queries
+
+    Returns ``{cursor, full, courses, schedules, slots, recurring, records, deleted}``
+    where ``deleted`` maps each collection to the ids deleted since then.
+    """
+    now = now or timezone.now()
+    since = decode_cursor(since) if since is not None else None
+    full = since is None or since < now - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+    cursor = now - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+
+    querysets = {
+        'courses': (Course.objects.filter(user=user).with_thresholds().order_by('pk'), serialize_course),
+        'schedules': (LectureSchedule.objects.filter(course__user=user).order_by('pk'), serialize_schedule),
+        'slots': (TimetableSlot.objects.filter(timetable__user=user).order_by('pk'), serialize_slot),
+        'recurring': (
+            RecurringSlot.objects.filter(timetable__user=user).prefetch_related('exceptions').order_by('pk'),
+            serialize_recurring,
+        ),
+        'records': (AttendanceRecord.objects.filter(course__user=user).order_by('pk'), serialize_record),
+    }
+    changes = {'cursor': encode_cursor(cursor if full else max(cursor, since)), 'full': full}
+    for name, (queryset, serialize) in querysets.items():
+        if not full:
+            queryset = queryset.filter(updated_at__gt=since)
+        changes[name] = [serialize(row) for row in queryset]
+
+    changes['deleted'] = {name: [] for name in COLLECTIONS.values()}
+    if not full:
+        for kind, object_id in SyncTombstone.objects.filter(user=user, deleted_at__gt=since).values_list(
+            'kind', 'object_id'
+        ).order_by('deleted_at'):
+            changes['deleted'][COLLECTIONS[kind]].append(object_id)
+    return changes
+
+
+def upload_marks(user, marks, cursor=None):
+    """Apply a batch of attendance marks made offline
+
+    Each mark is ``{'course_id', 'date', 'attended'}``. ``cursor`` is the
+    cursor the client had synced to when the marks were made: a mark for a
+    record that changed on the server after it, to a different value, is
+    not applied and is returned under ``conflicts`` with the server's
+    value, so the last mark the client saw changed keeps winning. Without a
+    cursor every mark is applied. The rest go through
+    ``bulk_mark_attendance``; returns its summary plus ``conflicts``.
+
+    Raises ValueError for malformed marks or courses that are not the user's.
+    """
+    parsed = []
+    for mark in marks:
+        course_id, attendance_date, attended = _parse_entry(mark)
+        if course_id is None:
+            raise ValueError('Each mark needs a course_id.')
+        parsed.append((course_id, attendance_date, attended))
+    since = decode_cursor(cursor) if cursor is not None else None
+
+    with transaction.atomic():
+        changed = {}
+        if since is not None and parsed:
+            dates = [attendance_date for _, attendance_date, _ in parsed]
+            changed = {
+                (course_id, record_date): attended
+                for course_id, record_date, attended in AttendanceRecord.objects.filter(
+                    course__user=user,
+                    course_id__in={course_id for course_id, _, _ in parsed},
+                    date__gte=min(dates),
+                    date__lte=max(dates),
+                    updated_at__gt=since,
+                ).values_list('course_id', 'date', 'attended')
+            }
+        accepted, conflicts = [], []
+        for course_id, attendance_date, attended in parsed:
+            server_value = changed.get((course_id, attendance_date))
+            if server_value is not None and server_value != attended:
+                conflicts.append({'course_id': course_id, 'date': attendance_date.isoformat(), 'attended': server_value})
+            else:
+                accepted.append({'course_id': course_id, 'date': attendance_date.isoformat(), 'attended': attended})
+        summary = bulk_mark_attendance(user, accepted)
+    summary['conflicts'] = conflicts
+    return summary
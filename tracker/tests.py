@@ -0,0 +1,563 @@
+import json
+from datetime import date, time, timedelta
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import include, path
+from django.utils import timezone
+
+from tracker import async_views
+from tracker.attendance import bulk_mark_attendance
+from tracker.cache import get_timetable_version
+from tracker.hashers import MIN_ITERATIONS
+from tracker.importer import AttendanceImporter, iter_chunks
+from tracker.maintenance import current_week_start, delete_in_batches, purge_queries
+from tracker.metrics import registry
+from tracker.models import (
+    AttendanceRecord, Course, CourseAttendanceRollup, LectureSchedule, MonthlyAttendanceRollup, RecurringSlot,
+    RecurringSlotException, SyncTombstone, Timetable, TimetableSlot
+)
+from tracker.rollups import find_drift
+from tracker.sync import encode_cursor
+
+DAYS = [code for code, name in LectureSchedule.DAYS_OF_WEEK[:5]]
+
+# The async JSON views next to the usual URLs, whatever ASYNC_VIEWS says
+urlpatterns = [
+    path('async/update-attendance/', async_views.update_attendance, name='async_update_attendance'),
+    path('async/api/suggestions/', async_views.suggestions_api, name='async_suggestions_api'),
+    path('async/login/', async_views.login_view, name='async_login'),
+    path('', include('tracker.urls')),
+]
+
+
+class DashboardQueryCountTest(TestCase):
+    """The dashboard runs the same number of queries however many courses a user has"""
+    DASHBOARD_QUERIES = 10
+
+    def make_user(self, username, course_count):
+        user = User.objects.create_user(username)
+        Timetable.objects.create(user=user)
+        for i in range(course_count):
+            course = Course.objects.create(
+                user=user, name=f'Course {i}', total_lectures=20, attended_lectures=10 + i % 10, is_regular=True
+            )
+            for j in range(2):
+                LectureSchedule.objects.create(
+                    course=course, day_of_week=DAYS[(i + j) % 5], start_time=time(8 + j), end_time=time(9 + j)
+                )
+        return user
+
+    def assert_dashboard_queries(self, user):
+        self.client.force_login(user)
+        # The first request also saves the session (SlidingSessionMiddleware)
+        self.client.get('/', secure=True)
+        cache.clear()
+        with self.assertNumQueries(self.DASHBOARD_QUERIES):
+            response = self.client.get('/', secure=True)
+        self.assertEqual(response.status_code, 200)
+
+    def test_two_courses(self):
+        self.assert_dashboard_queries(self.make_user('two', 2))
+
+    def test_twelve_courses(self):
+        self.assert_dashboard_queries(self.make_user('twelve', 12))
+
+
+class BulkMarkAttendanceTest(TestCase):
+    """Counters move by each batch's net change, and the rollups follow the records"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('bulk')
+        # Counters carried over from before records were kept
+        self.maths = Course.objects.create(user=self.user, name='Maths', total_lectures=10, attended_lectures=8,
+                                           is_regular=True)
+        self.physics = Course.objects.create(user=self.user, name='Physics', total_lectures=4, attended_lectures=2,
+                                             is_regular=True)
+        self.art = Course.objects.create(user=self.user, name='Art', is_regular=True)
+        LectureSchedule.objects.create(course=self.maths, day_of_week='monday', start_time=time(9), end_time=time(10))
+        LectureSchedule.objects.create(course=self.physics, day_of_week='friday', start_time=time(9), end_time=time(10))
+        LectureSchedule.objects.create(course=self.art, day_of_week='monday', start_time=time(14), end_time=time(15))
+
+    def assert_counters(self, course, attended, total):
+        course.refresh_from_db()
+        self.assertEqual((course.attended_lectures, course.total_lectures), (attended, total), course.name)
+
+    def assert_rollups(self, course, total, attended, months):
+        rollup = CourseAttendanceRollup.objects.get(course=course)
+        self.assertEqual((rollup.total_records, rollup.attended_records), (total, attended), course.name)
+        self.assertEqual({
+            row.month: (row.total_records, row.attended_records)
+            for row in MonthlyAttendanceRollup.objects.filter(course=course)
+        }, months)
+
+    def test_mixed_courses_remark_and_flip(self):
+        entries = [
+            {'course_id': self.maths.id, 'date': '2025-01-27', 'attended': True},
+            {'course_id': self.maths.id, 'date': '2025-02-03', 'attended': False},
+            {'course_id': self.physics.id, 'date': '2025-01-31', 'attended': True},
+            # Every regular course with a lecture on Monday 2025-02-10: Maths and Art
+            {'date': '2025-02-10', 'attended': True},
+        ]
+        summary = bulk_mark_attendance(self.user, entries)
+        self.assertEqual((summary['created'], summary['updated'], summary['unchanged']), (5, 0, 0))
+        self.assert_counters(self.maths, 10, 13)
+        self.assert_counters(self.physics, 3, 5)
+        self.assert_counters(self.art, 1, 1)
+        self.assert_rollups(self.maths, 3, 2, {date(2025, 1, 1): (1, 1), date(2025, 2, 1): (2, 1)})
+        self.assert_rollups(self.physics, 1, 1, {date(2025, 1, 1): (1, 1)})
+        self.assert_rollups(self.art, 1, 1, {date(2025, 2, 1): (1, 1)})
+
+        # The same marks again change nothing
+        summary = bulk_mark_attendance(self.user, entries)
+        self.assertEqual((summary['created'], summary['updated'], summary['unchanged']), (0, 0, 5))
+        self.assert_counters(self.maths, 10, 13)
+        self.assert_counters(self.physics, 3, 5)
+        self.assert_rollups(self.maths, 3, 2, {date(2025, 1, 1): (1, 1), date(2025, 2, 1): (2, 1)})
+
+        # Present -> absent and absent -> present only move the attended counter
+        summary = bulk_mark_attendance(self.user, [
+            {'course_id': self.maths.id, 'date': '2025-01-27', 'attended': False},
+            {'course_id': self.maths.id, 'date': '2025-02-03', 'attended': True},
+            {'course_id': self.physics.id, 'date': '2025-01-31', 'attended': False},
+        ])
+        self.assertEqual((summary['created'], summary['updated'], summary['unchanged']), (0, 3, 0))
+        self.assert_counters(self.maths, 10, 13)
+        self.assert_counters(self.physics, 2, 5)
+        self.assert_rollups(self.maths, 3, 2, {date(2025, 1, 1): (1, 0), date(2025, 2, 1): (2, 2)})
+        self.assert_rollups(self.physics, 1, 0, {date(2025, 1, 1): (1, 0)})
+        self.assertFalse(AttendanceRecord.objects.get(course=self.maths, date=date(2025, 1, 27)).attended)
+        self.assertEqual(list(find_drift()), [])
+
+    def test_later_entry_for_the_same_lecture_wins(self):
+        bulk_mark_attendance(self.user, [
+            {'course_id': self.maths.id, 'date': '2025-01-27', 'attended': True},
+            {'course_id': self.maths.id, 'date': '2025-01-27', 'attended': False},
+        ])
+        self.assert_counters(self.maths, 8, 11)
+        self.assert_rollups(self.maths, 1, 0, {date(2025, 1, 1): (1, 0)})
+
+    def test_unknown_course_changes_nothing(self):
+        other = Course.objects.create(user=User.objects.create_user('other'), name='Theirs')
+        with self.assertRaises(ValueError):
+            bulk_mark_attendance(self.user, [
+                {'course_id': self.maths.id, 'date': '2025-01-27', 'attended': True},
+                {'course_id': other.id, 'date': '2025-01-27', 'attended': True},
+            ])
+        self.assert_counters(self.maths, 8, 10)
+        self.assertFalse(AttendanceRecord.objects.exists())
+
+
+class FailingImporter(AttendanceImporter):
+    """Fails a chunk after writing it when the chunk has a row for ``fail_course``"""
+    fail_course = 'Broken'
+
+    def _write_records(self, rows, lectures):
+        super()._write_records(rows, lectures)
+        if any(row.course == self.fail_course for row in rows):
+            raise RuntimeError('write failed')
+
+
+class ImporterTest(TestCase):
+    """Chunks are written one transaction each and re-imported rows are not counted twice"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('importer')
+
+    def rows(self, *rows):
+        return list(enumerate(rows, 1))
+
+    def import_rows(self, rows, chunk_size=2, importer=None):
+        importer = importer or AttendanceImporter(create_users=True, default_username='importer')
+        for chunk in iter_chunks(rows, chunk_size):
+            importer.import_chunk(chunk)
+        return importer
+
+    def test_chunked_import(self):
+        importer = self.import_rows(self.rows(
+            {'course': 'Maths', 'day_of_week': 'monday', 'start_time': '09:00', 'end_time': '10:00'},
+            {'course': 'Maths', 'date': '2025-01-27', 'attended': 'present'},
+            {'course': 'Maths', 'date': '2025-02-03', 'attended': 'absent'},
+            {'course': 'Physics', 'date': '2025-01-28', 'attended': 'yes'},
+            # A schedule for a course created two chunks earlier
+            {'course': 'Physics', 'day_of_week': 'tuesday', 'start_time': '11:00', 'end_time': '12:00'},
+            {'username': 'newcomer', 'course': 'Maths', 'date': '2025-01-27', 'attended': '1'},
+            {'course': 'Maths', 'date': 'yesterday'},
+        ), chunk_size=2)
+        self.assertEqual(importer.stats['rows'], 7)
+        self.assertEqual(importer.stats['users_created'], 1)
+        self.assertEqual(importer.stats['courses_created'], 3)
+        self.assertEqual(importer.stats['schedules_written'], 2)
+        self.assertEqual(importer.stats['records_created'], 4)
+        self.assertEqual(importer.errors, [(7, "Invalid date 'yesterday'")])
+
+        maths = Course.objects.get(user=self.user, name='Maths')
+        physics = Course.objects.get(user=self.user, name='Physics')
+        self.assertTrue(maths.is_regular and physics.is_regular)
+        self.assertEqual((maths.attended_lectures, maths.total_lectures), (1, 2))
+        self.assertEqual((physics.attended_lectures, physics.total_lectures), (1, 1))
+        self.assertEqual(maths.rollup.total_records, 2)
+        self.assertEqual(
+            AttendanceRecord.objects.get(course=maths, date=date(2025, 1, 27)).schedule,
+            maths.schedules.get()
+        )
+        self.assertEqual(Course.objects.get(user__username='newcomer', name='Maths').attended_lectures, 1)
+        self.assertEqual(list(find_drift()), [])
+
+    def test_failing_chunk_is_rolled_back(self):
+        importer = FailingImporter(create_users=True, default_username='importer')
+        rows = self.rows(
+            {'course': 'Maths', 'date': '2025-01-27', 'attended': 'present'},
+            {'course': 'Maths', 'date': '2025-01-28', 'attended': 'present'},
+            {'username': 'newcomer', 'course': 'Physics', 'date': '2025-01-27', 'attended': 'present'},
+            {'course': 'Broken', 'date': '2025-01-27', 'attended': 'present'},
+        )
+        with self.assertRaises(RuntimeError):
+            self.import_rows(rows, importer=importer)
+
+        # The first chunk stays; nothing of the second (its user, courses or records) was written
+        self.assertEqual(set(Course.objects.values_list('name', flat=True)), {'Maths'})
+        self.assertFalse(User.objects.filter(username='newcomer').exists())
+        self.assertEqual(AttendanceRecord.objects.count(), 2)
+        self.assertEqual(Course.objects.get(name='Maths').total_lectures, 2)
+        self.assertEqual(importer.stats['rows'], 2)
+        self.assertEqual(importer.stats['users_created'], 0)
+        self.assertEqual(importer.stats['courses_created'], 1)
+
+        # The same importer retries the chunk once the failure is gone
+        importer.fail_course = None
+        importer.import_chunk(rows[2:])
+        self.assertEqual(Course.objects.get(user__username='newcomer', name='Physics').total_lectures, 1)
+        self.assertEqual(importer.stats['rows'], 4)
+        self.assertEqual(importer.stats['records_created'], 4)
+        self.assertEqual(list(find_drift()), [])
+
+    def test_duplicate_rows(self):
+        rows = self.rows(
+            {'course': 'Maths', 'day_of_week': 'monday', 'start_time': '09:00', 'end_time': '10:00'},
+            {'course': 'Maths', 'day_of_week': 'monday', 'start_time': '09:00', 'end_time': '10:30', 'room': 'B2'},
+            {'course': 'Maths', 'date': '2025-01-27', 'attended': 'present'},
+            # The same lecture twice in one chunk: the later row wins
+            {'course': 'Maths', 'date': '2025-02-03', 'attended': 'present'},
+            {'course': 'Maths', 'date': '2025-02-03', 'attended': 'absent'},
+            # ... and again in a later chunk
+            {'course': 'Maths', 'date': '2025-01-27', 'attended': 'present'},
+        )
+        importer = self.import_rows(rows, chunk_size=5)
+        self.assertEqual(importer.stats['schedules_written'], 1)
+        self.assertEqual(importer.stats['records_created'], 2)
+        self.assertEqual(importer.stats['records_unchanged'], 1)
+
+        maths = Course.objects.get(name='Maths')
+        schedule = maths.schedules.get()
+        self.assertEqual((schedule.end_time, schedule.room), (time(10, 30), 'B2'))
+        self.assertFalse(AttendanceRecord.objects.get(course=maths, date=date(2025, 2, 3)).attended)
+        self.assertEqual((maths.attended_lectures, maths.total_lectures), (1, 2))
+
+        # Importing the whole file again changes nothing
+        importer = self.import_rows(rows, chunk_size=5)
+        self.assertEqual(importer.stats['courses_created'], 0)
+        self.assertEqual(importer.stats['records_unchanged'], 3)
+        maths.refresh_from_db()
+        self.assertEqual((maths.attended_lectures, maths.total_lectures), (1, 2))
+        self.assertEqual((maths.rollup.total_records, maths.rollup.attended_records), (2, 1))
+        self.assertEqual(Course.objects.count(), 1)
+
+
+class TimetableInvalidationTest(TestCase):
+    """A change replaces the cached timetable's version token only once it commits"""
+
+    def test_bumped_on_commit(self):
+        user = User.objects.create_user('cached')
+        course = Course.objects.create(user=user, name='Maths', is_regular=True)
+        before = get_timetable_version(user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            LectureSchedule.objects.create(course=course, day_of_week='monday', start_time=time(9), end_time=time(10))
+            self.assertEqual(get_timetable_version(user.id), before)
+        self.assertNotEqual(get_timetable_version(user.id), before)
+
+
+class MaintenancePurgeTest(TestCase):
+    """The purges sweep in keyset batches and delete only rows from before the current week"""
+
+    def test_purge_past_slots(self):
+        timetable = Timetable.objects.create(user=User.objects.create_user('purge'))
+        week_start = current_week_start()
+        for days in range(-3, 2):
+            TimetableSlot.objects.create(
+                timetable=timetable, title=f'Slot {days}', date=week_start + timedelta(days=days),
+                start_time=time(8), end_time=time(9),
+            )
+        past = RecurringSlot.objects.create(
+            timetable=timetable, title='Ended', starts_on=week_start - timedelta(days=21),
+            ends_on=week_start - timedelta(days=7), start_time=time(18), end_time=time(19),
+        )
+        RecurringSlotException.objects.create(series=past, date=week_start - timedelta(days=14))
+
+        deleted = {label: list(delete_in_batches(queryset, batch_size=2)) for label, queryset in purge_queries()}
+        self.assertEqual(deleted, {
+            'purge_past_slots': [2, 1],
+            'purge_past_slot_exceptions': [1],
+            'purge_finished_recurring_slots': [1],
+        })
+        self.assertEqual(
+            sorted(TimetableSlot.objects.values_list('date', flat=True)), [week_start, week_start + timedelta(days=1)]
+        )
+        self.assertFalse(RecurringSlot.objects.exists())
+        # Clients drop past slots themselves
+        self.assertFalse(SyncTombstone.objects.exists())
+
+
+class PasswordHashIterationsTest(TestCase):
+    """PASSWORD_HASH_ITERATIONS can raise the PBKDF2 cost but never lower it below Django's default"""
+
+    def test_low_setting_does_not_downgrade(self):
+        user = User.objects.create_user('hashed', password='correct horse')
+        self.assertIn(f'pbkdf2_sha256${MIN_ITERATIONS}$', user.password)
+        with override_settings(PASSWORD_HASH_ITERATIONS=1000):
+            self.assertTrue(self.client.login(username='hashed', password='correct horse'))
+            user.set_password('battery staple')
+        self.assertIn(f'pbkdf2_sha256${MIN_ITERATIONS}$', user.password)
+        self.assertEqual(User.objects.get(pk=user.pk).password.split('$')[1], str(MIN_ITERATIONS))
+
+
+@override_settings(ROOT_URLCONF='tracker.tests')
+class AsyncLoginTest(TestCase):
+    """The async login view checks passwords off the event loop and behaves like the sync one"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('student', password='correct horse')
+
+    def post(self, password):
+        return async_to_sync(self.async_client.post)(
+            '/async/login/', {'username': 'student', 'password': password}, secure=True
+        )
+
+    def test_login(self):
+        response = self.post('correct horse')
+        self.assertRedirects(response, '/', fetch_redirect_response=False)
+        self.assertEqual(int(self.async_client.session['_auth_user_id']), self.user.pk)
+
+    def test_wrong_password_and_unknown_user(self):
+        self.assertContains(self.post('wrong'), 'Username/Password is incorrect.')
+        response = async_to_sync(self.async_client.post)(
+            '/async/login/', {'username': 'nobody', 'password': 'x'}, secure=True
+        )
+        self.assertContains(response, 'Username does not exist.')
+
+    def test_outdated_hash_is_upgraded(self):
+        with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']):
+            self.user.set_password('correct horse')
+            self.user.save()
+        self.assertEqual(self.post('correct horse').status_code, 302)
+        self.assertIn(f'pbkdf2_sha256${MIN_ITERATIONS}$', User.objects.get(pk=self.user.pk).password)
+
+
+class ExportStreamingTest(TestCase):
+    """Exports stream under WSGI and, with an async iterator, under ASGI"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('exporter')
+        course = Course.objects.create(user=self.user, name='Maths')
+        for day in range(1, 6):
+            AttendanceRecord.objects.create(course=course, date=date(2025, 1, day), attended=day % 2 == 1)
+        self.client.force_login(self.user)
+        self.async_client.cookies = self.client.cookies
+
+    def test_wsgi(self):
+        response = self.client.get('/export/attendance/', {'format': 'csv'}, secure=True)
+        self.assertFalse(response.is_async)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(lines[0].startswith('username,course_id,course,date'))
+
+    def test_asgi(self):
+        async def fetch():
+            response = await self.async_client.get('/export/attendance/', {'format': 'ndjson'}, secure=True)
+            return response, [chunk async for chunk in response.streaming_content]
+
+        response, chunks = async_to_sync(fetch)()
+        self.assertTrue(response.is_async)
+        rows = [json.loads(line) for line in b''.join(chunks).decode().splitlines()]
+        self.assertEqual([row['date'] for row in rows], [f'2025-01-0{day}' for day in range(1, 6)])
+        self.assertEqual([row['attended'] for row in rows], [True, False, True, False, True])
+
+
+@override_settings(ROOT_URLCONF='tracker.tests', REQUEST_METRICS=True)
+class AsyncRequestMetricsTest(TransactionTestCase):
+    """Under ASGI the queries run on other threads than the event loop's, and must still be counted"""
+
+    def setUp(self):
+        registry.reset()
+        cache.clear()
+        self.user = User.objects.create_user('metrics')
+        self.course = Course.objects.create(user=self.user, name='Maths', total_lectures=4, attended_lectures=3)
+        self.client.force_login(self.user)
+        self.async_client.cookies = self.client.cookies
+
+    def assert_queries_recorded(self, view):
+        stats = registry.snapshot()[view]
+        self.assertGreater(stats.queries, 0)
+        self.assertGreater(stats.db_duration, 0)
+
+    def test_async_views(self):
+        body = json.dumps({'course_id': self.course.id, 'action': 'increment'})
+        response = async_to_sync(self.async_client.post)(
+            '/async/update-attendance/', body, content_type='application/json', secure=True
+        )
+        self.assertTrue(response.json()['success'])
+        async_to_sync(self.async_client.get)('/async/api/suggestions/', secure=True)
+        self.assert_queries_recorded('async_update_attendance')
+        self.assert_queries_recorded('async_suggestions_api')
+
+    def test_sync_view_under_asgi(self):
+        response = async_to_sync(self.async_client.get)('/timetable/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assert_queries_recorded('timetable')
+
+
+@override_settings(ROOT_URLCONF='tracker.tests')
+class AsyncViewLoginTest(TestCase):
+    """Anonymous requests to the async JSON views are sent to the login page, as on the sync views"""
+
+    def test_anonymous_get_redirects(self):
+        for url in ('/update-attendance/', '/async/update-attendance/'):
+            response = async_to_sync(self.async_client.get)(url, secure=True)
+            self.assertEqual(response.status_code, 302, url)
+            self.assertTrue(response['Location'].startswith('/login/'), url)
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncApiTest(TestCase):
+    """Delta sync: cursors, tombstones, expired cursors and offline uploads"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('sync')
+        self.timetable = Timetable.objects.create(user=self.user)
+        self.course = Course.objects.create(user=self.user, name='Maths', total_lectures=0, attended_lectures=0)
+        self.other = Course.objects.create(user=self.user, name='Physics', total_lectures=0, attended_lectures=0)
+        self.schedule = LectureSchedule.objects.create(
+            course=self.course, day_of_week='monday', start_time=time(9), end_time=time(10)
+        )
+        self.record = AttendanceRecord.objects.create(course=self.course, date=date(2025, 1, 6), attended=True)
+        self.slot = TimetableSlot.objects.create(
+            timetable=self.timetable, title='Study', date=date(2025, 1, 7), start_time=time(14), end_time=time(15)
+        )
+        self.series = RecurringSlot.objects.create(
+            timetable=self.timetable, title='Gym', starts_on=date(2025, 1, 8), start_time=time(18), end_time=time(19)
+        )
+        self.client.force_login(self.user)
+
+    def sync(self, since=None):
+        response = self.client.get('/api/v1/sync/', {'since': since} if since else {}, secure=True)
+        data = response.json()
+        self.assertTrue(data['success'], data)
+        return data
+
+    def ids(self, data, collection):
+        return [row['id'] for row in data[collection]]
+
+    def test_cursor_round_trip(self):
+        first = self.sync()
+        self.assertTrue(first['full'])
+        self.assertEqual(self.ids(first, 'courses'), [self.course.id, self.other.id])
+        self.assertEqual(self.ids(first, 'recurring'), [self.series.id])
+
+        unchanged = self.sync(first['cursor'])
+        self.assertFalse(unchanged['full'])
+        for collection in ('courses', 'schedules', 'slots', 'recurring', 'records'):
+            self.assertEqual(unchanged[collection], [], collection)
+
+        self.other.name = 'Chemistry'
+        self.other.save()
+        RecurringSlotException.objects.create(series=self.series, date=date(2025, 1, 15))
+        changed = self.sync(unchanged['cursor'])
+        self.assertEqual(self.ids(changed, 'courses'), [self.other.id])
+        self.assertEqual(changed['courses'][0]['name'], 'Chemistry')
+        self.assertEqual(changed['recurring'][0]['skipped'], ['2025-01-15'])
+        self.assertEqual(self.sync(changed['cursor'])['courses'], [])
+
+    def test_tombstones(self):
+        cursor = self.sync()['cursor']
+        expected = {
+            'courses': [self.other.id],
+            'schedules': [self.schedule.id],
+            'slots': [self.slot.id],
+            'recurring': [self.series.id],
+            'records': [self.record.id],
+        }
+        for row in (self.schedule, self.record, self.slot, self.series, self.other):
+            row.delete()
+        self.assertEqual(self.sync(cursor)['deleted'], expected)
+
+    def test_course_children_get_no_tombstones(self):
+        cursor = self.sync()['cursor']
+        course_id = self.course.id
+        self.course.delete()
+        deleted = self.sync(cursor)['deleted']
+        self.assertEqual(deleted['courses'], [course_id])
+        self.assertEqual(deleted['schedules'], [])
+        self.assertEqual(deleted['records'], [])
+
+    @override_settings(SYNC_TOMBSTONE_DAYS=30)
+    def test_expired_cursor_gets_everything(self):
+        expired = encode_cursor(timezone.now() - timedelta(days=31))
+        data = self.sync(expired)
+        self.assertTrue(data['full'])
+        self.assertEqual(self.ids(data, 'courses'), [self.course.id, self.other.id])
+        self.assertEqual(self.ids(data, 'records'), [self.record.id])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/v1/sync/', {'since': 'yesterday'}, secure=True)
+        self.assertFalse(response.json()['success'])
+
+    def upload(self, marks, cursor):
+        response = self.client.post(
+            '/api/v1/sync/attendance/', json.dumps({'cursor': cursor, 'marks': marks}),
+            content_type='application/json', secure=True,
+        )
+        data = response.json()
+        self.assertTrue(data['success'], data)
+        return data
+
+    def test_upload_rejects_conflicting_marks(self):
+        cursor = self.sync()['cursor']
+        # Changed on the server after the client's last sync
+        self.record.attended = False
+        self.record.save()
+        data = self.upload([
+            {'course_id': self.course.id, 'date': '2025-01-06', 'attended': True},
+            {'course_id': self.course.id, 'date': '2025-01-13', 'attended': True},
+        ], cursor)
+        self.assertEqual(data['conflicts'], [{'course_id': self.course.id, 'date': '2025-01-06', 'attended': False}])
+        self.assertEqual(data['created'], 1)
+        self.assertFalse(AttendanceRecord.objects.get(pk=self.record.pk).attended)
+        self.assertTrue(AttendanceRecord.objects.get(course=self.course, date=date(2025, 1, 13)).attended)
+
+    def test_upload_applies_marks_agreeing_with_the_server(self):
+        cursor = self.sync()['cursor']
+        self.record.attended = False
+        self.record.save()
+        data = self.upload([{'course_id': self.course.id, 'date': '2025-01-06', 'attended': False}], cursor)
+        self.assertEqual(data['conflicts'], [])
+        self.assertEqual(data['unchanged'], 1)
+
+    def test_bulk_mark_resends_only_courses_it_changed(self):
+        cursor = self.sync()['cursor']
+        self.upload([
+            {'course_id': self.course.id, 'date': '2025-01-13', 'attended': True},
+            {'course_id': self.other.id, 'date': '2025-01-06', 'attended': True},
+            {'course_id': self.other.id, 'date': '2025-01-06', 'attended': True},
+        ], None)
+        self.upload([{'course_id': self.course.id, 'date': '2025-01-13', 'attended': True}], None)
+        changed = self.sync(cursor)
+        self.assertEqual(self.ids(changed, 'courses'), [self.course.id, self.other.id])
+        cursor = changed['cursor']
+        # Re-marking what is already recorded moves no counters
+        self.upload([
+            {'course_id': self.course.id, 'date': '2025-01-13', 'attended': True},
+            {'course_id': self.other.id, 'date': '2025-01-06', 'attended': True},
+        ], None)
+        self.assertEqual(self.sync(cursor)['courses'], [])
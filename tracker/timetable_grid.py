@@ -0,0 +1,48 @@
+from .models import LectureSchedule
+
+# Grid geometry used by templates/tracker/timetable_grid.html
+FIRST_HOUR = 6
+LAST_HOUR = 22
+SLOT_MINUTES = 30
+SLOT_HEIGHT_PX = 40
+
+
+def get_time_slots():
+    """Half-hour labels from 6 AM to 10:30 PM"""
+    time_slots = []
+    for hour in range(FIRST_HOUR, LAST_HOUR + 1):
+        time_slots.append(f"{hour:02d}:00")
+        time_slots.append(f"{hour:02d}:30")
+    return time_slots
+
+
+def block_height(start_time, end_time):
+    """Pixel height of a block: whole half-hour slots it spans times the slot height"""
+    minutes = (end_time.hour * 60 + end_time.minute) - (start_time.hour * 60 + start_time.minute)
+    return minutes // SLOT_MINUTES * SLOT_HEIGHT_PX
+
+
+def build_timetable_grid(weekly_schedule, time_slots=None):
+    """Bucket a weekly schedule into day -> slot -> items for rendering
+
+    Every item is placed in the cell matching its start time and gets its
+    block ``height`` precomputed, so the template only walks each cell's own
+    items. As before, items that do not start exactly on a slot boundary
+    (or fall outside the displayed hours) are not drawn on the grid.
+    """
+    if time_slots is None:
+        time_slots = get_time_slots()
+    slot_index = {label: index for index, label in enumerate(time_slots)}
+
+    grid = []
+    for day_code, day_name in LectureSchedule.DAYS_OF_WEEK:
+        cells = [{'time': label, 'items': []} for label in time_slots]
+        for item in weekly_schedule.get(day_code, []):
+            start_time = item['start_time']
+            index = slot_index.get(f"{start_time.hour:02d}:{start_time.minute:02d}")
+            if index is None:
+                continue
+            item['height'] = block_height(start_time, item['end_time'])
+            cells[index]['items'].append(item)
+        grid.append({'code': day_code, 'name': day_name, 'cells': cells})
+    return grid
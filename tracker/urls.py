@@ -1,12 +1,16 @@
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from . import views
+from . import async_views, views
+
+# Same URLs and names either way (see ASYNC_VIEWS); login is switched along with the JSON views
+json_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     # Authentication URLs
     path('', views.dashboard, name='dashboard'),
     path('register/', views.register_view, name='register'),
-    path('login/', views.login_view, name='login'),
+    path('login/', json_views.login_view, name='login'),
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
     
     # Course Management URLs
@@ -15,15 +19,18 @@ urlpatterns = [
     path('edit-course/<int:course_id>/', views.edit_course, name='edit_course'),
     path('delete-course/<int:course_id>/', views.delete_course, name='delete_course'),
     path('course/<int:course_id>/', views.course_detail, name='course_detail'),
+    path('semester/', views.update_semester, name='update_semester'),
     
     # Timetable URLs
     path('timetable/', views.timetable_view, name='timetable'),
     path('book-slot/', views.book_manual_slot, name='book_manual_slot'),
     path('delete-slot/<int:slot_id>/', views.delete_manual_slot, name='delete_manual_slot'),
+    path('recurring-slot/<int:series_id>/skip/<str:date_str>/', views.skip_recurring_slot, name='skip_recurring_slot'),
+    path('recurring-slot/<int:series_id>/delete/', views.delete_recurring_slot, name='delete_recurring_slot'),
     
     # Attendance URLs
-    path('update-attendance/', views.update_attendance, name='update_attendance'),
-    path('mark-attendance/', views.mark_attendance_for_date, name='mark_attendance_for_date'),
+    path('update-attendance/', json_views.update_attendance, name='update_attendance'),
+    path('mark-attendance/', json_views.mark_attendance_for_date, name='mark_attendance_for_date'),
     
     # Schedule URLs
     path('course/<int:course_id>/add-schedule-detail/', views.add_schedule, name='add_schedule'),
@@ -31,5 +38,20 @@ urlpatterns = [
     path('delete-schedule/<int:schedule_id>/', views.delete_schedule, name='delete_schedule'),
     
     # API URLs
-    path('api/suggestions/', views.suggestions_api, name='suggestions_api'),
+    path('api/suggestions/', json_views.suggestions_api, name='suggestions_api'),
+    path('api/attendance/bulk/', views.bulk_attendance_api, name='bulk_attendance_api'),
+    path('api/free-slots/', views.free_slots_api, name='free_slots_api'),
+    path('api/forecast/', views.forecast_api, name='forecast_api'),
+    path('api/v1/sync/', views.sync_api, name='sync_api'),
+    path('api/v1/sync/attendance/', views.sync_upload_api, name='sync_upload_api'),
+    
+    # Export URLs
+    path('export/attendance/', views.export_attendance, name='export_attendance'),
+    path('export/attendance/all/', views.export_all_attendance, name='export_all_attendance'),
+    
+    # Offline support
+    path('sw.js', views.service_worker, name='service_worker'),
+    
+    # Monitoring URLs
+    path('internal/metrics', views.internal_metrics, name='internal_metrics'),
 ]
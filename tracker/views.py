@@ -3,18 +3,42 @@ from django.contrib.auth import login, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib import messages
-from django.http import JsonResponse
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.staticfiles import finders
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
-from django.db import models
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_http_methods
+from django.db import models, transaction
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
 import json
 from datetime import datetime, date, timedelta
-from .models import Course, LectureSchedule, AttendanceRecord, Timetable, TimetableSlot
+from .models import (
+    Course, Holiday, LectureSchedule, AttendanceRecord, MonthlyAttendanceRollup, RecurringSlot, RecurringSlotException,
+    ThresholdPolicy, Timetable, TimetableSlot
+)
+from .attendance import apply_counter_action, bulk_mark_attendance, mark_attendance
+from .dashboard import get_dashboard_data
+from .export import FORMATS, aiter_export, iter_export
+from .forecast import get_forecast
+from .free_slots import find_free_slots
+from .intervals import find_conflicts
+from .metrics import render_prometheus
+from .suggestions import get_suggestions, suggestions_etag, suggestions_last_modified
+from .sync import get_changes, upload_marks
+from .timetable_grid import build_timetable_grid, get_time_slots
 from django.contrib.auth import login, authenticate
 from django.contrib.auth.models import User
 
+BULK_ATTENDANCE_MAX_ENTRIES = 10000
+RECURRING_CHECK_WEEKS = 16
+FREE_SLOTS_MAX_DAYS = 28
+FORECAST_MAX_DAYS = 2 * 366
+SYNC_UPLOAD_MAX_MARKS = 1000
+
 def register_view(request):
     if request.method == 'POST':
         form = UserCreationForm(request.POST)
@@ -35,98 +59,44 @@ def login_view(request):
         username = request.POST.get('username')
         password = request.POST.get('password')
         
-        # Check if username exists
-        try:
-            user_exists = User.objects.get(username=username)
-            # Username exists, now check password
-            user = authenticate(request, username=username, password=password)
+        # Check if username exists; the backend checks the password of this same row
+        user = User.objects.filter(username=username).first()
+        if user is None:
+            messages.error(request, 'Username does not exist.')
+        else:
+            user = authenticate(request, user=user, password=password)
             if user is not None:
                 login(request, user)
                 return redirect('dashboard')
             else:
                 messages.error(request, 'Username/Password is incorrect.')
-        except User.DoesNotExist:
-            messages.error(request, 'Username does not exist.')
     
     return render(request, 'registration/login.html')
 
 @login_required
 def dashboard(request):
-    courses = Course.objects.filter(user=request.user).order_by('name')
-    
-    # Get or create timetable and refresh if needed
+    # Weekly refresh and purges happen in manage.py run_maintenance
     timetable, created = Timetable.objects.get_or_create(user=request.user)
-    if timetable.refresh_weekly():
-        messages.info(request, 'Timetable refreshed for the new week!')
-    
-    # Calculate overall stats
-    total_courses = courses.count()
-    regular_courses = courses.filter(is_regular=True)
-    courses_below_75 = sum(1 for course in regular_courses if course.attendance_percentage < 75)
-    
-    # Get upcoming lectures with suggestions (only for regular courses)
-    upcoming_lectures = timetable.get_upcoming_lectures(days=3)[:5]  # Next 5 lectures
-    
-    # Get suggestions for each regular course (GROUP BY COURSE - NO DUPLICATES)
-    suggestions = []
-    processed_courses = set()  # Track which courses we've already processed
-    
-    for course in regular_courses:
-        if course.id in processed_courses:
-            continue  # Skip if we've already processed this course
-            
-        processed_courses.add(course.id)
-        
-        if course.is_below_threshold:
-            needed = course.lectures_needed_for_75_percent()
-            next_lectures = course.get_next_lectures(days=7)
-            next_lecture_text = ""
-            if next_lectures:
-                next_lecture = next_lectures[0]
-                next_lecture_text = f" (Next: {next_lecture['schedule'].get_day_of_week_display()} {next_lecture['schedule'].start_time})"
-            
-            suggestions.append({
-                'course': course.name,
-                'type': 'attend',
-                'message': f'Attend next {needed} lecture(s) to reach 75%{next_lecture_text}',
-                'priority': 'high'
-            })
-        else:
-            can_skip = course.lectures_can_skip()
-            if can_skip > 0:
-                suggestions.append({
-                    'course': course.name,
-                    'type': 'skip',
-                    'message': f'You can skip {can_skip} lecture(s) and stay above 75%',
-                    'priority': 'low'
-                })
     
-    context = {
-        'courses': courses,
-        'regular_courses': regular_courses,
-        'total_courses': total_courses,
-        'courses_below_75': courses_below_75,
-        'suggestions': suggestions,
-        'upcoming_lectures': upcoming_lectures,
-        'today_schedule': timetable.get_today_schedule(),
-    }
+    # Course stats, suggestions and upcoming lectures from a fixed number of queries
+    context = get_dashboard_data(request.user, timetable, upcoming_days=3, upcoming_limit=5)
+    context['today_schedule'] = timetable.get_today_schedule()
     return render(request, 'tracker/dashboard.html', context)
 
 @login_required
 def timetable_view(request):
     """Display weekly timetable"""
     timetable, created = Timetable.objects.get_or_create(user=request.user)
-    if timetable.refresh_weekly():
-        messages.info(request, 'Timetable refreshed for the new week!')
     
-    weekly_schedule = timetable.get_weekly_schedule()
-    upcoming_lectures = timetable.get_upcoming_lectures(days=7)
+    regular_courses = list(
+        Course.objects.filter(user=request.user, is_regular=True).with_thresholds().prefetch_related('schedules')
+    )
+    weekly_schedule = timetable.get_weekly_schedule(courses=regular_courses)
+    upcoming_lectures = timetable.get_upcoming_lectures(days=7, courses=regular_courses)
     
-    # Time slots for display (6 AM to 10 PM)
-    time_slots = []
-    for hour in range(6, 23):  # 6 AM to 10 PM
-        time_slots.append(f"{hour:02d}:00")
-        time_slots.append(f"{hour:02d}:30")
+    # Time slots for display (6 AM to 10 PM), with items pre-bucketed per slot
+    time_slots = get_time_slots()
+    timetable_grid = build_timetable_grid(weekly_schedule, time_slots)
     
     # Get current week dates for manual slot booking
     current_week_start = timetable.get_current_week_start()
@@ -139,13 +109,43 @@ def timetable_view(request):
         'weekly_schedule': weekly_schedule,
         'upcoming_lectures': upcoming_lectures,
         'time_slots': time_slots,
+        'timetable_grid': timetable_grid,
         'days_of_week': LectureSchedule.DAYS_OF_WEEK,
         'week_dates': week_dates,
         'current_week_start': current_week_start,
         'slot_types': TimetableSlot.SLOT_TYPES,
+        'repeat_options': RecurringSlot.FREQUENCIES,
     }
     return render(request, 'tracker/timetable.html', context)
 
+@login_required
+@require_http_methods(["POST"])
+def update_semester(request):
+    """Set the semester end date and the holidays (one "YYYY-MM-DD name" per line) used for forecasts"""
+    timetable, _ = Timetable.objects.get_or_create(user=request.user)
+    try:
+        end_str = request.POST.get('semester_end', '').strip()
+        semester_end = datetime.strptime(end_str, '%Y-%m-%d').date() if end_str else None
+        holidays = {}
+        for line in request.POST.get('holidays', '').splitlines():
+            if line.strip():
+                date_str, _, name = line.strip().partition(' ')
+                holidays[datetime.strptime(date_str, '%Y-%m-%d').date()] = name.strip()[:100]
+    except ValueError as e:
+        messages.error(request, f'Invalid date: {e}')
+        return redirect('dashboard')
+    
+    timetable.semester_end = semester_end
+    timetable.save(update_fields=['semester_end', 'updated_at'])
+    # The form lists upcoming holidays only, so past ones are left alone
+    today = timezone.now().date()
+    timetable.holidays.filter(date__gte=today).delete()
+    Holiday.objects.bulk_create([
+        Holiday(timetable=timetable, date=day, name=name) for day, name in sorted(holidays.items()) if day >= today
+    ])
+    messages.success(request, 'Semester dates updated.')
+    return redirect('dashboard')
+
 @login_required
 def add_course(request):
     if request.method == 'POST':
@@ -245,26 +245,57 @@ def book_manual_slot(request):
                 messages.error(request, 'End time must be after start time')
                 return redirect('timetable')
             
-            # Create the slot
-            slot = TimetableSlot(
-                timetable=timetable,
-                title=title,
-                slot_type=slot_type,
-                date=slot_date,
-                start_time=start_time,
-                end_time=end_time,
-                notes=notes
-            )
-            
-            # Check for conflicts
-            has_conflict, conflict_message = slot.has_conflict()
-            if has_conflict:
-                messages.error(request, f'Time slot conflict: {conflict_message}')
-                return redirect('timetable')
-            
-            # Validate and save
-            slot.full_clean()
-            slot.save()
+            repeat = request.POST.get('repeat', '')
+            if not repeat:
+                slot = TimetableSlot(
+                    timetable=timetable,
+                    title=title,
+                    slot_type=slot_type,
+                    date=slot_date,
+                    start_time=start_time,
+                    end_time=end_time,
+                    notes=notes
+                )
+                
+                # Check for conflicts
+                has_conflict, conflict_message = slot.has_conflict()
+                if has_conflict:
+                    messages.error(request, f'Time slot conflict: {conflict_message}')
+                    return redirect('timetable')
+                
+                # Validate and save
+                slot.full_clean()
+                slot.save()
+            else:
+                until_str = request.POST.get('repeat_until')
+                series = RecurringSlot(
+                    timetable=timetable,
+                    title=title,
+                    slot_type=slot_type,
+                    start_time=start_time,
+                    end_time=end_time,
+                    interval_weeks=int(repeat),
+                    starts_on=slot_date,
+                    ends_on=datetime.strptime(until_str, '%Y-%m-%d').date() if until_str else None,
+                    notes=notes
+                )
+                series.full_clean(exclude=['day_of_week'])
+                
+                # The series' next occurrences are checked against one in-memory index
+                horizon = slot_date + timedelta(weeks=RECURRING_CHECK_WEEKS)
+                occurrences = [
+                    TimetableSlot(timetable=timetable, title=title, date=occurrence_date,
+                                  start_time=start_time, end_time=end_time)
+                    for occurrence_date in series.occurrences(slot_date, horizon)
+                ]
+                conflicts = find_conflicts(timetable, occurrences)
+                if conflicts:
+                    slot, conflict_message = conflicts[0]
+                    more = f' (and {len(conflicts) - 1} more)' if len(conflicts) > 1 else ''
+                    messages.error(request, f'Time slot conflict on {slot.date:%b %d}: {conflict_message}{more}')
+                    return redirect('timetable')
+                
+                series.save()
             
             messages.success(request, f'Time slot "{title}" booked successfully!')
             
@@ -284,6 +315,30 @@ def delete_manual_slot(request, slot_id):
     messages.success(request, f'Time slot "{slot_title}" deleted successfully!')
     return redirect('timetable')
 
+@login_required
+def skip_recurring_slot(request, series_id, date_str):
+    """Skip one occurrence of a recurring slot"""
+    series = get_object_or_404(RecurringSlot, id=series_id, timetable__user=request.user)
+    try:
+        skip_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        raise Http404('Invalid date')
+    if not series.occurs_on(skip_date):
+        messages.error(request, f'"{series.title}" does not take place on {skip_date:%b %d}.')
+        return redirect('timetable')
+    RecurringSlotException.objects.get_or_create(series=series, date=skip_date)
+    messages.success(request, f'"{series.title}" skipped on {skip_date:%b %d}.')
+    return redirect('timetable')
+
+@login_required
+def delete_recurring_slot(request, series_id):
+    """Delete a recurring slot and all of its occurrences"""
+    series = get_object_or_404(RecurringSlot, id=series_id, timetable__user=request.user)
+    series_title = series.title
+    series.delete()
+    messages.success(request, f'Recurring slot "{series_title}" deleted successfully!')
+    return redirect('timetable')
+
 @login_required
 def edit_course(request, course_id):
     course = get_object_or_404(Course, id=course_id, user=request.user)
@@ -294,11 +349,21 @@ def edit_course(request, course_id):
         course.attended_lectures = int(request.POST.get('attended_lectures', 0))
         was_regular = course.is_regular
         course.is_regular = request.POST.get('is_regular') == 'on'
+        threshold = request.POST.get('threshold', '').strip()
+        threshold = int(threshold) if threshold else None
         
         if course.attended_lectures > course.total_lectures:
             messages.error(request, 'Attended lectures cannot exceed total lectures.')
+        elif threshold is not None and not 1 <= threshold <= 99:
+            messages.error(request, 'Required attendance must be between 1 and 99%.')
         else:
-            course.save()
+            with transaction.atomic():
+                course.save()
+                # An empty threshold falls back to the user's policy, else the institution default in settings
+                if threshold is None:
+                    ThresholdPolicy.objects.filter(course=course).delete()
+                else:
+                    ThresholdPolicy.objects.update_or_create(course=course, defaults={'threshold': threshold})
             messages.success(request, 'Course updated successfully!')
             
             # If course became regular, redirect to add schedule
@@ -326,27 +391,17 @@ def update_attendance(request):
         course_id = data.get('course_id')
         action = data.get('action')
         
-        course = get_object_or_404(Course, id=course_id, user=request.user)
-        
-        if action == 'increment':
-            course.attended_lectures += 1
-            course.total_lectures += 1
-        elif action == 'decrement' and course.attended_lectures > 0:
-            course.attended_lectures -= 1
-        elif action == 'add_total':
-            course.total_lectures += 1
-        elif action == 'remove_total' and course.total_lectures > 0:
-            course.total_lectures -= 1
-            if course.attended_lectures > course.total_lectures:
-                course.attended_lectures = course.total_lectures
-        
-        course.save()
+        try:
+            course = apply_counter_action(request.user, course_id, action)
+        except Course.DoesNotExist:
+            raise Http404('No Course matches the given query.')
         
         return JsonResponse({
             'success': True,
             'attendance_percentage': course.attendance_percentage,
             'attended_lectures': course.attended_lectures,
             'total_lectures': course.total_lectures,
+            'threshold': course.threshold,
             'is_below_threshold': course.is_below_threshold
         })
     
@@ -355,17 +410,19 @@ def update_attendance(request):
 
 @login_required
 def course_detail(request, course_id):
-    course = get_object_or_404(Course, id=course_id, user=request.user)
+    course = get_object_or_404(Course.objects.with_thresholds(), id=course_id, user=request.user)
     schedules = LectureSchedule.objects.filter(course=course)
     recent_records = AttendanceRecord.objects.filter(course=course)[:10]
+    monthly_rollups = MonthlyAttendanceRollup.objects.filter(course=course).order_by('-month')[:6]
     upcoming_lectures = course.get_next_lectures(days=14) if course.is_regular else []
     
     context = {
         'course': course,
         'schedules': schedules,
         'recent_records': recent_records,
+        'monthly_rollups': monthly_rollups,
         'upcoming_lectures': upcoming_lectures,
-        'lectures_needed': course.lectures_needed_for_75_percent() if course.is_regular else 0,
+        'lectures_needed': course.lectures_needed() if course.is_regular else 0,
         'lectures_can_skip': course.lectures_can_skip() if course.is_regular else 0,
         'days_of_week': LectureSchedule.DAYS_OF_WEEK,
     }
@@ -442,32 +499,8 @@ def mark_attendance_for_date(request):
         course = get_object_or_404(Course, id=course_id, user=request.user)
         attendance_date = datetime.strptime(date_str, '%Y-%m-%d').date()
         
-        # Create or update attendance record
-        record, created = AttendanceRecord.objects.get_or_create(
-            course=course,
-            date=attendance_date,
-            defaults={'attended': attended}
-        )
-        
-        if not created:
-            # Update existing record
-            old_attended = record.attended
-            record.attended = attended
-            record.save()
-            
-            # Update course totals
-            if old_attended != attended:
-                if attended and not old_attended:
-                    course.attended_lectures += 1
-                elif not attended and old_attended:
-                    course.attended_lectures -= 1
-        else:
-            # New record
-            if attended:
-                course.attended_lectures += 1
-            course.total_lectures += 1
-        
-        course.save()
+        # Create or update attendance record and adjust the counters atomically
+        course = mark_attendance(course, attendance_date, attended)
         
         return JsonResponse({
             'success': True,
@@ -480,36 +513,180 @@ def mark_attendance_for_date(request):
         return JsonResponse({'success': False, 'error': str(e)})
 
 @login_required
-def suggestions_api(request):
-    courses = Course.objects.filter(user=request.user, is_regular=True)
-    timetable, _ = Timetable.objects.get_or_create(user=request.user)
+@csrf_exempt
+@require_http_methods(["POST"])
+def bulk_attendance_api(request):
+    """Mark attendance for many courses/dates in one request
+
+    Body: {"entries": [{"course_id": 1, "date": "2025-01-06", "attended": true},
+                       {"date": "2025-01-07", "attended": false}, ...]}
+    An entry without course_id marks every scheduled lecture on that date.
+    """
+    try:
+        data = json.loads(request.body)
+        entries = data.get('entries')
+        if not isinstance(entries, list):
+            raise ValueError('"entries" must be a list.')
+        if len(entries) > BULK_ATTENDANCE_MAX_ENTRIES:
+            raise ValueError(f'At most {BULK_ATTENDANCE_MAX_ENTRIES} entries per request.')
+        
+        summary = bulk_mark_attendance(request.user, entries)
+        return JsonResponse({'success': True, **summary})
     
-    suggestions = []
-    upcoming_lectures = timetable.get_upcoming_lectures(days=7)
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+@login_required
+def free_slots_api(request):
+    """Ranked free time blocks for booking a manual slot
+
+    Query: duration (minutes, required), from/to (YYYY-MM-DD, default the
+    next 7 days), prefer_from/prefer_to (HH:MM, optional), limit.
+    """
+    try:
+        duration = int(request.GET.get('duration', ''))
+        if not 5 <= duration <= 24 * 60:
+            raise ValueError('duration must be between 5 and 1440 minutes.')
+        
+        today = timezone.now().date()
+        start = datetime.strptime(request.GET['from'], '%Y-%m-%d').date() if request.GET.get('from') else today
+        end = datetime.strptime(request.GET['to'], '%Y-%m-%d').date() if request.GET.get('to') else start + timedelta(days=6)
+        if end < start or (end - start).days >= FREE_SLOTS_MAX_DAYS:
+            raise ValueError(f'"to" must be on or after "from" and within {FREE_SLOTS_MAX_DAYS} days of it.')
+        
+        prefer_start = prefer_end = None
+        if request.GET.get('prefer_from') and request.GET.get('prefer_to'):
+            prefer_start = datetime.strptime(request.GET['prefer_from'], '%H:%M').time()
+            prefer_end = datetime.strptime(request.GET['prefer_to'], '%H:%M').time()
+            if prefer_end <= prefer_start:
+                raise ValueError('prefer_to must be after prefer_from.')
+        limit = min(int(request.GET.get('limit', 10)), 50)
+        
+        timetable, _ = Timetable.objects.get_or_create(user=request.user)
+        free_slots = find_free_slots(
+            timetable, duration, start, end, prefer_start, prefer_end,
+            now=timezone.now(), limit=limit
+        )
+        return JsonResponse({'success': True, 'duration': duration, 'free_slots': free_slots})
     
-    # Group by course to avoid duplicates
-    course_suggestions = {}
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(
+    etag_func=lambda request: suggestions_etag(request.user.id),
+    last_modified_func=lambda request: suggestions_last_modified(request.user.id),
+)
+def suggestions_api(request):
+    """Next-lecture suggestion per regular course
+
+    Polls that send back the ETag get a 304 from the cache alone until the
+    user's courses, lectures or attendance change, or the day turns over.
+    """
+    return JsonResponse({'suggestions': get_suggestions(request.user.id)})
+
+@login_required
+def forecast_api(request):
+    """Semester forecast per regular course (?until=YYYY-MM-DD, default: the semester end)"""
+    try:
+        until = datetime.strptime(request.GET['until'], '%Y-%m-%d').date() if request.GET.get('until') else None
+        if until is not None and (until - timezone.now().date()).days > FORECAST_MAX_DAYS:
+            raise ValueError(f'"until" must be within {FORECAST_MAX_DAYS} days.')
+        end, forecasts = get_forecast(request.user, until=until)
+        if end is None:
+            raise ValueError('Set a semester end date or pass "until".')
+        return JsonResponse({'success': True, 'until': end, 'forecasts': forecasts})
     
-    for lecture_data in upcoming_lectures:
-        course = lecture_data['course']
-        lecture_info = lecture_data['lecture_info']
-        suggestion = lecture_data['suggestion']
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+@login_required
+def sync_api(request):
+    """Courses, lectures, manual and recurring slots and attendance records changed since ?since=<cursor> (see tracker.sync)
+
+    Without ``since`` (or with an expired cursor) everything is returned
+    with "full": true; pass the returned "cursor" as ``since`` next time.
+    """
+    try:
+        return JsonResponse({'success': True, **get_changes(request.user, request.GET.get('since'))})
+    
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+@login_required
+@csrf_exempt
+@require_http_methods(["POST"])
+def sync_upload_api(request):
+    """Apply attendance marks made offline in one request
+
+    Body: {"cursor": "<cursor of the last sync>",
+           "marks": [{"course_id": 1, "date": "2025-01-06", "attended": true}, ...]}
+    Marks for records that changed on the server since the cursor are not
+    applied and come back under "conflicts" with the server's value.
+    """
+    try:
+        data = json.loads(request.body)
+        marks = data.get('marks')
+        if not isinstance(marks, list):
+            raise ValueError('"marks" must be a list.')
+        if len(marks) > SYNC_UPLOAD_MAX_MARKS:
+            raise ValueError(f'At most {SYNC_UPLOAD_MAX_MARKS} marks per request.')
         
-        # Only add if we haven't seen this course yet
-        if course.id not in course_suggestions:
-            course_suggestions[course.id] = {
-                'course_id': course.id,
-                'course_name': course.name,
-                'type': suggestion['type'],
-                'message': suggestion['message'],
-                'current_percentage': course.attendance_percentage,
-                'lecture_date': lecture_info['date'].strftime('%Y-%m-%d'),
-                'lecture_time': lecture_info['schedule'].start_time.strftime('%H:%M'),
-                'lecture_day': lecture_info['schedule'].get_day_of_week_display(),
-                'is_today': lecture_info['is_today'],
-                'days_from_now': lecture_info['days_from_now']
-            }
+        summary = upload_marks(request.user, marks, cursor=data.get('cursor'))
+        return JsonResponse({'success': True, **summary})
     
-    suggestions = list(course_suggestions.values())
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+@cache_control(no_cache=True)
+def service_worker(request):
+    """static/js/sw.js served from the site root, so it may handle every page and not just /static/js/"""
+    path = finders.find('js/sw.js')
+    if path is None:
+        raise Http404('Service worker not found')
+    with open(path, 'rb') as script:
+        return HttpResponse(script.read(), content_type='application/javascript')
+
+def _export_response(request, records, filename):
+    """Stream records as CSV or NDJSON, filtered by the course/from/to query parameters"""
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in FORMATS:
+        return HttpResponseBadRequest(f"Unknown format; choose from {', '.join(FORMATS)}")
+    try:
+        if request.GET.get('course'):
+            records = records.filter(course_id=int(request.GET['course']))
+        if request.GET.get('from'):
+            records = records.filter(date__gte=datetime.strptime(request.GET['from'], '%Y-%m-%d').date())
+        if request.GET.get('to'):
+            records = records.filter(date__lte=datetime.strptime(request.GET['to'], '%Y-%m-%d').date())
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
     
-    return JsonResponse({'suggestions': suggestions})
+    content_type, extension, encoder = FORMATS[export_format]
+    # ASGI would buffer a sync iterator whole (see tracker.export)
+    lines = aiter_export if isinstance(request, ASGIRequest) else iter_export
+    response = StreamingHttpResponse(lines(records, export_format), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    return response
+
+@login_required
+def export_attendance(request):
+    """Download the user's attendance history (?format=csv|ndjson&course=&from=&to=)"""
+    records = AttendanceRecord.objects.filter(course__user=request.user)
+    return _export_response(request, records, f'attendance-{request.user.username}')
+
+@staff_member_required
+def export_all_attendance(request):
+    """Staff-only download of every user's attendance history (?user=<username> to narrow it)"""
+    records = AttendanceRecord.objects.all()
+    if request.GET.get('user'):
+        records = records.filter(course__user__username=request.GET['user'])
+    return _export_response(request, records, 'attendance-all')
+
+@staff_member_required
+def internal_metrics(request):
+    """Staff-only per-view request metrics in the Prometheus text format"""
+    if not settings.REQUEST_METRICS:
+        raise Http404('Request metrics are disabled (set REQUEST_METRICS=True)')
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')